@@ -0,0 +1,5 @@
+"""
+Benchmarks for oebuild, run from the repository root, for example:
+
+    python -m benchmarks.bench_startup --output startup.json
+"""
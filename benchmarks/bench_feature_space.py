@@ -0,0 +1,98 @@
+"""
+Configuration-space benchmark for oebuild.feature_space.
+
+A seeded synthetic feature tree shaped like the yocto-meta-openeuler one
+(see benchmarks/feature_tree.py) is written for every --features size,
+with about FEATURES_PER_CATEGORY features per category and only a
+CHAIN_RATIO share of the features depending on another category. The
+valid configurations of one machine are counted, --samples are drawn
+uniformly and the first --limit are enumerated. Results are emitted as
+JSON:
+
+    python -m benchmarks.bench_feature_space --features 200 --features 800
+"""
+
+import argparse
+import tempfile
+import time
+from collections import OrderedDict
+
+from benchmarks.feature_tree import create_feature_tree
+from benchmarks.report import build_report, emit
+from benchmarks.workspace import MACHINES, ensure_import_path
+
+DEFAULT_FEATURES = (100, 300, 600)
+FEATURES_PER_CATEGORY = 20
+CHAIN_RATIO = 0.1
+
+
+def bench_size(features, machine, samples, limit, seed):
+    """
+    count, sample and enumerate a tree of the given size
+    """
+    ensure_import_path()
+    # pylint: disable=C0415
+    from oebuild.feature_resolver import FeatureRegistry
+    from oebuild.feature_space import FeatureSpace
+
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        tree = create_feature_tree(
+            tmp,
+            features,
+            seed=seed,
+            categories=max(1, features // FEATURES_PER_CATEGORY),
+            chain_ratio=CHAIN_RATIO,
+        )
+        registry = FeatureRegistry(tree.features_dir)
+        registry.closure_index()
+        start = time.perf_counter()
+        space = FeatureSpace(registry, machine)
+        count = space.count()
+        counted = time.perf_counter()
+        space.sample(samples, seed=seed)
+        sampled = time.perf_counter()
+        enumerated = sum(1 for _ in space.configurations(limit=limit))
+        listed = time.perf_counter()
+    return {
+        'features': len(registry.features_by_full_id),
+        'configurations': str(count),
+        'count_ms': round((counted - start) * 1000, 3),
+        'sample_ms': round((sampled - counted) * 1000, 3),
+        'enumerate_ms': round((listed - sampled) * 1000, 3),
+        'enumerated': enumerated,
+    }
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--features',
+        type=int,
+        action='append',
+        help='approximate number of features, may be repeated '
+        f'(default: {", ".join(map(str, DEFAULT_FEATURES))})',
+    )
+    parser.add_argument('--machine', default=MACHINES[0])
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    for features in args.features or DEFAULT_FEATURES:
+        results[str(features)] = bench_size(
+            features, args.machine, args.samples, args.limit, args.seed
+        )
+
+    emit(
+        build_report('feature_space', machine=args.machine, results=results),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
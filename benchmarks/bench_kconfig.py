@@ -0,0 +1,135 @@
+"""
+Kconfig emission and kconfiglib load benchmark for large feature trees.
+
+For every --features size a seeded synthetic tree (see
+benchmarks/feature_tree.py) is written and the menuconfig Kconfig is
+generated in two modes, --repeat times each:
+
+- monolithic: MenuconfigGenerator.build_kconfig_text written as one file,
+  with the full depends on expressions.
+- fragments: MenuconfigGenerator.write_kconfig_tree with simplify, one
+  streamed fragment per category sourced from the top-level Kconfig.
+
+For both the emission time, the peak Python memory of one emission, the
+size of the depends on expressions and the time kconfiglib takes to parse
+the result are reported as JSON:
+
+    python -m benchmarks.bench_kconfig --features 1000 --features 10000
+"""
+
+import argparse
+import gc
+import pathlib
+import tempfile
+import tracemalloc
+import warnings
+from collections import OrderedDict
+
+from benchmarks.feature_tree import create_feature_tree
+from benchmarks.report import build_report, emit, stats, timed
+from benchmarks.workspace import MACHINES, ensure_import_path
+
+DEFAULT_FEATURES = (1000, 10000)
+MODES = ('monolithic', 'fragments')
+
+
+def _peak_kib(func):
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(features, repeat, seed):
+    """
+    time both modes on a tree of the given size, return its result dict
+    """
+    ensure_import_path()
+    # pylint: disable=C0415
+    from kconfiglib import Kconfig
+
+    from oebuild.app.plugins.generate.menuconfig_generator import (
+        MenuconfigGenerator,
+    )
+    from oebuild.feature_resolver import FeatureRegistry
+
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        tree = create_feature_tree(tmp, features, seed)
+        registry = FeatureRegistry(tree.features_dir)
+        out_dir = pathlib.Path(tmp, 'kconfig')
+        out_dir.mkdir()
+
+        def monolithic():
+            text = MenuconfigGenerator(
+                registry=registry,
+                platform_dir=tree.platform_dir,
+                default_platform=MACHINES[0],
+            ).build_kconfig_text()
+            path = out_dir / 'Kconfig.monolithic'
+            path.write_text(text, encoding='utf-8')
+            return path
+
+        def fragments():
+            return MenuconfigGenerator(
+                registry=registry,
+                platform_dir=tree.platform_dir,
+                default_platform=MACHINES[0],
+                simplify=True,
+            ).write_kconfig_tree(out_dir / 'tree')
+
+        result = OrderedDict([('features', len(registry.features_by_full_id))])
+        for mode, emit_func in zip(MODES, (monolithic, fragments)):
+            emit_ms, path = timed(emit_func, repeat)
+            peak = _peak_kib(emit_func)
+
+            def load(path=path):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    return Kconfig(str(path), warn=False)
+
+            load_ms, kconf = timed(load, repeat)
+            result[mode] = {
+                'emit_ms': stats(emit_ms),
+                'emit_peak_kib': peak,
+                'depends_chars': sum(
+                    len(str(sym.direct_dep))
+                    for sym in kconf.unique_defined_syms
+                ),
+                'kconfiglib_load_ms': stats(load_ms),
+            }
+            # a live Kconfig slows the garbage collector in the next mode
+            del kconf
+            gc.collect()
+    return result
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--features',
+        type=int,
+        action='append',
+        help='approximate number of features, may be repeated '
+        f'(default: {", ".join(map(str, DEFAULT_FEATURES))})',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    for features in sorted(args.features or DEFAULT_FEATURES):
+        results[str(features)] = bench_size(features, args.repeat, args.seed)
+    emit(
+        build_report('kconfig', repeat=args.repeat, results=results),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
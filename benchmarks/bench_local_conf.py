@@ -0,0 +1,150 @@
+"""
+local.conf update benchmark for large configuration files.
+
+For every --lines size a seeded synthetic local.conf is written, with
+assignments, comments and continued values, together with a compile.yaml
+local_conf of a tenth of its size that comments out some of the existing
+lines. --repeat times each, it times:
+
+- update: LocalConf(path).update of the compile.yaml local_conf, reading
+  and writing the file, on a fresh copy every time.
+- parse: LocalConfModel construction from the file text.
+- get: LocalConfModel.get of every assigned variable.
+- set: LocalConfModel.set of every assigned variable to a new value.
+
+Results are emitted as JSON:
+
+    python -m benchmarks.bench_local_conf --lines 2000 --lines 20000
+"""
+
+import argparse
+import pathlib
+import random
+import tempfile
+from collections import OrderedDict
+
+from benchmarks.report import build_report, emit, stats, timed
+from benchmarks.workspace import ensure_import_path
+
+DEFAULT_LINES = (2000, 20000)
+
+
+def create_local_conf(lines, seed):
+    """
+    return the text of a local.conf of about the given number of lines, the
+    variables it assigns and a user local_conf for it
+    """
+    rng = random.Random(seed)
+    content = []
+    names = []
+    while len(content) < lines:
+        roll = rng.random()
+        name = f'VAR_{len(names)}'
+        if roll < 0.1:
+            content.append(f'# {name} documents the next assignment')
+        elif roll < 0.15:
+            content.append('')
+        elif roll < 0.2:
+            content.append(f'{name} = "\\')
+            content.extend(f'    item{index} \\' for index in range(3))
+            content.append('    "')
+            names.append(name)
+        else:
+            op = rng.choice(('=', '?=', '+=', ':append ='))
+            if op == ':append =':
+                content.append(f'{name}:append = " value{len(names)}"')
+                names.append(f'{name}:append')
+            else:
+                content.append(f'{name} {op} "value{len(names)}"')
+                names.append(name)
+    user = []
+    for _ in range(max(1, lines // 10)):
+        if rng.random() < 0.05:
+            user.append('#' + rng.choice(content))
+        else:
+            user.append(f'  USER_{len(user)} = "{rng.random()}"')
+    return '\n'.join(content) + '\n', names, '\n'.join(user)
+
+
+def bench_size(lines, repeat, seed):
+    """
+    time every operation on a local.conf of the given size, return its
+    result dict
+    """
+    ensure_import_path()
+    # pylint: disable=C0415
+    from oebuild.local_conf import LocalConf, LocalConfModel
+    from oebuild.parse_param import ParseCompileParam
+
+    text, names, user = create_local_conf(lines, seed)
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        path = pathlib.Path(tmp, 'local.conf')
+
+        def update():
+            compile_param = ParseCompileParam.parse_to_obj(
+                {'build_in': 'docker', 'machine': 'qemu', 'local_conf': user}
+            )
+            return LocalConf(str(path)).update(compile_param)
+
+        update_ms, _ = timed(
+            update, repeat, lambda: path.write_text(text, encoding='utf-8')
+        )
+        updated_lines = path.read_text(encoding='utf-8').count('\n')
+
+    parse_ms, model = timed(lambda: LocalConfModel(text), repeat)
+
+    def get():
+        for name in names:
+            model.get(name)
+
+    get_ms, _ = timed(get, repeat)
+
+    models = []
+
+    def set_all():
+        for name in names:
+            models[-1].set(name, 'changed')
+
+    set_ms, _ = timed(
+        set_all, repeat, lambda: models.append(LocalConfModel(text))
+    )
+    return {
+        'lines': text.count('\n'),
+        'user_lines': user.count('\n') + 1,
+        'updated_lines': updated_lines,
+        'variables': len(names),
+        'update_ms': stats(update_ms),
+        'parse_ms': stats(parse_ms),
+        'get_us': stats([sample * 1000 / len(names) for sample in get_ms]),
+        'set_us': stats([sample * 1000 / len(names) for sample in set_ms]),
+    }
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--lines',
+        type=int,
+        action='append',
+        help='approximate local.conf size in lines, may be repeated '
+        f'(default: {", ".join(map(str, DEFAULT_LINES))})',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    for lines in sorted(args.lines or DEFAULT_LINES):
+        results[str(lines)] = bench_size(lines, args.repeat, args.seed)
+    emit(
+        build_report('local_conf', repeat=args.repeat, results=results),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+one_of resolution benchmark for oebuild.feature_resolver.
+
+A synthetic feature tree (see benchmarks/feature_tree.py) with thousands
+of one_of groups is resolved in process, --repeat times per size and
+shape:
+
+- cascade: the default of every group enables the owner of the group
+  registered before it, so each default reopens an earlier group, the
+  worst case for an algorithm that rescans all groups until nothing
+  changes.
+- flat: a single root feature enables every owner and each group is
+  settled by its own default.
+
+Loading the registry is not part of the measured time. Results are
+emitted as JSON:
+
+    python -m benchmarks.bench_one_of --groups 1000 --groups 5000
+"""
+
+import argparse
+import tempfile
+import time
+from collections import OrderedDict
+
+from benchmarks.feature_tree import create_feature_tree
+from benchmarks.report import build_report, emit, stats
+from benchmarks.workspace import ensure_import_path
+
+SHAPES = ('cascade', 'flat')
+DEFAULT_GROUPS = (1000, 4000)
+
+
+def create_one_of_tree(base_dir, groups, shape):
+    """
+    write a feature tree with the given number of one_of groups under
+    base_dir, return its features dir and the features to request
+    """
+    # one category root plus an owner and two options per group
+    tree = create_feature_tree(
+        base_dir,
+        1 + 3 * groups,
+        categories=1,
+        min_sub_feats=2,
+        max_sub_feats=2,
+        one_of_ratio=1.0,
+        choice_ratio=0.0,
+        alias_ratio=0.0,
+        machine_ratio=0.0,
+        depth=1,
+        chain_defaults=shape == 'cascade',
+    )
+    if shape == 'cascade':
+        return tree.features_dir, tree.top_level[-1:]
+    category = tree.full_ids[0]
+    (tree.features_dir / category / 'root.yaml').write_text(
+        f'id: root\nselects: [{", ".join(tree.top_level)}]\n',
+        encoding='utf-8',
+    )
+    return tree.features_dir, [f'{category}/root']
+
+
+def bench_shape(groups, shape, repeat):
+    """
+    resolve a tree of the given size and shape, return its result dict
+    """
+    ensure_import_path()
+    # pylint: disable=C0415
+    from oebuild.feature_resolver import FeatureRegistry, FeatureResolver
+
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        features_dir, requested = create_one_of_tree(tmp, groups, shape)
+        start = time.perf_counter()
+        registry = FeatureRegistry(features_dir)
+        load_ms = (time.perf_counter() - start) * 1000
+        samples = []
+        enabled = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = FeatureResolver(registry, 'qemu-aarch64').resolve(
+                requested
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+            enabled = len(result.features)
+    return {
+        'groups': groups,
+        'shape': shape,
+        'features': len(registry.features_by_full_id),
+        'enabled': enabled,
+        'load_ms': round(load_ms, 3),
+        'resolve_ms': stats(samples),
+    }
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--groups',
+        type=int,
+        action='append',
+        help='number of one_of groups, may be repeated '
+        f'(default: {", ".join(map(str, DEFAULT_GROUPS))})',
+    )
+    parser.add_argument(
+        '--shape',
+        action='append',
+        choices=SHAPES,
+        help='run only the given shape, may be repeated',
+    )
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    for groups in args.groups or DEFAULT_GROUPS:
+        for shape in args.shape or SHAPES:
+            results[f'{shape}-{groups}'] = bench_shape(
+                groups, shape, args.repeat
+            )
+
+    emit(
+        build_report('one_of', repeat=args.repeat, results=results),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Batch feature-resolution throughput benchmark.
+
+A seeded synthetic feature tree (see benchmarks/feature_tree.py, with
+selects on top of its dependencies, machine constraints and one_of
+groups) is loaded once, then a build matrix of every machine crossed with
+--combos random combinations of top-level features is resolved --repeat
+times in each mode:
+
+- single: a fresh FeatureResolver per entry, as generate does today.
+- batch: one BatchResolver for the whole matrix, in process.
+- batch-jobs: the same with --jobs worker processes.
+
+Results are emitted as JSON with entries per second for every mode:
+
+    python -m benchmarks.bench_resolve_batch --combos 200 --jobs 4
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import OrderedDict
+
+from benchmarks.feature_tree import create_feature_tree
+from benchmarks.report import build_report, emit, stats
+from benchmarks.workspace import MACHINES, ensure_import_path
+
+MODES = ('single', 'batch', 'batch-jobs')
+
+
+def build_matrix(full_ids, combos, seed):
+    """
+    return every machine crossed with combos random feature combinations
+    """
+    rng = random.Random(seed)
+    requests = [
+        sorted(rng.sample(full_ids, rng.randint(1, 4))) for _ in range(combos)
+    ]
+    return [(machine, request) for machine in MACHINES for request in requests]
+
+
+def _run_mode(mode, registry, entries, jobs):
+    # pylint: disable=C0415
+    from oebuild.feature_resolver import (
+        BatchResolver,
+        FeatureError,
+        FeatureResolver,
+    )
+
+    failed = 0
+    if mode == 'single':
+        for machine, requested in entries:
+            try:
+                FeatureResolver(registry, machine).resolve(requested)
+            except FeatureError:
+                failed += 1
+        return failed
+    results = BatchResolver(registry).resolve(
+        entries, jobs=jobs if mode == 'batch-jobs' else 1
+    )
+    return sum(1 for entry in results if not entry.ok)
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--features-per-category', type=int, default=50)
+    parser.add_argument('--combos', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    ensure_import_path()
+    # pylint: disable=C0415
+    from oebuild.feature_resolver import FeatureRegistry
+
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        tree = create_feature_tree(
+            tmp,
+            args.categories * args.features_per_category,
+            seed=args.seed,
+            categories=args.categories,
+            select_ratio=0.3,
+        )
+        registry = FeatureRegistry(tree.features_dir)
+        registry.closure_index()
+        entries = build_matrix(tree.top_level, args.combos, args.seed)
+        for mode in MODES:
+            samples = []
+            failed = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                failed = _run_mode(mode, registry, entries, args.jobs)
+                samples.append((time.perf_counter() - start) * 1000)
+            results[mode] = {
+                'entries': len(entries),
+                'failed': failed,
+                'wall_ms': stats(samples),
+                'entries_per_s': round(len(entries) / (min(samples) / 1000), 1),
+            }
+
+    emit(
+        build_report(
+            'resolve_batch',
+            repeat=args.repeat,
+            features=len(tree.full_ids),
+            jobs=args.jobs,
+            results=results,
+        ),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
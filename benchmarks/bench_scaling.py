@@ -0,0 +1,161 @@
+"""
+Feature-tree scaling benchmark for registry, resolver and menuconfig.
+
+For every --features size a seeded synthetic tree (see
+benchmarks/feature_tree.py) is written and, --repeat times each, timed:
+
+- load: FeatureRegistry construction, cold, without a snapshot.
+- resolve_id: FeatureRegistry.resolve_id over every full id and alias.
+- resolve: FeatureResolver.resolve of --requests random feature sets.
+- kconfig: MenuconfigGenerator.build_kconfig_text.
+
+Results are emitted as JSON with per-operation times and, between the
+smallest and the largest size, the growth exponent of each operation: about
+1 for a linear whole-tree pass, about 0 for a per-lookup cost that does not
+depend on the tree size. A jump there is an algorithmic regression:
+
+    python -m benchmarks.bench_scaling --features 100 --features 10000
+"""
+
+import argparse
+import math
+import random
+import tempfile
+from collections import OrderedDict
+
+from benchmarks.feature_tree import create_feature_tree
+from benchmarks.report import build_report, emit, stats, timed
+from benchmarks.workspace import MACHINES, ensure_import_path
+
+DEFAULT_FEATURES = (100, 1000, 10000)
+OPERATIONS = ('load', 'resolve_id', 'resolve', 'kconfig')
+
+
+def bench_size(features, repeat, requests, seed):
+    """
+    time every operation on a tree of the given size, return its result
+    dict
+    """
+    ensure_import_path()
+    # pylint: disable=C0415
+    import oebuild.util as oebuild_util
+    from oebuild.app.plugins.generate.menuconfig_generator import (
+        MenuconfigGenerator,
+    )
+    from oebuild.feature_resolver import (
+        FeatureError,
+        FeatureRegistry,
+        FeatureResolver,
+    )
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        tree = create_feature_tree(tmp, features, seed)
+
+        def load():
+            # parse every file again, not the in-process YAML cache
+            oebuild_util._SAFE_YAML_CACHE.clear()  # pylint: disable=W0212
+            return FeatureRegistry(tree.features_dir)
+
+        load_ms, registry = timed(load, repeat)
+
+        def resolve_ids():
+            for identifier in tree.identifiers:
+                registry.resolve_id(identifier)
+
+        resolve_id_ms, _ = timed(resolve_ids, repeat)
+
+        sets = [
+            rng.sample(
+                tree.top_level, min(len(tree.top_level), rng.randint(1, 4))
+            )
+            for _ in range(requests)
+        ]
+        machine = MACHINES[0]
+
+        def resolve():
+            failed = 0
+            for requested in sets:
+                try:
+                    FeatureResolver(registry, machine).resolve(requested)
+                except FeatureError:
+                    failed += 1
+            return failed
+
+        resolve_ms, failed = timed(resolve, repeat)
+
+        def kconfig():
+            return MenuconfigGenerator(
+                registry=registry,
+                platform_dir=tree.platform_dir,
+                default_platform=machine,
+            ).build_kconfig_text()
+
+        kconfig_ms, text = timed(kconfig, repeat)
+
+    return {
+        'features': len(registry.features_by_full_id),
+        'identifiers': len(tree.identifiers),
+        'requests': len(sets),
+        'failed_requests': failed,
+        'kconfig_lines': text.count('\n'),
+        'load_ms': stats(load_ms),
+        'resolve_id_us': stats(
+            [sample * 1000 / len(tree.identifiers) for sample in resolve_id_ms]
+        ),
+        'resolve_us': stats(
+            [sample * 1000 / len(sets) for sample in resolve_ms]
+        ),
+        'kconfig_ms': stats(kconfig_ms),
+    }
+
+
+def growth(small, large):
+    """
+    growth exponent of every operation between two sizes, from the median
+    times
+    """
+    scale = math.log(large['features'] / small['features'])
+    result = OrderedDict()
+    for operation, unit in zip(OPERATIONS, ('ms', 'us', 'us', 'ms')):
+        key = f'{operation}_{unit}'
+        ratio = large[key]['median'] / max(small[key]['median'], 1e-6)
+        result[operation] = round(math.log(ratio) / scale, 2)
+    return result
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--features',
+        type=int,
+        action='append',
+        help='approximate number of features, may be repeated '
+        f'(default: {", ".join(map(str, DEFAULT_FEATURES))})',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    sizes = sorted(args.features or DEFAULT_FEATURES)
+    results = OrderedDict()
+    for features in sizes:
+        results[str(features)] = bench_size(
+            features, args.repeat, args.requests, args.seed
+        )
+
+    fields = {'repeat': args.repeat, 'results': results}
+    if len(sizes) > 1:
+        fields['growth'] = growth(
+            results[str(sizes[0])], results[str(sizes[-1])]
+        )
+    emit(build_report('scaling', **fields), args.output)
+
+
+if __name__ == '__main__':
+    main()
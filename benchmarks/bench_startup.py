@@ -0,0 +1,166 @@
+"""
+Startup-time benchmark for the oebuild entry point.
+
+Every case runs oebuild.app.main:main in a fresh interpreter inside a
+synthetic workspace (see benchmarks/workspace.py), once cold with an empty
+oebuild cache dir and then --repeat times warm. Each case is also run once
+under ``python -X importtime`` to record the total import time and the
+heaviest top-level packages, so a plugin that adds an expensive top-level
+import shows up in the report. Results are emitted as JSON:
+
+    python -m benchmarks.bench_startup --repeat 10 --output startup.json
+
+The driver bypasses check_user() so the benchmark can run as root in CI.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict, defaultdict
+
+from benchmarks.report import build_report, emit, stats
+from benchmarks.workspace import SRC_DIR, create_workspace
+
+DRIVER = """
+import sys
+import oebuild.app.main as oebuild_main
+oebuild_main.check_user = lambda: True
+sys.argv = ['oebuild'] + sys.argv[1:]
+oebuild_main.main(sys.argv[1:])
+"""
+
+CASES = OrderedDict(
+    [
+        ('help', ['-h']),
+        ('version', ['-v']),
+        ('generate_list', ['generate', '-l']),
+        ('bitbake_help', ['bitbake', '-h']),
+        ('manifest_help', ['manifest', '-h']),
+        ('quickbuild', ['quickbuild.yaml']),
+    ]
+)
+
+
+def _env(cache_dir):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(SRC_DIR)] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    env['OEBUILD_CACHE_DIR'] = cache_dir
+    return env
+
+
+def _reset_case(workspace, name):
+    # QuickBuild asks before overwriting an existing build directory
+    if name == 'quickbuild':
+        shutil.rmtree(os.path.join(workspace, 'build', 'quickbuild'), True)
+
+
+def _run(argv, workspace, env, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', DRIVER] + argv
+    start = time.perf_counter()
+    res = subprocess.run(
+        cmd,
+        cwd=workspace,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if res.returncode != 0:
+        raise RuntimeError(
+            f'oebuild {" ".join(argv)} failed:\n{res.stdout}\n{res.stderr}'
+        )
+    return elapsed, res.stderr
+
+
+def parse_importtime(stderr, top=10):
+    """
+    parse ``-X importtime`` output, return the total import time in ms and
+    the top level packages sorted by their self time
+    """
+    total_us = 0
+    by_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:') :].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us = int(fields[0])
+        total_us += self_us
+        by_package[fields[2].strip().split('.')[0]] += self_us
+    heaviest = sorted(by_package.items(), key=lambda kv: -kv[1])[:top]
+    return round(total_us / 1000, 3), OrderedDict(
+        (name, round(us / 1000, 3)) for name, us in heaviest
+    )
+
+
+def bench_case(name, argv, workspace, repeat):
+    """
+    run a single case and return its result dict
+    """
+    cache_dir = tempfile.mkdtemp(prefix='oebuild-bench-cache-')
+    try:
+        env = _env(cache_dir)
+        _reset_case(workspace, name)
+        cold, _ = _run(argv, workspace, env)
+        samples = []
+        for _ in range(repeat):
+            _reset_case(workspace, name)
+            elapsed, _ = _run(argv, workspace, env)
+            samples.append(elapsed)
+        _reset_case(workspace, name)
+        _, stderr = _run(argv, workspace, env, importtime=True)
+        import_ms, heaviest = parse_importtime(stderr)
+    finally:
+        shutil.rmtree(cache_dir, True)
+    return {
+        'argv': argv,
+        'cold_ms': round(cold, 3),
+        'wall_ms': stats(samples),
+        'import_ms': import_ms,
+        'heaviest_imports_ms': heaviest,
+    }
+
+
+def main(argv=None):
+    """
+    benchmark entrypoint
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--case',
+        action='append',
+        choices=list(CASES),
+        help='run only the given case, may be repeated',
+    )
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory(prefix='oebuild-bench-') as tmp:
+        workspace = str(create_workspace(tmp))
+        for name, case_argv in CASES.items():
+            if args.case and name not in args.case:
+                continue
+            results[name] = bench_case(name, case_argv, workspace, args.repeat)
+
+    emit(
+        build_report('startup', repeat=args.repeat, results=results),
+        args.output,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Synthetic .oebuild/features trees for the benchmarks.
+
+The trees are shaped like the yocto-meta-openeuler one: every category has
+a root feature, top-level features carry sub_feats, some of them grouped
+in one_of sets with a default or offered as choice add-ons, a share of the
+features declare legacy aliases and machine lists, and dependencies form
+chains up to a given depth across categories. Everything is derived from
+a seed, so two runs with the same arguments write the same tree.
+"""
+
+import math
+import pathlib
+import random
+from typing import List, NamedTuple
+
+from benchmarks.workspace import MACHINES
+
+
+class FeatureTree(NamedTuple):
+    features_dir: pathlib.Path
+    platform_dir: pathlib.Path
+    # every full id, in the order the features were written
+    full_ids: List[str]
+    # full ids of the top-level (non category root) features
+    top_level: List[str]
+    # identifiers users type: full ids and aliases
+    identifiers: List[str]
+
+
+def _yaml_list(items):
+    return f'[{", ".join(items)}]'
+
+
+def create_feature_tree(
+    base_dir,
+    features,
+    seed=0,
+    categories=None,
+    max_sub_feats=3,
+    one_of_ratio=0.3,
+    choice_ratio=0.2,
+    alias_ratio=0.2,
+    machine_ratio=0.1,
+    depth=4,
+    min_sub_feats=0,
+    select_ratio=0.0,
+    chain_defaults=False,
+    chain_ratio=1.0,
+):
+    """
+    write a tree of about the given number of features under base_dir,
+    together with a platform dir listing MACHINES, and return a FeatureTree
+
+    categories defaults to about sqrt(features) / 2. Every top-level
+    feature gets min_sub_feats to max_sub_feats sub_feats; with one_of_ratio
+    they form a one_of group (one_of fan-out is the number of sub_feats),
+    with choice_ratio they are choice add-ons. A top-level feature on
+    dependency level L depends, with chain_ratio, on one or two features
+    of level L - 1, so resolving walks chains of up to depth features
+    besides category roots, and with select_ratio it selects a top-level
+    feature written before it.
+    With chain_defaults the default of every one_of group depends on the
+    owner of the group written before it, so each default reopens an
+    earlier group.
+    """
+    rng = random.Random(seed)
+    base = pathlib.Path(base_dir)
+    features_dir = base / 'features'
+    platform_dir = base / 'platform'
+    platform_dir.mkdir(parents=True)
+    for machine in MACHINES:
+        (platform_dir / f'{machine}.yaml').write_text('', encoding='utf-8')
+
+    if categories is None:
+        categories = max(1, round(math.sqrt(features) / 2))
+    names = [f'cat{index}' for index in range(categories)]
+    for name in names:
+        (features_dir / name).mkdir(parents=True)
+        (features_dir / name / f'{name}.yaml').write_text(
+            f'id: {name}\nname: {name.capitalize()}\n', encoding='utf-8'
+        )
+    full_ids = list(names)
+    top_level = []
+    identifiers = list(names)
+    levels: List[List[str]] = [[] for _ in range(max(1, depth))]
+    previous_owner = None
+
+    index = 0
+    while len(full_ids) < features:
+        category = names[index % categories]
+        leaf = f'feat{index // categories}'
+        full_id = f'{category}/{leaf}'
+        level = rng.randrange(len(levels))
+        lines = [f'id: {leaf}', f'name: {category} {leaf}']
+        if rng.random() < alias_ratio:
+            alias = f'legacy-{category}-{leaf}'
+            lines.append(f'aliases: [{alias}]')
+            identifiers.append(alias)
+        deps = [category]
+        if (
+            level
+            and levels[level - 1]
+            and (chain_ratio >= 1 or rng.random() < chain_ratio)
+        ):
+            deps.extend(
+                rng.sample(
+                    levels[level - 1],
+                    min(len(levels[level - 1]), rng.randint(1, 2)),
+                )
+            )
+        lines.append(f'dependencies: {_yaml_list(deps)}')
+        if select_ratio and top_level and rng.random() < select_ratio:
+            lines.append(f'selects: [{rng.choice(top_level)}]')
+        if rng.random() < machine_ratio:
+            machines = rng.sample(MACHINES, rng.randint(1, len(MACHINES) - 1))
+            lines.append(f'machines: {_yaml_list(machines)}')
+
+        subs = [
+            f'opt{sub}'
+            for sub in range(
+                min(
+                    rng.randint(min_sub_feats, max_sub_feats),
+                    features - len(full_ids) - 1,
+                )
+            )
+        ]
+        if subs:
+            refs = [f'self/{sub}' for sub in subs]
+            roll = rng.random()
+            chained = None
+            if len(subs) > 1 and roll < one_of_ratio:
+                lines.append(f'one_of: {_yaml_list(refs)}')
+                lines.append(f'default_one_of: {refs[0]}')
+                if chain_defaults:
+                    chained, previous_owner = previous_owner, full_id
+            elif roll < one_of_ratio + choice_ratio:
+                lines.append(f'choice: {_yaml_list(refs)}')
+            lines.append('sub_feats:')
+            for sub in subs:
+                lines.append(f'  - id: {sub}')
+                if chained and sub == subs[0]:
+                    lines.append(f'    dependencies: [{chained}]')
+        lines.append('config:')
+        lines.append('  local_conf:')
+        lines.append(f'    - \'DISTRO_FEATURES:append = " {leaf} "\'')
+        (features_dir / category / f'{leaf}.yaml').write_text(
+            '\n'.join(lines) + '\n', encoding='utf-8'
+        )
+        full_ids.append(full_id)
+        top_level.append(full_id)
+        identifiers.append(full_id)
+        levels[level].append(full_id)
+        for sub in subs:
+            full_ids.append(f'{full_id}/{sub}')
+            identifiers.append(f'{full_id}/{sub}')
+        index += 1
+    return FeatureTree(
+        features_dir, platform_dir, full_ids, top_level, identifiers
+    )
@@ -0,0 +1,93 @@
+"""
+Helpers shared by the benchmarks to build and emit their JSON reports.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections import OrderedDict
+
+from benchmarks.workspace import SRC_DIR, ensure_import_path
+
+
+def stats(samples):
+    """
+    return min/median/mean/max of samples rounded to microseconds
+    """
+    return {
+        'min': round(min(samples), 3),
+        'median': round(statistics.median(samples), 3),
+        'mean': round(statistics.mean(samples), 3),
+        'max': round(max(samples), 3),
+    }
+
+
+def timed(func, repeat, setup=None):
+    """
+    call func repeat times, return the wall time of every call in
+    milliseconds and the result of the last one. setup, when set, runs
+    before every call and is not timed
+    """
+    samples = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, result
+
+
+def oebuild_version():
+    """
+    return the version of the in-tree oebuild
+    """
+    ensure_import_path()
+    from oebuild.version import __version__  # pylint: disable=C0415
+
+    return __version__
+
+
+def git_commit():
+    """
+    return the commit the benchmark runs on, or None outside a git checkout
+    """
+    res = subprocess.run(
+        ['git', 'rev-parse', 'HEAD'],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return res.stdout.strip() if res.returncode == 0 else None
+
+
+def build_report(benchmark, **fields):
+    """
+    return the report of benchmark, fields are appended after the header
+    """
+    report = OrderedDict(
+        [
+            ('benchmark', benchmark),
+            ('oebuild_version', oebuild_version()),
+            ('commit', git_commit()),
+            ('python', platform.python_version()),
+        ]
+    )
+    report.update(fields)
+    return report
+
+
+def emit(report, output=None):
+    """
+    write report as JSON to output, or to stdout when output is not set
+    """
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as w_f:
+            w_f.write(text + '\n')
+    else:
+        print(text)
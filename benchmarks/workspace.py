@@ -0,0 +1,125 @@
+"""
+Synthetic oebuild workspace used by the benchmarks.
+
+The workspace has a .oebuild/config and a fake src/yocto-meta-openeuler
+carrying the .oebuild tree oebuild reads (platform, features, common.yaml,
+env.yaml and manifest.yaml), so commands run offline and never talk to
+docker or a git remote.
+"""
+
+import os
+import pathlib
+import sys
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent / 'src'
+
+REGISTRY = 'swr.cn-north-4.myhuaweicloud.com/openeuler-embedded'
+
+CONFIG = f"""\
+docker:
+  repo_url: {REGISTRY}/openeuler-container
+  tag_map:
+    master: latest
+basic_repo:
+  yocto_meta_openeuler:
+    path: yocto-meta-openeuler
+    remote_url: https://atomgit.com/openeuler/yocto-meta-openeuler.git
+    branch: master
+feat_root_dir: features
+"""
+
+PLATFORM = """\
+type: platform
+machine: {machine}
+toolchain_type: EXTERNAL_TOOLCHAIN_aarch64
+repos:
+  - yocto-poky
+layers:
+  - yocto-meta-openeuler/bsp/meta-openeuler-bsp
+local_conf: |
+  MACHINE_FEATURES:append = " {machine} "
+"""
+
+COMMON = """\
+repos:
+  yocto-poky:
+    url: https://atomgit.com/openeuler/yocto-poky.git
+    refspec: master
+layers:
+  - yocto-meta-openeuler/meta-openeuler
+local_conf: |
+  DISTRO = "openeuler"
+"""
+
+ENV = f"""\
+docker_image: {REGISTRY}/openeuler-container:latest
+sdk_docker_image: {REGISTRY}/openeuler-sdk:latest
+"""
+
+MANIFEST = """\
+manifest_list:
+  yocto-poky:
+    remote_url: https://atomgit.com/openeuler/yocto-poky.git
+    version: 0123456789abcdef0123456789abcdef01234567
+"""
+
+FEATURE = """\
+id: {leaf}
+name: {leaf}
+config:
+  local_conf:
+    - 'DISTRO_FEATURES:append = " {leaf} "'
+"""
+
+QUICKBUILD = """\
+build_in: host
+machine: qemu-aarch64
+toolchain_type: EXTERNAL_TOOLCHAIN_aarch64
+no_layer: true
+local_conf: |
+  DISTRO = "openeuler"
+"""
+
+MACHINES = ('qemu-aarch64', 'qemu-arm', 'raspberrypi4-64', 'x86-64')
+
+
+def ensure_import_path():
+    """
+    make the in-tree oebuild importable when it is not installed
+    """
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+
+def _write(path: pathlib.Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+
+def create_workspace(base_dir, categories=8, features_per_category=6):
+    """
+    create a synthetic oebuild workspace under base_dir and return its path,
+    the feature tree is written only when categories is not zero
+    """
+    top = pathlib.Path(base_dir)
+    _write(top / '.oebuild' / 'config', CONFIG)
+    yocto_oebuild = top / 'src' / 'yocto-meta-openeuler' / '.oebuild'
+    for machine in MACHINES:
+        _write(
+            yocto_oebuild / 'platform' / f'{machine}.yaml',
+            PLATFORM.format(machine=machine),
+        )
+    _write(yocto_oebuild / 'common.yaml', COMMON)
+    _write(yocto_oebuild / 'env.yaml', ENV)
+    _write(yocto_oebuild / 'manifest.yaml', MANIFEST)
+    for cat_index in range(categories):
+        category = f'category{cat_index}'
+        for feat_index in range(features_per_category):
+            leaf = f'{category}-feat{feat_index}'
+            _write(
+                yocto_oebuild / 'features' / category / f'{leaf}.yaml',
+                FEATURE.format(leaf=leaf),
+            )
+    _write(top / 'quickbuild.yaml', QUICKBUILD)
+    os.makedirs(top / 'build', exist_ok=True)
+    return top
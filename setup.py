@@ -53,6 +53,7 @@ setuptools.setup(
         'docker',
         'GitPython',
         'ruamel.yaml',
+        'ruamel.yaml.clib; platform_python_implementation == "CPython"',
         'dataclasses',
         'reprint',
         'prettytable',
@@ -25,7 +25,7 @@ from oebuild.m_log import logger
 from oebuild.oebuild_parser import OebuildArgumentParser, OebuildHelpAction
 from oebuild.parse_param import ParseCompileParam
 from oebuild.parse_template import get_docker_volumns
-from oebuild.spec import _ExtCommand, get_spec
+from oebuild.spec import CommandManifest, _ExtCommand, get_spec
 from oebuild.version import __version__
 
 APP = 'app'
@@ -42,6 +42,11 @@ class OebuildApp:
         self.oebuild_parser = None
         self.subparsers = {}
         self.cmd = None
+        self.manifest = CommandManifest(
+            os.path.join(
+                oebuild_util.get_cache_dir(), oebuild_const.COMMAND_MANIFEST
+            )
+        )
         try:
             plugins_dir = pathlib.Path(
                 self.base_oebuild_dir, 'app/conf', 'plugins.yaml'
@@ -52,16 +57,17 @@ class OebuildApp:
             append_plugins_dir = pathlib.Path(
                 oebuild_plugins_path, 'append_plugins.yaml'
             )
+            # plugins.yaml is parsed only when it changed, so -h and -v do
+            # not load a YAML parser
             self.command_ext = self.get_command_ext(
-                oebuild_util.read_yaml(plugins_dir)['plugins']
+                self.manifest.plugins(plugins_dir)
             )
-            if os.path.exists(append_plugins_dir) and oebuild_util.read_yaml(
-                append_plugins_dir
-            ):
-                self.command_ext = self.get_command_ext(
-                    oebuild_util.read_yaml(append_plugins_dir)['plugins'],
-                    self.command_ext,
-                )
+            if os.path.exists(append_plugins_dir):
+                append_plugins = self.manifest.plugins(append_plugins_dir)
+                if append_plugins:
+                    self.command_ext = self.get_command_ext(
+                        append_plugins, self.command_ext
+                    )
             self.command_spec = {}
         except Exception as e_p:
             raise e_p
@@ -94,7 +100,10 @@ class OebuildApp:
     def _load_extension_specs(
         self,
     ):
-        self.command_spec = extension_commands(APP, self.command_ext)
+        self.command_spec = extension_commands(
+            APP, self.command_ext, manifest=self.manifest
+        )
+        self.manifest.save()
 
     def _setup_parsers(self):
         # Set up and install command-line argument parsers.
@@ -222,17 +231,20 @@ def check_user():
     return True
 
 
-def extension_commands(pre_dir, commandlist: OrderedDict):
+def extension_commands(
+    pre_dir, commandlist: OrderedDict, manifest: CommandManifest = None
+):
     """
     Get descriptions of available extension commands.
     The return value is an ordered map from project paths to lists of
     OebuildExtCommandSpec objects, for projects which define extension
     commands. The map's iteration order matches the manifest.projects
-    order.
+    order. When a CommandManifest is given, help and description are
+    served from it and plugin modules are imported only on a cache miss.
     """
     specs = OrderedDict()
     for key, value in commandlist.items():
-        specs[key] = get_spec(pre_dir, value)
+        specs[key] = get_spec(pre_dir, value, manifest=manifest)
 
     return specs
 
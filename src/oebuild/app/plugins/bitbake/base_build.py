@@ -11,10 +11,14 @@ See the Mulan PSL v2 for more details.
 """
 
 import os
+import sys
 
 import oebuild.const as oebuild_const
+import oebuild.util as oebuild_util
 from oebuild.local_conf import LocalConf
 from oebuild.bblayers import BBLayers
+from oebuild.layer_index import LayerIndex
+from oebuild.m_log import logger
 
 
 class BaseBuild:
@@ -28,7 +32,7 @@ class BaseBuild:
         and exec update
         """
         local_conf = LocalConf(local_path)
-        local_conf.update(compile_param, src_dir)
+        self._report_conf(local_path, local_conf.update(compile_param, src_dir))
 
     def add_bblayers(
         self, bblayers_dir: str, pre_dir: str, base_dir: str, layers
@@ -41,4 +45,49 @@ class BaseBuild:
         """
         bblayers = BBLayers(bblayers_dir=bblayers_dir, base_dir=base_dir)
         pre_dir = os.path.join(pre_dir, f'{oebuild_const.YOCTO_POKY}/..')
-        bblayers.add_layer(pre_dir=pre_dir, layers=layers)
+        layers = self._plan_layers(bblayers, pre_dir, base_dir, layers)
+        self._report_conf(
+            bblayers_dir, bblayers.add_layer(pre_dir=pre_dir, layers=layers)
+        )
+
+    @staticmethod
+    def _plan_layers(bblayers: BBLayers, pre_dir, base_dir, layers):
+        """
+        check the layers against their layer.conf before bitbake parses
+        anything: the layers they depend on are added, missing ones stop
+        the build, incompatible ones are warned about, and the layers come
+        after the ones they depend on
+        """
+        if isinstance(layers, str):
+            layers = [layers]
+        src_dir = os.path.normpath(pre_dir)
+        present = []
+        for path in bblayers.layers():
+            path = os.path.normpath(path)
+            if path.startswith(src_dir + os.sep):
+                path = os.path.relpath(path, src_dir)
+            present.append(path)
+        plan = LayerIndex(base_dir, oebuild_util.get_cache_dir()).plan(
+            layers or [], present
+        )
+        for warning in plan.warnings:
+            logger.warning(warning)
+        if plan.errors:
+            for error in plan.errors:
+                logger.error(error)
+            sys.exit(1)
+        for added, needed_by in plan.added.items():
+            logger.info('add layer %s, %s depends on it', added, needed_by)
+        return plan.layers
+
+    @staticmethod
+    def _report_conf(conf_path, changed):
+        """
+        tell which configuration files were rewritten, bitbake re-parses
+        its configuration only for those
+        """
+        name = os.path.join(*conf_path.split(os.sep)[-2:])
+        if changed:
+            logger.info('%s updated', name)
+        else:
+            logger.info('%s unchanged', name)
@@ -15,8 +15,6 @@ import argparse
 import textwrap
 import sys
 
-from docker.errors import DockerException
-
 from oebuild.command import OebuildCommand
 from oebuild.configure import Configure
 from oebuild.struct import CompileParam
@@ -134,6 +132,8 @@ class Bitbake(OebuildCommand):
             # function rather than terminating the entire process when it is done executing.
             return
 
+        from docker.errors import DockerException  # pylint: disable=C0415
+
         try:
             oebuild_util.check_docker()
         except DockerException as d_e:
@@ -184,7 +184,7 @@ class Bitbake(OebuildCommand):
                     compile_param.docker_param.image = item_split[1]
                     is_modify = True
         if is_modify:
-            oebuild_util.write_yaml(
+            oebuild_util.write_yaml_if_changed(
                 self.compile_conf_dir,
                 ParseCompileParam().parse_to_dict(compile_param),
             )
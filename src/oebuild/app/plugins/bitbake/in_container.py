@@ -10,10 +10,11 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
 import os
 import sys
-
-from docker.models.containers import Container, ExecResult
+from typing import TYPE_CHECKING
 
 from oebuild.parse_env import ParseEnv
 from oebuild.docker_proxy import DockerProxy
@@ -25,6 +26,9 @@ from oebuild.bashrc import Bashrc
 import oebuild.util as oebuild_util
 import oebuild.const as oebuild_const
 
+if TYPE_CHECKING:
+    from docker.models.containers import Container, ExecResult
+
 
 class InContainer(BaseBuild):
     """
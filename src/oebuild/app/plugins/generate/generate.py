@@ -15,6 +15,7 @@ import os
 import pathlib
 import subprocess
 import sys
+import tempfile
 import textwrap
 from shutil import rmtree
 
@@ -24,20 +25,27 @@ from prettytable import HRuleStyle, PrettyTable, TableStyle, VRuleStyle
 from ruamel.yaml.scalarstring import LiteralScalarString
 
 from oebuild.app.plugins.generate.menuconfig_generator import (
+    KconfigCache,
     MenuconfigSelection,
     MenuconfigGenerator,
+    list_platforms,
 )
+from oebuild.app.plugins.generate.matrix import load_matrix, write_build_dirs
 from oebuild.app.plugins.generate.parses import parsers
 from oebuild.check_docker_tag import CheckDockerTag
 from oebuild.command import OebuildCommand
 from oebuild.configure import Configure
 from oebuild.m_log import logger
 from oebuild.feature_resolver import (
+    BatchResolver,
     ResolutionError,
     FeatureResolver,
     FeatureError,
     FeatureRegistry,
+    feature_tree_digest,
 )
+from oebuild.feature_space import FeatureSpace
+from oebuild.resolution_cache import ResolutionCache
 from oebuild.parse_template import (
     BaseParseTemplate,
     FeatureTemplate,
@@ -62,6 +70,10 @@ class Generate(OebuildCommand):
               oebuild generate -p qemu-aarch64                    # menuconfig
               oebuild generate -p qemu-aarch64 -f mcs             # select feature
               oebuild generate --list                             # list features
+              oebuild generate -p qemu-aarch64 --list             # its features
+              oebuild generate -p qemu-aarch64 --configs sample   # sampled sets
+              oebuild generate --resolve_cache list               # resolutions
+              oebuild generate --matrix matrix.yaml               # many builds
 
             Nested feature IDs auto-resolve dependencies:
               oebuild generate -p qemu-aarch64 -f mcs/xen
@@ -71,6 +83,7 @@ class Generate(OebuildCommand):
         self.configure = Configure()
         self.params = {}
         self.yocto_dir = None
+        self.features_dir = None
         self.feature_registry = None
         super().__init__('generate', self.help_msg, self.description)
 
@@ -102,10 +115,24 @@ class Generate(OebuildCommand):
 
         parsed_args = args.parse_args(unknown)
 
+        if parsed_args.resolve_cache:
+            self.resolve_cache(parsed_args.resolve_cache)
+            return
+
         self._validate_environment()
 
+        if parsed_args.matrix:
+            self.generate_matrix(parsed_args)
+            return
+
         if parsed_args.list:
-            self.list_info()
+            self.list_info(
+                parsed_args.platform if self._platform_given(unknown) else None
+            )
+            return
+
+        if parsed_args.configs:
+            self.list_configs(parsed_args)
             return
 
         # Handle special build modes (nativesdk, gcc, llvm) like generate.py does
@@ -203,25 +230,32 @@ class Generate(OebuildCommand):
             )
             sys.exit(-1)
 
+        feat_root_dir = (
+            oebuild_config.feat_root_dir.strip()
+            if isinstance(oebuild_config.feat_root_dir, str)
+            else ''
+        )
+        if not feat_root_dir:
+            feat_root_dir = 'features'
+        self.features_dir = pathlib.Path(yocto_dir, '.oebuild', feat_root_dir)
+
+    def _load_feature_registry(self):
+        """
+        load the feature registry on first use, resolutions served from
+        the resolution cache never need it
+        """
+        if self.feature_registry is not None:
+            return
         try:
-            feat_root_dir = (
-                oebuild_config.feat_root_dir.strip()
-                if isinstance(oebuild_config.feat_root_dir, str)
-                else ''
-            )
-            if not feat_root_dir:
-                feat_root_dir = 'features'
-            features_dir = pathlib.Path(
-                yocto_dir, '.oebuild', feat_root_dir
-            )
             # Backward-compat fallback: older yocto-meta-openeuler checkouts
             # keep the categorized tree under 'nightly-features' and still
             # carry a flat 'features/' dir (which loads zero categorized
             # features). If the configured dir is missing OR loads nothing,
             # fall back to 'nightly-features' so generate works both before
             # and after the directory is renamed to 'features'.
-            registry = self._maybe_fallback_registry(yocto_dir, features_dir)
-            self.feature_registry = registry
+            self.feature_registry = self._maybe_fallback_registry(
+                self.yocto_dir, self.features_dir
+            )
         except FeatureError as err:
             logger.error(str(err))
             sys.exit(-1)
@@ -237,12 +271,16 @@ class Generate(OebuildCommand):
         generate working across the directory rename from 'nightly-features'
         to 'features'.
         """
-        registry = FeatureRegistry(features_dir)
+        cache_dir = oebuild_util.get_cache_dir()
+        jobs = os.cpu_count() or 1
+        registry = FeatureRegistry(features_dir, cache_dir=cache_dir, jobs=jobs)
         if registry.features_by_full_id:
             return registry
         legacy_dir = pathlib.Path(yocto_dir, '.oebuild', 'nightly-features')
         if legacy_dir.exists() and legacy_dir != features_dir.resolve():
-            legacy_registry = FeatureRegistry(legacy_dir)
+            legacy_registry = FeatureRegistry(
+                legacy_dir, cache_dir=cache_dir, jobs=jobs
+            )
             if legacy_registry.features_by_full_id:
                 return legacy_registry
         return registry
@@ -256,16 +294,49 @@ class Generate(OebuildCommand):
             except OSError:
                 pass
         try:
-            generator = MenuconfigGenerator(
-                registry=self.feature_registry,
-                platform_dir=platform_dir,
-                default_platform=args.platform,
-            )
+            platforms = list_platforms(platform_dir)
         except ValueError as exc:
             logger.error('Menuconfig setup failed: %s', exc)
             sys.exit(-1)
+        # an unchanged tree reuses the Kconfig of the last run and never
+        # loads the registry
+        cache = KconfigCache(oebuild_util.get_cache_dir())
+        digest = self._configured_tree_digest()
+        key = (
+            None
+            if digest is None
+            else KconfigCache.make_key(digest, platforms, args.platform)
+        )
+        artifact = None if key is None else cache.load(key)
+        generator = None
+        if artifact is None:
+            self._load_feature_registry()
+            if self._configured_tree_digest() is None:
+                key = None
+            try:
+                generator = MenuconfigGenerator(
+                    registry=self.feature_registry,
+                    platform_dir=platform_dir,
+                    default_platform=args.platform,
+                    simplify=True,
+                )
+            except ValueError as exc:
+                logger.error('Menuconfig setup failed: %s', exc)
+                sys.exit(-1)
         try:
-            return generator.run_menuconfig()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                if generator is not None:
+                    artifact = (
+                        None if key is None else cache.store(key, generator)
+                    )
+                    if artifact is None:
+                        # not cached, the tree only lives for this run
+                        key = None
+                        artifact = generator.build_artifact(
+                            pathlib.Path(tmpdir)
+                        )
+                kconf = KconfigCache.parsed(key, artifact)
+            return MenuconfigGenerator.run_artifact(artifact, kconf)
         except KeyboardInterrupt:
             raise
         except Exception as exc:
@@ -335,16 +406,41 @@ class Generate(OebuildCommand):
         )
         return parser_template
 
+    def _configured_tree_digest(self):
+        """
+        digest of the configured feature tree for keying caches, None when
+        it cannot be read or the loaded registry is the nightly-features
+        fallback, which lookups made before loading would never find
+        """
+        if self.feature_registry is not None:
+            if self.feature_registry.features_dir != self.features_dir:
+                return None
+            return self.feature_registry.digest
+        try:
+            return feature_tree_digest(self.features_dir)
+        except (FeatureError, OSError):
+            return None
+
     def _resolve_features(self, platform, requested):
+        cache = ResolutionCache(oebuild_util.get_cache_dir())
+        if self.feature_registry is None:
+            digest = self._configured_tree_digest()
+            if digest is not None:
+                resolution = cache.get(digest, platform, requested)
+                if resolution is not None:
+                    return resolution
+        self._load_feature_registry()
         resolver = FeatureResolver(self.feature_registry, platform)
-        return resolver.resolve(requested)
+        resolution = resolver.resolve(requested)
+        digest = self._configured_tree_digest()
+        if digest is not None:
+            cache.put(digest, platform, requested, resolution)
+        return resolution
 
     def _generate_compile_conf(
         self, args, build_dir, parser_template
     ):
         compile_yaml_path = pathlib.Path(build_dir, 'compile.yaml')
-        if compile_yaml_path.exists():
-            compile_yaml_path.unlink()
 
         docker_image = get_docker_image(
             yocto_dir=self.configure.source_yocto_dir(),
@@ -352,6 +448,19 @@ class Generate(OebuildCommand):
             configure=self.configure,
         )
 
+        # an unchanged compile.yaml keeps its mtime
+        changed = oebuild_util.write_yaml_if_changed(
+            compile_yaml_path,
+            self._compile_conf(args, build_dir, parser_template, docker_image),
+        )
+
+        self._print_generate(build_dir, changed)
+
+    def _compile_conf(self, args, build_dir, parser_template, docker_image):
+        """
+        the compile.yaml data of one build, self.params must be collected
+        for it
+        """
         param = parser_template.get_default_generate_compile_conf_param()
         param['nativesdk_dir'] = self.params.get('nativesdk_dir')
         param['toolchain_dir'] = self.params.get('toolchain_dir')
@@ -367,12 +476,7 @@ class Generate(OebuildCommand):
         param['src_dir'] = self.configure.source_dir()
         param['compile_dir'] = build_dir
         param['cache_src_dir'] = self.params.get('cache_src_dir')
-        oebuild_util.write_yaml(
-            compile_yaml_path,
-            parser_template.generate_compile_conf(param),
-        )
-
-        self._print_generate(build_dir)
+        return parser_template.generate_compile_conf(param)
 
     def _add_platform_template(
         self, args, yocto_oebuild_dir, parser_template: ParseTemplate
@@ -529,9 +633,21 @@ class Generate(OebuildCommand):
                 table.title = title
         return table
 
-    def list_info(self):
+    @staticmethod
+    def _platform_given(unknown):
+        """
+        -p has a default, tell whether it was passed on the command line
+        """
+        return any(
+            arg in ('-p', '--platform')
+            or arg.startswith('--platform=')
+            or (arg.startswith('-p') and not arg.startswith('--'))
+            for arg in unknown
+        )
+
+    def list_info(self, platform=None):
         self._list_platform()
-        self._list_feature()
+        self._list_feature(platform)
 
     def _list_platform(self):
         logger.info(
@@ -552,17 +668,23 @@ class Generate(OebuildCommand):
         table.sortby = 'Platform Name'
         print(table)
 
-    def _list_feature(self):
+    def _list_feature(self, platform=None):
+        """
+        list every feature, or only those the given platform supports
+        """
         logger.info(
             '\n================= Available Features =================='
         )
 
+        self._load_feature_registry()
         terminal_width = self._get_terminal_width()
 
         table = self._build_table(
             ['Feature Name', 'Supported Arch'],
             terminal_width,
-            title='Available Features',
+            title=f'Available Features for {platform}'
+            if platform
+            else 'Available Features',
         )
 
         def display_feature(feature, depth=0):
@@ -582,7 +704,12 @@ class Generate(OebuildCommand):
             table.add_row([display_name, support])
 
         features_by_category = {}
-        for feature in self.feature_registry.list_features():
+        features = (
+            self.feature_registry.machine_features(platform)
+            if platform
+            else self.feature_registry.list_features()
+        )
+        for feature in features:
             category = feature.category
             if category not in features_by_category:
                 features_by_category[category] = []
@@ -616,9 +743,174 @@ class Generate(OebuildCommand):
             """* 'Supported Arch' defaults to 'all' if not specified in the feature's .yaml file."""
         )
 
-    def _print_generate(self, build_dir):
+    def list_configs(self, args):
+        """
+        count, list or sample the valid feature configurations of the
+        platform, every configuration is printed as the generate command
+        that builds it
+        """
+        self._load_feature_registry()
+        try:
+            space = FeatureSpace(
+                self.feature_registry, args.platform, args.features or []
+            )
+        except ResolutionError as err:
+            logger.error(str(err))
+            sys.exit(1)
+        if args.configs == 'count':
+            print(space.count())
+            return
+        if args.configs == 'list':
+            configs = space.configurations(limit=args.configs_num)
+        else:
+            configs = space.sample(
+                10 if args.configs_num is None else args.configs_num,
+                seed=args.configs_seed,
+            )
+        for config in configs:
+            print(
+                ' '.join(
+                    ['oebuild generate -p', args.platform]
+                    + [f'-f {full_id}' for full_id in config.requested]
+                )
+            )
+
+    @staticmethod
+    def resolve_cache(action):
+        """
+        list or clear the feature resolution cache
+        """
+        cache = ResolutionCache(oebuild_util.get_cache_dir())
+        if action == 'clear':
+            logger.info(
+                'Removed %d cached resolutions from %s',
+                cache.clear(),
+                cache.cache_path,
+            )
+            return
+        entries = cache.entries()
+        for entry in entries:
+            requested = ' '.join(f'-f {full_id}' for full_id in entry.requested)
+            print(
+                f'{entry.key[:12]}  -p {entry.machine} {requested}'
+                f'  -> {len(entry.features)} features,'
+                f' tree {entry.digest[:12]}, {entry.size} bytes'
+            )
+        logger.info(
+            '%d cached resolutions, %d of %d bytes in %s',
+            len(entries),
+            cache.size(),
+            cache.max_bytes,
+            cache.cache_path,
+        )
+
+    def generate_matrix(self, args):
+        """
+        generate every build directory of a matrix file in one run: the
+        registry and templates are loaded once, all feature sets resolved
+        in one batch, and the compile.yaml files written by parallel
+        workers, rewriting only the ones that changed. Nothing is asked,
+        every invalid build is reported before anything is written
+        """
+        try:
+            builds = load_matrix(args.matrix)
+        except (OSError, ValueError) as err:
+            logger.error('Invalid matrix file: %s', err)
+            sys.exit(-1)
+
+        platform_dir = pathlib.Path(self.yocto_dir, '.oebuild', 'platform')
+        try:
+            platforms = set(list_platforms(platform_dir))
+        except ValueError as err:
+            logger.error(str(err))
+            sys.exit(-1)
+        build_dir_path = pathlib.Path(self.configure.build_dir())
+        errors = []
+        for build in builds:
+            if build.platform not in platforms:
+                errors.append(
+                    f'{build.directory}: invalid platform {build.platform}'
+                )
+            if not self._is_build_path(
+                build_dir_path / build.directory, build_dir_path
+            ):
+                errors.append(
+                    f'{build.directory}: build path must be in oebuild '
+                    'workspace'
+                )
+
+        self._load_feature_registry()
+        resolutions = BatchResolver(self.feature_registry).resolve(
+            (build.platform, build.features) for build in builds
+        )
+        for build, entry in zip(builds, resolutions):
+            if not entry.ok:
+                errors.append(f'{build.directory}: {entry.error}')
+        if errors:
+            for error in errors:
+                logger.error(error)
+            sys.exit(1)
+
+        docker_image = None
+        writes = []
+        for build, entry in zip(builds, resolutions):
+            build_args = argparse.Namespace(**vars(args))
+            build_args.platform = build.platform
+            build_args.directory = build.directory
+            build_args.features = build.features
+            for key, value in build.options.items():
+                setattr(build_args, key, value)
+            if (
+                build_args.build_in == oebuild_const.BUILD_IN_DOCKER
+                and docker_image is None
+            ):
+                docker_image = get_docker_image(
+                    yocto_dir=self.yocto_dir,
+                    docker_tag='',
+                    configure=self.configure,
+                )
+            build_dir = str(build_dir_path / build.directory)
+            try:
+                parser_template = self._prepare_parser_template(
+                    args=build_args,
+                    resolved_features=entry.result.features,
+                )
+                self.params = self._collect_params(build_args, build_dir)
+                compile_conf = self._compile_conf(
+                    build_args, build_dir, parser_template, docker_image
+                )
+            except ValueError as err:
+                logger.error('%s: %s', build.directory, err)
+                sys.exit(-1)
+            writes.append((build_dir, oebuild_util.dump_yaml(compile_conf)))
+
+        failed = 0
+        for (build_dir, _), outcome in zip(writes, write_build_dirs(writes)):
+            if isinstance(outcome, OSError):
+                failed += 1
+                logger.error('%s: %s', build_dir, outcome)
+            else:
+                logger.info(
+                    '%s: compile.yaml %s',
+                    build_dir,
+                    'generated' if outcome else 'is up to date',
+                )
+        logger.info(
+            'generated %d of %d build directories',
+            len(writes) - failed,
+            len(writes),
+        )
+        if failed:
+            sys.exit(1)
+
+    def _print_generate(self, build_dir, changed=True):
+        status = (
+            'generate compile.yaml successful'
+            if changed
+            else 'compile.yaml is up to date'
+        )
         format_dir = f"""
-generate compile.yaml successful
+{status}
 
 Run commands below:
 =============================================
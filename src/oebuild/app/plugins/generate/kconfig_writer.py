@@ -4,16 +4,22 @@ Kconfig writer with lightweight block/indent helpers.
 
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, TextIO
 
 
 class KconfigWriter:
-    """Helper for emitting Kconfig text with consistent indentation."""
+    """Helper for emitting Kconfig text with consistent indentation.
+
+    With a stream, every line is written to it as soon as it is emitted
+    instead of being kept, so arbitrarily large Kconfig files are written
+    in constant memory; lines() and text() are then not available.
+    """
 
     INDENT = '    '
     HELP_INDENT = '  '
 
-    def __init__(self) -> None:
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self._stream = stream
         self._lines: List[str] = []
         self._indent_level = 0
         self._block_stack: List[tuple[str, int]] = []
@@ -33,12 +39,18 @@ class KconfigWriter:
         self._indent_level -= levels
         return self
 
+    def _emit(self, line: str) -> None:
+        if self._stream is None:
+            self._lines.append(line)
+        else:
+            self._stream.write(f'{line}\n')
+
     def _add_line(self, content: str = '') -> 'KconfigWriter':
         if content:
             prefix = self.INDENT * self._indent_level
-            self._lines.append(f'{prefix}{content}')
+            self._emit(f'{prefix}{content}')
         else:
-            self._lines.append('')
+            self._emit('')
         return self
 
     def _pop_block(self, expected: str) -> tuple[str, int]:
@@ -136,7 +148,7 @@ class KconfigWriter:
                 f'{self.INDENT * self._indent_level}{self.HELP_INDENT}'
             )
             for line in help_lines:
-                self._lines.append(f'{help_prefix}{line}')
+                self._emit(f'{help_prefix}{line}')
         if default is not None:
             self._add_line(f'default {self._format_default(default)}')
         depends_expr = self._format_depends(depends_on)
@@ -147,14 +159,22 @@ class KconfigWriter:
         self._dedent(1)
         return self
 
-    def source(self, path: str) -> 'KconfigWriter':
-        self._add_line(f'source "{path}"')
+    def source(self, path: str, relative: bool = False) -> 'KconfigWriter':
+        # rsource paths are relative to the including file, not $srctree
+        keyword = 'rsource' if relative else 'source'
+        self._add_line(f'{keyword} "{path}"')
         return self
 
+    def _check_kept(self) -> None:
+        if self._stream is not None:
+            raise ValueError('Kconfig lines were streamed and not kept')
+
     def lines(self) -> List[str]:
+        self._check_kept()
         return list(self._lines)
 
     def text(self) -> str:
+        self._check_kept()
         return '\n'.join(self._lines)
 
     def get_lines(self) -> List[str]:
@@ -0,0 +1,185 @@
+"""
+Build matrix files for generate --matrix.
+
+A matrix file lists build directories, each with a platform, features and
+generate options, so that a whole set of builds is generated in one run:
+
+    defaults:                   # optional, applies to every build
+      build_in: host
+      features: [openeuler-qt]
+    builds:
+      - platform: qemu-aarch64
+        directory: qemu-rt      # defaults to the platform
+        features: [os/rt]
+        no_fetch: true
+      - platform: raspberrypi4-64
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from shutil import rmtree
+from typing import Dict, List, Sequence, Tuple, Union
+
+import oebuild.const as oebuild_const
+import oebuild.util as oebuild_util
+
+# generate options a build may set, named like the command line dests
+MATRIX_OPTIONS = (
+    'build_in',
+    'sstate_mirrors',
+    'sstate_dir',
+    'tmp_dir',
+    'toolchain_dir',
+    'llvm_toolchain_dir',
+    'nativesdk_dir',
+    'datetime',
+    'no_fetch',
+    'no_layer',
+    'cache_src_dir',
+)
+MATRIX_BOOL_OPTIONS = ('no_fetch', 'no_layer')
+# compile.yaml writes are small, more threads only add contention
+MATRIX_IO_WORKERS = 8
+
+
+@dataclass
+class MatrixBuild:
+    """One build directory of a matrix file."""
+
+    directory: str
+    platform: str
+    features: List[str]
+    options: Dict[str, object]
+
+
+def _features(value, where: str) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(
+        isinstance(item, str) for item in value
+    ):
+        raise ValueError(f'{where}: features must be a list of feature ids')
+    return list(value)
+
+
+def _options(entry: Dict, where: str) -> Dict[str, object]:
+    options = {}
+    for key in MATRIX_OPTIONS:
+        if key not in entry:
+            continue
+        value = entry[key]
+        if key in MATRIX_BOOL_OPTIONS:
+            if not isinstance(value, bool):
+                raise ValueError(f'{where}: {key} must be true or false')
+        elif value is not None:
+            value = str(value)
+        if key == 'build_in' and value not in (
+            oebuild_const.BUILD_IN_DOCKER,
+            oebuild_const.BUILD_IN_HOST,
+        ):
+            raise ValueError(
+                f'{where}: build_in must be '
+                f'{oebuild_const.BUILD_IN_DOCKER} or '
+                f'{oebuild_const.BUILD_IN_HOST}'
+            )
+        options[key] = value
+    return options
+
+
+def _check_keys(entry, allowed: Sequence[str], where: str) -> None:
+    if not isinstance(entry, dict):
+        raise ValueError(f'{where} must be a mapping')
+    unknown = sorted(str(key) for key in entry if key not in allowed)
+    if unknown:
+        raise ValueError(f'{where}: unknown keys {", ".join(unknown)}')
+
+
+def load_matrix(matrix_path: Union[str, os.PathLike]) -> List[MatrixBuild]:
+    """
+    read a matrix file, raise ValueError naming the first problem found
+    """
+    try:
+        data = oebuild_util.read_yaml_safe(matrix_path)
+    except ValueError:
+        raise
+    # a YAML syntax error, reported like the other problems
+    except Exception as err:  # pylint: disable=broad-except
+        raise ValueError(f'{matrix_path}: {err}') from err
+    _check_keys(data, ('defaults', 'builds'), str(matrix_path))
+    defaults = data.get('defaults') or {}
+    _check_keys(defaults, ('features', *MATRIX_OPTIONS), 'defaults')
+    default_features = _features(defaults.get('features'), 'defaults')
+    default_options = _options(defaults, 'defaults')
+
+    entries = data.get('builds')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f'{matrix_path}: builds must list at least one build')
+    builds = []
+    directories = set()
+    for index, entry in enumerate(entries, start=1):
+        where = f'build {index}'
+        _check_keys(
+            entry, ('platform', 'directory', 'features', *MATRIX_OPTIONS), where
+        )
+        platform = entry.get('platform')
+        if not isinstance(platform, str) or not platform.strip():
+            raise ValueError(f'{where}: platform is required')
+        platform = platform.strip()
+        directory = str(entry.get('directory') or platform).strip()
+        if directory in directories:
+            raise ValueError(f'{where}: directory {directory} is listed twice')
+        directories.add(directory)
+        builds.append(
+            MatrixBuild(
+                directory=directory,
+                platform=platform,
+                features=list(
+                    dict.fromkeys(
+                        default_features
+                        + _features(entry.get('features'), where)
+                    )
+                ),
+                options={**default_options, **_options(entry, where)},
+            )
+        )
+    return builds
+
+
+def _write_build_dir(build_dir: str, compile_yaml: str) -> bool:
+    changed = oebuild_util.write_if_changed(
+        pathlib.Path(build_dir, 'compile.yaml'), compile_yaml
+    )
+    # conf/ is generated from compile.yaml on the next bitbake run, like
+    # generate -y does; an unchanged build keeps it
+    conf_dir = pathlib.Path(build_dir, 'conf')
+    if changed and conf_dir.exists():
+        rmtree(conf_dir)
+    return changed
+
+
+def write_build_dirs(
+    writes: Sequence[Tuple[str, str]],
+) -> List[Union[bool, OSError]]:
+    """
+    write the compile.yaml text of every (build_dir, text) pair with
+    parallel workers. Every pair gets whether its compile.yaml changed, or
+    the OSError that stopped it, in the order given
+    """
+
+    def write(item: Tuple[str, str]) -> Union[bool, OSError]:
+        try:
+            return _write_build_dir(*item)
+        except OSError as err:
+            return err
+
+    if not writes:
+        return []
+    workers = min(MATRIX_IO_WORKERS, len(writes))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(write, writes))
@@ -4,24 +4,33 @@ Menuconfig generator for generate features.
 
 from __future__ import annotations
 
+import hashlib
 import os
+import pickle
 import re
+import shutil
 import tempfile
 import warnings
 from collections import OrderedDict, defaultdict
 from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Generator, List, Optional
-
-from kconfiglib import Kconfig
-from menuconfig import menuconfig
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional
 
 import oebuild.const as oebuild_const
 import oebuild.util as oebuild_util
 from oebuild.app.plugins.generate.kconfig_writer import KconfigWriter
 from oebuild.feature_resolver import Feature, FeatureRegistry
 
+if TYPE_CHECKING:
+    from kconfiglib import Kconfig
+
+KCONFIG_CACHE_DIR = 'kconfig'
+# generated Kconfig trees kept on disk, one per tree/platforms combination
+KCONFIG_CACHE_ENTRIES = 4
+# directory, next to the top-level Kconfig, of the per-category fragments
+KCONFIG_FRAGMENT_DIR = 'features'
+
 
 @dataclass(frozen=True)
 class MenuconfigSelection:
@@ -70,8 +79,155 @@ class MenuconfigSelection:
     """Optional build directory name override."""
 
 
+@dataclass
+class KconfigArtifact:
+    """Generated Kconfig tree and the symbol maps needed to read it back."""
+
+    kconfig_path: str
+    """Top-level Kconfig, sourcing the per-category fragments."""
+
+    default_platform: str
+    platform_symbol_map: Dict[str, str]
+    feature_symbol_map: Dict[str, str]
+
+
+def list_platforms(platform_dir: Path) -> List[str]:
+    """Names of the platform files under platform_dir, sorted."""
+    if not platform_dir.exists() or not platform_dir.is_dir():
+        raise ValueError(f'Platform directory not found: {platform_dir}')
+    result = []
+    for entry in sorted(platform_dir.iterdir()):
+        if not entry.is_file():
+            continue
+        if entry.suffix not in ('.yaml', '.yml'):
+            continue
+        result.append(entry.stem)
+    if not result:
+        raise ValueError(f'No platforms found under {platform_dir}')
+    return result
+
+
+class KconfigCache:
+    """Kconfig trees written under <cache_dir>/kconfig/<key>.
+
+    Each entry is the tree of write_kconfig_tree with its artifact pickled
+    next to it. Entries are keyed on the feature tree digest, the platform
+    list and the default platform, so an unchanged tree reopens menuconfig
+    without loading the registry or generating the Kconfig again. Only the
+    KCONFIG_CACHE_ENTRIES most recently used entries are kept. Parsed
+    kconfiglib objects are only kept for the life of the process: their
+    menu trees recurse too deep to be pickled.
+    """
+
+    ARTIFACT_NAME = 'artifact.pickle'
+
+    _parsed: Dict[str, Kconfig] = {}
+
+    def __init__(self, cache_dir: os.PathLike):
+        self.cache_path = Path(cache_dir, KCONFIG_CACHE_DIR)
+
+    @staticmethod
+    def make_key(
+        digest: str, platforms: List[str], default_platform: Optional[str]
+    ) -> str:
+        payload = '\0'.join((digest, default_platform or '', *platforms))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_path / key
+
+    def load(self, key: str) -> Optional[KconfigArtifact]:
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(entry_dir / self.ARTIFACT_NAME, 'rb') as r_f:
+                artifact = pickle.load(r_f)
+        # a missing or damaged entry only costs generating the Kconfig
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if not isinstance(artifact, KconfigArtifact):
+            return None
+        kconfig_path = entry_dir / 'Kconfig'
+        if not kconfig_path.is_file():
+            return None
+        # the cache directory may have moved since the entry was written
+        artifact.kconfig_path = str(kconfig_path)
+        try:
+            # the mtime is the last use, eviction drops the oldest first
+            os.utime(entry_dir)
+        except OSError:
+            pass
+        return artifact
+
+    def store(
+        self, key: str, generator: MenuconfigGenerator
+    ) -> Optional[KconfigArtifact]:
+        """Write the Kconfig tree of generator as the entry for key and
+        return its artifact, or None when the cache cannot be written."""
+        try:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+            tmp_dir = Path(
+                tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_path)
+            )
+        except OSError:
+            # the cache is an optimization only
+            return None
+        entry_dir = self._entry_dir(key)
+        try:
+            artifact = generator.build_artifact(tmp_dir)
+            artifact.kconfig_path = str(entry_dir / 'Kconfig')
+            with open(tmp_dir / self.ARTIFACT_NAME, 'wb') as w_f:
+                pickle.dump(artifact, w_f, protocol=pickle.HIGHEST_PROTOCOL)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._evict()
+        return artifact
+
+    def _evict(self) -> None:
+        try:
+            entries = sorted(
+                (
+                    path.parent
+                    for path in self.cache_path.glob(f'*/{self.ARTIFACT_NAME}')
+                ),
+                key=lambda path: path.stat().st_mtime_ns,
+                reverse=True,
+            )
+            for stale in entries[KCONFIG_CACHE_ENTRIES:]:
+                shutil.rmtree(stale)
+        except OSError:
+            pass
+
+    @classmethod
+    def parsed(cls, key: Optional[str], artifact: KconfigArtifact) -> Kconfig:
+        """The parsed Kconfig of artifact with no user values set, reused
+        within the process when key is given."""
+        kconf = cls._parsed.get(key) if key is not None else None
+        if kconf is not None:
+            kconf.unset_values()
+            return kconf
+        # kconfiglib is only needed for the interactive UI
+        from kconfiglib import Kconfig  # pylint: disable=C0415
+
+        kconf = Kconfig(artifact.kconfig_path)
+        if key is not None:
+            cls._parsed[key] = kconf
+        return kconf
+
+
 class MenuconfigGenerator:
-    """Builds a feature menuconfig that mirrors the catalog hierarchy."""
+    """Builds a feature menuconfig that mirrors the catalog hierarchy.
+
+    With simplify, depends on expressions leave out dependencies and
+    machine lists already implied by another dependency, and machine lists
+    are written as the shorter of the supported and the unsupported
+    platforms; the menu behaves the same, kconfiglib just has less to
+    parse and evaluate.
+    """
 
     PLATFORM_PREFIX = 'PLATFORM_'
     FEATURE_PREFIX = 'FEATURE_'
@@ -99,14 +255,12 @@ class MenuconfigGenerator:
         registry: FeatureRegistry,
         platform_dir: Path,
         default_platform: Optional[str] = None,
+        simplify: bool = False,
     ):
-        if not platform_dir.exists() or not platform_dir.is_dir():
-            raise ValueError(f'Platform directory not found: {platform_dir}')
         self.registry = registry
+        self.simplify = simplify
         self.platform_dir = platform_dir
-        self.platforms = self._list_platforms()
-        if not self.platforms:
-            raise ValueError(f'No platforms found under {platform_dir}')
+        self.platforms = list_platforms(platform_dir)
         self.default_platform = (
             default_platform
             if default_platform in self.platforms
@@ -151,41 +305,63 @@ class MenuconfigGenerator:
             self._platform_to_symbol_map[machine] = symbol
             self.platform_symbol_map[symbol] = machine
 
+        # Platforms supporting each machine-restricted feature, from the
+        # registry's machine index
+        self._feature_platforms_map: Dict[str, List[str]] = {}
+        for machine in self.platforms:
+            for full_id in self.registry.machine_index.get(machine.lower(), ()):
+                self._feature_platforms_map.setdefault(full_id, []).append(
+                    machine
+                )
+        # filled lazily, only simplify needs them
+        self._select_targets: Optional[set[str]] = None
+        self._implied_map: Dict[str, frozenset[str]] = {}
+        # features whose if blocks enclose the feature being emitted
+        self._guards: List[str] = []
+
     def run_menuconfig(self) -> Optional[MenuconfigSelection]:
         """Generate a Kconfig, run menuconfig, and translate the selections."""
-        kconfig_text = self.build_kconfig_text()
         with tempfile.TemporaryDirectory() as tmpdir:
-            kconfig_path = Path(tmpdir, 'Kconfig')
-            kconfig_path.write_text(kconfig_text, encoding='utf-8')
-            kconf = Kconfig(str(kconfig_path))
-            previous_style = os.environ.get('MENUCONFIG_STYLE')
-            os.environ['MENUCONFIG_STYLE'] = (
-                'aquatic selection=fg:white,bg:blue'
-            )
+            artifact = self.build_artifact(Path(tmpdir))
+            kconf = KconfigCache.parsed(None, artifact)
+        return self.run_artifact(artifact, kconf)
+
+    @classmethod
+    def run_artifact(
+        cls, artifact: KconfigArtifact, kconf: Kconfig
+    ) -> Optional[MenuconfigSelection]:
+        """Run menuconfig on the parsed Kconfig of a (possibly cached)
+        artifact and translate the selections."""
+        # menuconfig is only needed for the interactive UI
+        from menuconfig import menuconfig  # pylint: disable=C0415
+
+        previous_style = os.environ.get('MENUCONFIG_STYLE')
+        os.environ['MENUCONFIG_STYLE'] = 'aquatic selection=fg:white,bg:blue'
+
+        with cls._hook_write_config() as saved_filename:
+            try:
+                with oebuild_util.suppress_print():
+                    menuconfig(kconf)
+            finally:
+                if previous_style is None:
+                    os.environ.pop('MENUCONFIG_STYLE', None)
+                else:
+                    os.environ['MENUCONFIG_STYLE'] = previous_style
+
+            if saved_filename[0] is None:
+                return None
 
-            with self._hook_write_config() as saved_filename:
-                try:
-                    with oebuild_util.suppress_print():
-                        menuconfig(kconf)
-                finally:
-                    if previous_style is None:
-                        os.environ.pop('MENUCONFIG_STYLE', None)
-                    else:
-                        os.environ['MENUCONFIG_STYLE'] = previous_style
-
-                if saved_filename[0] is None:
-                    return None
-
-                selection = self._collect_selections(kconf)
-
-                try:
-                    Path(saved_filename[0]).unlink()
-                except OSError as e:
-                    warnings.warn(
-                        f'Failed to delete temporary config file {saved_filename[0]}: {e}'
-                    )
+            selection = cls._collect_selections(kconf, artifact)
 
-                return selection
+            try:
+                Path(saved_filename[0]).unlink()
+            except OSError as e:
+                warnings.warn(
+                    'Failed to delete temporary config file '
+                    f'{saved_filename[0]}: {e}'
+                )
+
+            return selection
 
     @staticmethod
     @contextmanager
@@ -216,29 +392,73 @@ class MenuconfigGenerator:
     def build_kconfig_text(self) -> str:
         """Return the textual Kconfig representation without launching menuconfig."""
         writer = KconfigWriter()
+        self._write_header(writer)
+        self._write_features(writer)
+        writer.blank()
+        self._write_common_options(writer)
+        self._validate(writer)
+        return writer.text()
+
+    def write_kconfig_tree(self, output_dir: Path) -> Path:
+        """Stream the Kconfig to output_dir, one fragment per category
+        sourced from a top-level Kconfig, and return the top-level path.
+
+        Nothing is kept in memory, so this scales to feature trees whose
+        monolithic Kconfig text would be very large.
+        """
+        fragment_dir = Path(output_dir, KCONFIG_FRAGMENT_DIR)
+        fragment_dir.mkdir(parents=True, exist_ok=True)
+        kconfig_path = Path(output_dir, 'Kconfig')
+        written = set()
+        emitted_features: set[str] = set()
+        with open(kconfig_path, 'w', encoding='utf-8') as w_f:
+            writer = KconfigWriter(w_f)
+            self._write_header(writer)
+            writer.menu('Select Features', indent_body=False)
+            for category, features in self._root_features_by_category():
+                name = f'{category}.Kconfig'
+                with open(fragment_dir / name, 'w', encoding='utf-8') as f_f:
+                    fragment = KconfigWriter(f_f)
+                    self._write_category(
+                        fragment, category, features, emitted_features
+                    )
+                    self._validate(fragment)
+                written.add(name)
+                writer.source(f'{KCONFIG_FRAGMENT_DIR}/{name}', relative=True)
+            writer.end_menu()
+            writer.blank()
+            self._write_common_options(writer)
+            self._validate(writer)
+        # fragments of categories that no longer exist
+        for stale in fragment_dir.glob('*.Kconfig'):
+            if stale.name not in written:
+                stale.unlink()
+        return kconfig_path
+
+    def _write_header(self, writer: KconfigWriter) -> None:
         writer.line('# Auto-generated feature menuconfig')
         writer.line('# Updating this file manually is not supported.')
         writer.blank()
         self._write_platform_choice(writer)
         writer.blank()
-        self._write_features(writer)
-        writer.blank()
-        self._write_common_options(writer)
+
+    @staticmethod
+    def _validate(writer: KconfigWriter) -> None:
         if not writer.validate():
             raise RuntimeError(
                 f'Kconfig writer validation failed: {writer.errors()}'
             )
-        return writer.text()
 
-    def _list_platforms(self) -> List[str]:
-        result = []
-        for entry in sorted(self.platform_dir.iterdir()):
-            if not entry.is_file():
-                continue
-            if entry.suffix not in ('.yaml', '.yml'):
-                continue
-            result.append(entry.stem)
-        return result
+    def build_artifact(self, output_dir: Path) -> KconfigArtifact:
+        """Write the Kconfig tree to output_dir and return it together with
+        its symbol maps."""
+        kconfig_path = self.write_kconfig_tree(output_dir)
+        return KconfigArtifact(
+            kconfig_path=str(kconfig_path),
+            default_platform=self.default_platform,
+            platform_symbol_map=dict(self.platform_symbol_map),
+            feature_symbol_map=dict(self.feature_symbol_map),
+        )
 
     def _write_platform_choice(self, writer: KconfigWriter) -> None:
         default_symbol = self._symbol_for_platform(self.default_platform)
@@ -349,16 +569,23 @@ class MenuconfigGenerator:
         writer.menu('Select Features', indent_body=False)
         emitted_features: set[str] = set()
         for category, features in self._root_features_by_category():
-            writer.menu(
-                self._format_category_label(category), indent_body=False
-            )
-            writer.indent()
-            for feature in features:
-                self._emit_feature_block(writer, feature, 1, emitted_features)
-            writer.dedent()
-            writer.end_menu()
-            writer.blank()
+            self._write_category(writer, category, features, emitted_features)
+        writer.end_menu()
+
+    def _write_category(
+        self,
+        writer: KconfigWriter,
+        category: str,
+        features: List[Feature],
+        emitted_features: set[str],
+    ) -> None:
+        writer.menu(self._format_category_label(category), indent_body=False)
+        writer.indent()
+        for feature in features:
+            self._emit_feature_block(writer, feature, 1, emitted_features)
+        writer.dedent()
         writer.end_menu()
+        writer.blank()
 
     def _root_features_by_category(self):
         grouped: Dict[str, List[Feature]] = {}
@@ -462,6 +689,7 @@ class MenuconfigGenerator:
             return
         parent_symbol = self._symbol_for_feature(feature.full_id)
         writer.if_(parent_symbol)
+        self._guards.append(feature.full_id)
         if one_of_children:
             writer.choice(
                 prompt=f'Select mode for {feature.name}',
@@ -498,6 +726,7 @@ class MenuconfigGenerator:
             if child is None:
                 continue
             self._emit_feature_block(writer, child, depth + 1, emitted_features)
+        self._guards.pop()
         writer.end_if()
         writer.blank()
 
@@ -515,16 +744,15 @@ class MenuconfigGenerator:
         return help_lines
 
     def _build_dependency_expression(self, feature: Feature) -> Optional[str]:
-        terms: List[str] = []
-        if feature.parent_full_id:
-            terms.append(self._symbol_for_feature(feature.parent_full_id))
-        # Add non-parent, non-child dependencies from feature.dependencies
-        # Note: We exclude parent_full_id and child_full_ids to avoid circular dependencies
-        child_ids = set(feature.child_full_ids)
-        for dep_id in feature.dependencies:
-            if dep_id != feature.parent_full_id and dep_id not in child_ids:
-                terms.append(self._symbol_for_feature(dep_id))
+        dep_ids = self._dependency_ids(feature)
         machine_expr = self._build_machine_expression(feature)
+        if self.simplify:
+            # the enclosing if blocks already hold
+            known = dep_ids + self._guards
+            dep_ids = self._reduce_dependencies(dep_ids, self._guards)
+            if machine_expr and self._machine_implied(feature, known):
+                machine_expr = None
+        terms = [self._symbol_for_feature(dep_id) for dep_id in dep_ids]
         if machine_expr:
             if terms:
                 machine_expr = f'({machine_expr})'
@@ -534,28 +762,129 @@ class MenuconfigGenerator:
         return ' && '.join(terms)
 
     def _build_machine_expression(self, feature: Feature) -> Optional[str]:
-        if not feature.machines:
+        if feature.full_id in self.registry.unrestricted_features:
             return None
-        symbols = [
-            self._symbol_for_platform(machine) for machine in feature.machines
-        ]
+        platforms = self._feature_platforms_map.get(feature.full_id)
+        if not platforms:
+            # no listed platform supports it
+            return 'n'
+        if self.simplify:
+            # exactly one platform of the choice is set
+            supported = set(platforms)
+            excluded = [m for m in self.platforms if m not in supported]
+            if not excluded:
+                return None
+            if len(excluded) < len(platforms):
+                return ' && '.join(
+                    f'!{self._symbol_for_platform(machine)}'
+                    for machine in excluded
+                )
+        symbols = [self._symbol_for_platform(machine) for machine in platforms]
         return ' || '.join(symbols)
 
-    def _collect_selections(self, kconf: Kconfig) -> MenuconfigSelection:
+    def _dependency_ids(self, feature: Feature) -> List[str]:
+        dep_ids: List[str] = []
+        if feature.parent_full_id:
+            dep_ids.append(feature.parent_full_id)
+        # Add non-parent, non-child dependencies from feature.dependencies
+        # Note: We exclude parent_full_id and child_full_ids to avoid circular dependencies
+        child_ids = set(feature.child_full_ids)
+        for dep_id in feature.dependencies:
+            if dep_id != feature.parent_full_id and dep_id not in child_ids:
+                dep_ids.append(dep_id)
+        return dep_ids
+
+    def _selected(self) -> set[str]:
+        if self._select_targets is None:
+            self._select_targets = {
+                select_id
+                for feature in self.registry.features_by_full_id.values()
+                for select_id in feature.selects
+            }
+        return self._select_targets
+
+    def _implied(self, full_id: str) -> frozenset[str]:
+        """Features that are enabled whenever full_id is, through its
+        depends on. A select bypasses depends on, so nothing is implied by
+        a feature that is selected anywhere."""
+        implied = self._implied_map.get(full_id)
+        if implied is not None:
+            return implied
+        feature = self.registry.features_by_full_id.get(full_id)
+        result: set[str] = set()
+        if feature is not None and full_id not in self._selected():
+            # a dependency cycle implies nothing more
+            self._implied_map[full_id] = frozenset()
+            for dep_id in self._dependency_ids(feature):
+                result.add(dep_id)
+                result |= self._implied(dep_id)
+        implied = frozenset(result)
+        self._implied_map[full_id] = implied
+        return implied
+
+    def _reduce_dependencies(
+        self, dep_ids: List[str], known: List[str]
+    ) -> List[str]:
+        """dep_ids without the ones in known or implied by another one."""
+        dep_ids = list(dict.fromkeys(dep_ids))
+        if len(dep_ids) < 2 and not known:
+            return dep_ids
+        dropped = set(known)
+        for dep_id in dep_ids:
+            if dep_id in dropped:
+                continue
+            if any(
+                dep_id in self._implied(other)
+                for other in (*dep_ids, *known)
+                if other != dep_id and (other in known or other not in dropped)
+            ):
+                dropped.add(dep_id)
+        return [dep_id for dep_id in dep_ids if dep_id not in dropped]
+
+    def _platform_set(self, full_id: str) -> Optional[frozenset[str]]:
+        if (
+            full_id in self.registry.unrestricted_features
+            or full_id not in self.registry.features_by_full_id
+        ):
+            return None
+        return frozenset(self._feature_platforms_map.get(full_id, ()))
+
+    def _machine_implied(self, feature: Feature, dep_ids: List[str]) -> bool:
+        """Whether an enabled dependency already restricts the platform to
+        ones feature supports."""
+        own = self._platform_set(feature.full_id)
+        if own is None:
+            return True
+        candidates = set(dep_ids)
+        for dep_id in dep_ids:
+            candidates |= self._implied(dep_id)
+        selected = self._selected()
+        for dep_id in candidates:
+            if dep_id in selected:
+                continue
+            platforms = self._platform_set(dep_id)
+            if platforms is not None and platforms <= own:
+                return True
+        return False
+
+    @classmethod
+    def _collect_selections(
+        cls, kconf: Kconfig, artifact: KconfigArtifact
+    ) -> MenuconfigSelection:
         syms = {sym.name: sym for sym in kconf.unique_defined_syms}
         selected_platform: Optional[str] = None
-        for symbol_name, machine in self.platform_symbol_map.items():
+        for symbol_name, machine in artifact.platform_symbol_map.items():
             sym = syms.get(symbol_name)
             if sym and sym.str_value == 'y':
                 selected_platform = machine
                 break
         selected_features = []
-        for symbol_name, full_id in self.feature_symbol_map.items():
+        for symbol_name, full_id in artifact.feature_symbol_map.items():
             sym = syms.get(symbol_name)
             if sym and sym.str_value == 'y':
                 selected_features.append(full_id)
         if selected_platform is None:
-            selected_platform = self.default_platform
+            selected_platform = artifact.default_platform
 
         def bool_option(symbol_name: str) -> bool:
             sym = syms.get(symbol_name)
@@ -571,14 +900,14 @@ class MenuconfigGenerator:
             return normalized
 
         build_in = oebuild_const.BUILD_IN_DOCKER
-        for symbol_name, env_value in self.BUILD_IN_CHOICES:
+        for symbol_name, env_value in cls.BUILD_IN_CHOICES:
             if bool_option(symbol_name):
                 build_in = env_value
                 break
 
         string_values = {
             attr_name: string_option(symbol_name)
-            for symbol_name, attr_name in self.COMMON_STRING_SYMBOLS.items()
+            for symbol_name, attr_name in cls.COMMON_STRING_SYMBOLS.items()
         }
 
         return MenuconfigSelection(
@@ -23,7 +23,58 @@ def parsers(parser, include_features=True):
         dest='list',
         action='store_true',
         help="""
-        list supported archs and features
+        list supported archs and features, with -p only the features
+        that arch supports
+        """,
+    )
+
+    parser.add_argument(
+        '--configs',
+        dest='configs',
+        choices=['count', 'list', 'sample'],
+        help="""
+        count, list or uniformly sample the valid feature configurations of the
+        platform, the features given with -f are part of every configuration
+        """,
+    )
+
+    parser.add_argument(
+        '--configs_num',
+        dest='configs_num',
+        type=int,
+        help="""
+        this param is the most configurations to list, or the number to sample,
+        sample defaults to 10
+        """,
+    )
+
+    parser.add_argument(
+        '--configs_seed',
+        dest='configs_seed',
+        type=int,
+        help="""
+        this param is the random seed for --configs sample, so CI gets the same
+        configurations in every run
+        """,
+    )
+
+    parser.add_argument(
+        '--matrix',
+        dest='matrix',
+        help="""
+        this param is a matrix yaml file listing build directories, each with a
+        platform, features and options; every compile.yaml is generated in one
+        run without prompting, and only changed ones are rewritten
+        """,
+    )
+
+    parser.add_argument(
+        '--resolve_cache',
+        dest='resolve_cache',
+        choices=['list', 'clear'],
+        help="""
+        list or clear the cached feature resolution results, which let generate
+        skip loading the feature tree while no feature file changes
         """,
     )
 
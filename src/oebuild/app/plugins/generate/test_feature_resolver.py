@@ -11,18 +11,33 @@ scripts:
   selects-closure satisfaction that keeps ``-f mcs -f xen`` from wrongly
   falling back to baremetal, and the silent no-default case.
 - ``selects`` transitive closure.
+- the on-disk registry snapshot and its invalidation.
+- process-pool loading and its deterministic merge.
+- incremental ``reload`` matching a fresh load.
+- the bitset closure index behind the resolver.
+- the machine-to-feature index and its incremental upkeep.
+- worklist-driven ``one_of`` resolution.
+- batch resolution of (machine, features) entries, in process and in a pool.
 """
 
+import os
 import pathlib
 import tempfile
 import textwrap
 import unittest
+from unittest import mock
 
+import oebuild.feature_resolver as feature_resolver
+import oebuild.util as oebuild_util
 from oebuild.feature_resolver import (
+    BatchResolver,
+    ConflictError,
     FeatureAmbiguousError,
+    FeatureError,
     FeatureNotFoundError,
     FeatureRegistry,
     FeatureResolver,
+    ResolutionError,
 )
 
 
@@ -329,5 +344,636 @@ class FeatureResolverSelectsClosureTest(unittest.TestCase):
         self.assertIn('x/c', ids)
 
 
+class FeatureRegistrySnapshotTest(unittest.TestCase):
+    """Snapshots are reused until a feature file changes."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        base = pathlib.Path(self.workspace.name)
+        self.features_dir = base / 'features'
+        self.cache_dir = base / 'cache'
+        _write(
+            self.features_dir, 'x', 'a',
+            """
+            id: a
+            dependencies: [x/b]
+            machines: [qemu-aarch64]
+            """,
+        )
+        _write(self.features_dir, 'x', 'b', 'id: b\n')
+        oebuild_util._SAFE_YAML_CACHE.clear()
+        self.addCleanup(oebuild_util._SAFE_YAML_CACHE.clear)
+
+    def _load(self):
+        with mock.patch.object(
+            oebuild_util, 'read_yaml_safe', wraps=oebuild_util.read_yaml_safe
+        ) as read_yaml_safe:
+            registry = FeatureRegistry(
+                self.features_dir, cache_dir=self.cache_dir
+            )
+        return registry, read_yaml_safe.call_count
+
+    def test_snapshot_is_reused(self):
+        cold, cold_reads = self._load()
+        warm, warm_reads = self._load()
+        self.assertFalse(cold.loaded_from_snapshot)
+        self.assertTrue(warm.loaded_from_snapshot)
+        self.assertEqual(cold_reads, 2)
+        self.assertEqual(warm_reads, 0)
+        self.assertEqual(cold.digest, warm.digest)
+        self.assertEqual(
+            sorted(warm.features_by_full_id), ['x/a', 'x/b']
+        )
+        # indexes must share Feature objects like a freshly parsed registry
+        self.assertIs(
+            warm.leaf_index['a'][0], warm.features_by_full_id['x/a']
+        )
+        self.assertEqual(
+            warm.features_by_full_id['x/b'].machines, None
+        )
+        self.assertEqual(
+            warm.features_by_full_id['x/a'].machines, ['qemu-aarch64']
+        )
+
+    def test_modified_feature_file_invalidates_snapshot(self):
+        cold, _ = self._load()
+        feature_file = self.features_dir / 'x' / 'b.yaml'
+        feature_file.write_text('id: b\nmachines: [qemu-arm]\n')
+        stat = feature_file.stat()
+        os.utime(feature_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        warm, reads = self._load()
+        self.assertNotEqual(cold.digest, warm.digest)
+        self.assertFalse(warm.loaded_from_snapshot)
+        self.assertEqual(reads, 2)
+        self.assertEqual(warm.features_by_full_id['x/a'].machines, [])
+
+    def test_added_feature_file_invalidates_snapshot(self):
+        self._load()
+        _write(self.features_dir, 'y', 'c', 'id: c\n')
+        warm, _ = self._load()
+        self.assertFalse(warm.loaded_from_snapshot)
+        self.assertIn('y/c', warm.features_by_full_id)
+
+    def test_corrupt_snapshot_is_ignored(self):
+        self._load()
+        for snapshot in self.cache_dir.rglob('*.pickle'):
+            snapshot.write_bytes(b'not a pickle')
+        registry, _ = self._load()
+        self.assertFalse(registry.loaded_from_snapshot)
+        self.assertIn('x/a', registry.features_by_full_id)
+        self.assertTrue(self._load()[0].loaded_from_snapshot)
+
+
+class FeatureRegistryParallelLoadTest(unittest.TestCase):
+    """A process pool yields the same registry as a sequential load."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        self.features_dir = pathlib.Path(self.workspace.name) / 'features'
+        for cat in range(3):
+            for feat in range(6):
+                # every feature but the first depends on the first one
+                deps = f'cat{cat}/feat0' if feat else ''
+                _write(
+                    self.features_dir, f'cat{cat}', f'feat{feat}',
+                    f"""
+                    id: feat{feat}
+                    dependencies: [{deps}]
+                    sub_feats:
+                      - id: sub
+                    """,
+                )
+        for patcher in (
+            mock.patch.object(feature_resolver, 'PARALLEL_MIN_FILES', 1),
+            mock.patch.object(feature_resolver.os, 'cpu_count', lambda: 4),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_parallel_load_matches_sequential(self):
+        sequential = FeatureRegistry(self.features_dir)
+        parallel = FeatureRegistry(self.features_dir, jobs=4)
+        self.assertEqual(
+            list(parallel.features_by_full_id),
+            list(sequential.features_by_full_id),
+        )
+        self.assertEqual(
+            parallel.features_by_full_id, sequential.features_by_full_id
+        )
+        self.assertEqual(
+            [timing.path for timing in parallel.parse_timings],
+            [timing.path for timing in sequential.parse_timings],
+        )
+        self.assertEqual(len(parallel.slowest_files(5)), 5)
+
+    def test_first_bad_file_is_reported(self):
+        _write(self.features_dir, 'cat1', 'bad', '- not a mapping\n')
+        _write(self.features_dir, 'cat2', 'bad', '- not a mapping\n')
+        with self.assertRaisesRegex(FeatureError, 'cat1/bad.yaml'):
+            FeatureRegistry(self.features_dir, jobs=4)
+
+
+class FeatureRegistryReloadTest(unittest.TestCase):
+    """reload() only parses changed files and matches a fresh load."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        self.features_dir = pathlib.Path(self.workspace.name) / 'features'
+        _write(
+            self.features_dir, 'os', 'os',
+            """
+            id: os
+            machines: [qemu-aarch64, qemu-arm]
+            sub_feats:
+              - id: systemd
+            """,
+        )
+        _write(
+            self.features_dir, 'net', 'ssh',
+            """
+            id: ssh
+            dependencies: [os]
+            """,
+        )
+        _write(
+            self.features_dir, 'net', 'sftp',
+            """
+            id: sftp
+            dependencies: [ssh]
+            """,
+        )
+        _write(self.features_dir, 'misc', 'tools', 'id: tools\n')
+        oebuild_util._SAFE_YAML_CACHE.clear()
+        self.addCleanup(oebuild_util._SAFE_YAML_CACHE.clear)
+        self.registry = FeatureRegistry(self.features_dir)
+
+    def _touch(self, category, name, body):
+        _write(self.features_dir, category, name, body)
+        path = self.features_dir / category / f'{name}.yaml'
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def _reload(self):
+        with mock.patch.object(
+            oebuild_util, 'read_yaml_safe', wraps=oebuild_util.read_yaml_safe
+        ) as read_yaml_safe:
+            result = self.registry.reload()
+        return result, read_yaml_safe.call_count
+
+    def _assert_matches_fresh_load(self):
+        fresh = FeatureRegistry(self.features_dir)
+        self.assertEqual(
+            list(self.registry.features_by_full_id),
+            list(fresh.features_by_full_id),
+        )
+        self.assertEqual(
+            self.registry.features_by_full_id, fresh.features_by_full_id
+        )
+        self.assertEqual(
+            sorted(self.registry.long_alias_index),
+            sorted(fresh.long_alias_index),
+        )
+        self.assertEqual(
+            list(self.registry.category_roots), list(fresh.category_roots)
+        )
+        self.assertEqual(self.registry.machine_index, fresh.machine_index)
+        self.assertEqual(
+            self.registry.unrestricted_features, fresh.unrestricted_features
+        )
+        self.assertEqual(self.registry.digest, fresh.digest)
+
+    def test_unchanged_tree_is_a_no_op(self):
+        result, reads = self._reload()
+        self.assertFalse(result.changed)
+        self.assertEqual(reads, 0)
+
+    def test_modified_file_propagates_to_dependents(self):
+        self._touch(
+            'os', 'os',
+            """
+            id: os
+            machines: [qemu-arm]
+            sub_feats:
+              - id: systemd
+            """,
+        )
+        result, reads = self._reload()
+        self.assertEqual(reads, 1)
+        self.assertEqual(
+            [path.name for path in result.modified], ['os.yaml']
+        )
+        self.assertEqual(
+            result.affected, ['net/sftp', 'net/ssh', 'os', 'os/systemd']
+        )
+        self.assertEqual(
+            self.registry.features_by_full_id['net/sftp'].machines,
+            ['qemu-arm'],
+        )
+        self._assert_matches_fresh_load()
+
+    def test_added_and_removed_files(self):
+        (self.features_dir / 'misc' / 'tools.yaml').unlink()
+        self._touch(
+            'misc', 'editor',
+            """
+            id: editor
+            aliases: [vim]
+            dependencies: [net/ssh]
+            """,
+        )
+        result, reads = self._reload()
+        self.assertEqual(reads, 1)
+        self.assertEqual([path.name for path in result.added], ['editor.yaml'])
+        self.assertEqual([path.name for path in result.removed], ['tools.yaml'])
+        self.assertNotIn('misc/tools', self.registry.features_by_full_id)
+        self.assertEqual(self.registry.resolve_id('vim').full_id, 'misc/editor')
+        self._assert_matches_fresh_load()
+
+    def test_new_leaf_revalidates_references(self):
+        # net/sftp names "ssh", which resolves through the leaf index until
+        # a second ssh feature makes it ambiguous
+        self._touch('misc', 'ssh', 'id: ssh\n')
+        message = 'net/sftp references unknown feature ssh'
+        with self.assertRaisesRegex(FeatureError, message):
+            FeatureRegistry(self.features_dir)
+        with self.assertRaisesRegex(FeatureError, message):
+            self.registry.reload()
+
+    def test_reload_recovers_after_error(self):
+        self._touch('net', 'broken', '- not a mapping\n')
+        with self.assertRaises(FeatureError):
+            self.registry.reload()
+        (self.features_dir / 'net' / 'broken.yaml').unlink()
+        result, _ = self._reload()
+        self.assertEqual(
+            sorted(result.affected), sorted(self.registry.features_by_full_id)
+        )
+        self._assert_matches_fresh_load()
+
+
+class FeatureClosureIndexTest(unittest.TestCase):
+    """Bitset closures, enable order and machine masks."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        features_dir = pathlib.Path(self.workspace.name) / 'features'
+        _write(
+            features_dir, 'g', 'a',
+            """
+            id: a
+            dependencies: [g/b]
+            selects: [g/c]
+            """,
+        )
+        _write(features_dir, 'g', 'b', 'id: b\nmachines: [qemu-arm]\n')
+        # c and d select each other
+        _write(features_dir, 'g', 'c', 'id: c\nselects: [g/d]\n')
+        _write(features_dir, 'g', 'd', 'id: d\nselects: [g/c]\n')
+        _write(
+            features_dir, 'h', 'h',
+            """
+            id: h
+            machines: [qemu-aarch64]
+            sub_feats:
+              - id: s
+            """,
+        )
+        self.registry = FeatureRegistry(features_dir)
+        self.closures = self.registry.closure_index()
+
+    def _ids(self, mask):
+        return sorted(self.closures.full_ids(mask))
+
+    def _position(self, full_id):
+        return self.closures.index[full_id]
+
+    def test_enable_closure_and_order(self):
+        position = self._position('g/a')
+        self.assertEqual(
+            self._ids(self.closures.enable_closure[position]),
+            ['g/a', 'g/b', 'g/c', 'g/d'],
+        )
+        self.assertEqual(
+            [
+                self.closures.features[member].full_id
+                for member in self.closures.enable_order(position)
+            ],
+            ['g/a', 'g/b', 'g/c', 'g/d'],
+        )
+        self.assertEqual(
+            self._ids(self.closures.enable_closure[self._position('h/s')]),
+            ['h', 'h/s'],
+        )
+
+    def test_select_closure_contains_self_only_on_cycles(self):
+        self.assertEqual(
+            self._ids(self.closures.select_closure[self._position('g/a')]),
+            ['g/c', 'g/d'],
+        )
+        self.assertEqual(
+            self._ids(self.closures.select_closure[self._position('g/c')]),
+            ['g/c', 'g/d'],
+        )
+
+    def test_machine_mask_follows_parents(self):
+        self.assertEqual(
+            self._ids(self.closures.machine_mask('QEMU-ARM')),
+            ['g/a', 'g/b', 'g/c', 'g/d'],
+        )
+        self.assertEqual(
+            self._ids(self.closures.machine_mask('qemu-aarch64')),
+            ['g/c', 'g/d', 'h', 'h/s'],
+        )
+
+    def test_resolver_keeps_machine_error_trace(self):
+        # g/a inherits the machine constraint of its dependency g/b
+        with self.assertRaisesRegex(
+            ResolutionError,
+            r"'g/a' is not supported on machine 'qemu-aarch64'.\n"
+            r'Trace:\n  - Requested: g/a \(User Input\)',
+        ):
+            FeatureResolver(self.registry, 'qemu-aarch64').resolve(['g/a'])
+
+    def test_reload_drops_closure_index(self):
+        _write(self.registry.features_dir, 'g', 'e', 'id: e\n')
+        self.registry.reload()
+        self.assertIn('g/e', self.registry.closure_index().index)
+
+
+class FeatureRegistryMachineIndexTest(unittest.TestCase):
+    """The machine index agrees with the per-feature machine rules."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        self.features_dir = pathlib.Path(self.workspace.name) / 'features'
+        _write(
+            self.features_dir, 'bsp', 'bsp',
+            """
+            id: bsp
+            machines: [qemu-aarch64, Raspberrypi4-64]
+            sub_feats:
+              - id: gpu
+                machines: [raspberrypi4-64]
+              - id: x86
+                machines: [x86-64]
+              - id: tools
+            """,
+        )
+        _write(self.features_dir, 'app', 'web', 'id: web\n')
+        _write(
+            self.features_dir, 'app', 'kiosk',
+            'id: kiosk\ndependencies: [bsp/gpu]\n',
+        )
+        self.registry = FeatureRegistry(self.features_dir)
+
+    def _ids(self, machine):
+        return [
+            feature.full_id
+            for feature in self.registry.machine_features(machine)
+        ]
+
+    def test_machine_features(self):
+        self.assertEqual(
+            self._ids(' RASPBERRYPI4-64 '),
+            ['app/kiosk', 'app/web', 'bsp', 'bsp/gpu', 'bsp/tools', 'bsp/x86'],
+        )
+        # x86 shares no machine with its parent, which leaves it without
+        # a restriction of its own, but the parent still rules x86-64 out
+        self.assertEqual(
+            self._ids('qemu-aarch64'),
+            ['app/web', 'bsp', 'bsp/tools', 'bsp/x86'],
+        )
+        self.assertEqual(self._ids('x86-64'), ['app/web'])
+        self.assertEqual(self._ids('unknown'), ['app/web'])
+        self.assertEqual(self.registry.unrestricted_features, {'app/web'})
+
+    def test_index_matches_per_feature_checks(self):
+        for machine in ('qemu-aarch64', 'raspberrypi4-64', 'x86-64', 'x'):
+            for full_id in self.registry.features_by_full_id:
+                try:
+                    FeatureResolver(self.registry, machine).resolve([full_id])
+                    supported = True
+                except ResolutionError:
+                    supported = False
+                self.assertEqual(
+                    self.registry.supports_machine(full_id, machine),
+                    supported,
+                    (full_id, machine),
+                )
+
+    def test_reload_and_snapshot_keep_the_index(self):
+        _write(self.features_dir, 'app', 'web', 'id: web\nmachines: [x]\n')
+        path = self.features_dir / 'app' / 'web.yaml'
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.registry.reload()
+        self.assertEqual(self._ids('x'), ['app/web'])
+        self.assertEqual(
+            self._ids('qemu-aarch64'), ['bsp', 'bsp/tools', 'bsp/x86']
+        )
+        cache_dir = pathlib.Path(self.workspace.name) / 'cache'
+        FeatureRegistry(self.features_dir, cache_dir=cache_dir)
+        cached = FeatureRegistry(self.features_dir, cache_dir=cache_dir)
+        self.assertTrue(cached.loaded_from_snapshot)
+        self.assertEqual(cached.machine_index, self.registry.machine_index)
+
+
+class FeatureResolverOneOfWorklistTest(unittest.TestCase):
+    """one_of groups are revisited only when their state changes."""
+
+    GROUPS = 6
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        self.features_dir = pathlib.Path(self.workspace.name) / 'features'
+
+    def _write_cascade(self):
+        # the default of group N enables group N-1, which was visited first
+        for index in range(self.GROUPS):
+            _write(
+                self.features_dir, 'o', f'g{index}',
+                f"""
+                id: g{index}
+                one_of: [o/x{index}, o/y{index}]
+                default_one_of: o/x{index}
+                """,
+            )
+            deps = f'dependencies: [o/g{index - 1}]\n' if index else ''
+            _write(
+                self.features_dir, 'o', f'x{index}', f'id: x{index}\n{deps}'
+            )
+            _write(self.features_dir, 'o', f'y{index}', f'id: y{index}\n')
+        return FeatureRegistry(self.features_dir)
+
+    def test_cascading_defaults_visit_each_group_once(self):
+        registry = self._write_cascade()
+        with mock.patch.object(
+            FeatureResolver,
+            '_is_one_of_option_satisfied',
+            autospec=True,
+            side_effect=FeatureResolver._is_one_of_option_satisfied,
+        ) as satisfied:
+            result = FeatureResolver(registry, 'qemu-aarch64').resolve(
+                [f'o/g{self.GROUPS - 1}']
+            )
+        enabled = {feature.full_id for feature in result.features}
+        self.assertEqual(
+            enabled,
+            {
+                f'o/{kind}{index}'
+                for kind in 'gx'
+                for index in range(self.GROUPS)
+            },
+        )
+        # two options per group, each group settled by a single visit
+        self.assertEqual(satisfied.call_count, 2 * self.GROUPS)
+
+    def test_worklist_is_seeded_from_enabled_owners(self):
+        registry = self._write_cascade()
+        closures = registry.closure_index()
+        self.assertEqual(
+            {
+                closures.features[position].full_id: ordinal
+                for position, ordinal in closures.one_of_group_of.items()
+            },
+            {f'o/g{index}': index for index in range(self.GROUPS)},
+        )
+
+        class NoScan(list):
+            def __iter__(self):
+                raise AssertionError('every one_of group was scanned')
+
+        # a resolve costs the groups it touches, not one test per group
+        closures.one_of_groups = NoScan(closures.one_of_groups)
+        result = FeatureResolver(registry, 'qemu-aarch64').resolve(['o/g0'])
+        self.assertEqual(
+            [feature.full_id for feature in result.features], ['o/g0', 'o/x0']
+        )
+
+    def test_explicit_option_stops_the_cascade(self):
+        registry = self._write_cascade()
+        result = FeatureResolver(registry, 'qemu-aarch64').resolve(
+            ['o/g3', 'o/y2']
+        )
+        self.assertEqual(
+            [feature.full_id for feature in result.features],
+            ['o/g3', 'o/y2', 'o/x3', 'o/g2'],
+        )
+
+    def test_default_reopening_a_group_reports_conflict(self):
+        _write(
+            self.features_dir, 'o', 'a',
+            """
+            id: a
+            dependencies: [o/b]
+            one_of: [o/p, o/q]
+            default_one_of: o/p
+            """,
+        )
+        _write(self.features_dir, 'o', 'b', 'id: b\none_of: [o/r, o/s]\n')
+        _write(self.features_dir, 'o', 'p', 'id: p\ndependencies: [o/r]\n')
+        for name in 'qrs':
+            _write(self.features_dir, 'o', name, f'id: {name}\n')
+        registry = FeatureRegistry(self.features_dir)
+        with self.assertRaisesRegex(
+            ConflictError,
+            r"Conflict in feature 'o/b':\n"
+            r"These options 'r' and 's' cannot be enabled together",
+        ):
+            FeatureResolver(registry, 'qemu-aarch64').resolve(['o/a', 'o/s'])
+
+
+class BatchResolverTest(unittest.TestCase):
+    """Batch entries resolve like single resolvers, each with its outcome."""
+
+    def setUp(self):
+        self.workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workspace.cleanup)
+        features_dir = pathlib.Path(self.workspace.name) / 'features'
+        _write(
+            features_dir, 'os', 'kernel',
+            """
+            id: kernel
+            one_of: [os/rt, os/std]
+            default_one_of: os/std
+            """,
+        )
+        _write(features_dir, 'os', 'rt', 'id: rt\n')
+        _write(features_dir, 'os', 'std', 'id: std\n')
+        _write(
+            features_dir, 'bsp', 'gpu',
+            """
+            id: gpu
+            machines: [raspberrypi4-64]
+            dependencies: [os/kernel]
+            """,
+        )
+        self.registry = FeatureRegistry(features_dir)
+        self.entries = [
+            ('qemu-aarch64', ['os/kernel']),
+            ('raspberrypi4-64', ['bsp/gpu', 'os/rt']),
+            ('qemu-aarch64', ['bsp/gpu']),
+            ('qemu-aarch64', ['missing']),
+            ('qemu-aarch64', ['os/kernel']),
+        ]
+
+    def _expected(self, machine, requested):
+        try:
+            result = FeatureResolver(self.registry, machine).resolve(requested)
+        except ResolutionError as err:
+            return None, str(err)
+        return [feature.full_id for feature in result.features], None
+
+    def _outcomes(self, results):
+        return [
+            (
+                [feature.full_id for feature in entry.result.features]
+                if entry.ok
+                else None,
+                None if entry.ok else str(entry.error),
+            )
+            for entry in results
+        ]
+
+    def test_entries_match_single_resolution(self):
+        results = BatchResolver(self.registry).resolve(self.entries)
+        self.assertEqual(
+            [(entry.machine, list(entry.requested)) for entry in results],
+            self.entries,
+        )
+        self.assertEqual(
+            self._outcomes(results),
+            [self._expected(*entry) for entry in self.entries],
+        )
+        self.assertEqual(
+            [entry.ok for entry in results], [True, True, False, False, True]
+        )
+        self.assertIsInstance(results[3].error, FeatureNotFoundError)
+        # identical entries are resolved once
+        self.assertIs(results[0].result, results[4].result)
+
+    def test_process_pool_matches_in_process(self):
+        expected = self._outcomes(
+            BatchResolver(self.registry).resolve(self.entries)
+        )
+        with mock.patch.object(
+            feature_resolver, 'PARALLEL_MIN_ENTRIES', 1
+        ), mock.patch.object(feature_resolver.os, 'cpu_count', lambda: 2):
+            results = BatchResolver(self.registry).resolve(
+                self.entries, jobs=2
+            )
+        self.assertEqual(self._outcomes(results), expected)
+        self.assertIs(
+            results[0].result.features[0],
+            self.registry.features_by_full_id['os/kernel'],
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,15 @@
+import argparse
+import contextlib
+import io
+import os
 import pathlib
 import tempfile
+import textwrap
 import unittest
+from unittest import mock
 
 from oebuild.app.plugins.generate.generate import Generate
+from oebuild.feature_resolver import FeatureRegistry
 
 
 class GenerateBuildPathTest(unittest.TestCase):
@@ -25,5 +32,275 @@ class GenerateBuildPathTest(unittest.TestCase):
             )
 
 
+class GenerateConfigsTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        features_dir = pathlib.Path(workspace.name, 'features')
+        (features_dir / 'os').mkdir(parents=True)
+        (features_dir / 'os' / 'rt.yaml').write_text('id: rt\n')
+        (features_dir / 'os' / 'debug.yaml').write_text(
+            'id: debug\ndependencies: [os/rt]\n'
+        )
+        self.generate = Generate()
+        self.generate.feature_registry = FeatureRegistry(features_dir)
+
+    def _run(self, mode, num=None, features=None):
+        args = argparse.Namespace(
+            platform='qemu-aarch64',
+            features=features,
+            configs=mode,
+            configs_num=num,
+            configs_seed=1,
+        )
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.generate.list_configs(args)
+        return out.getvalue().splitlines()
+
+    def test_count(self):
+        self.assertEqual(self._run('count'), ['3'])
+        self.assertEqual(self._run('count', features=['debug']), ['1'])
+
+    def test_list_prints_generate_commands(self):
+        self.assertEqual(
+            self._run('list'),
+            [
+                'oebuild generate -p qemu-aarch64 -f os/rt',
+                'oebuild generate -p qemu-aarch64 -f os/debug',
+                'oebuild generate -p qemu-aarch64',
+            ],
+        )
+
+    def test_sample_defaults_to_ten(self):
+        self.assertEqual(len(self._run('sample')), 10)
+        self.assertEqual(len(self._run('sample', num=2)), 2)
+
+
+class GenerateListTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        features_dir = pathlib.Path(workspace.name, 'features')
+        (features_dir / 'bsp').mkdir(parents=True)
+        (features_dir / 'bsp' / 'rpi.yaml').write_text(
+            'id: rpi\nmachines: [raspberrypi4-64]\n'
+        )
+        (features_dir / 'bsp' / 'common.yaml').write_text('id: common\n')
+        self.generate = Generate()
+        self.generate.feature_registry = FeatureRegistry(features_dir)
+
+    def _list(self, platform=None):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.generate._list_feature(platform)
+        return out.getvalue()
+
+    def test_platform_given(self):
+        self.assertTrue(Generate._platform_given(['-l', '-p', 'x']))
+        self.assertTrue(Generate._platform_given(['-px', '-l']))
+        self.assertTrue(Generate._platform_given(['--platform=x']))
+        self.assertFalse(Generate._platform_given(['-l', '-f', 'x']))
+
+    def test_list_features_of_one_platform(self):
+        self.assertIn('bsp/rpi', self._list())
+        listed = self._list('qemu-aarch64')
+        self.assertIn('bsp/common', listed)
+        self.assertNotIn('bsp/rpi', listed)
+        self.assertIn('bsp/rpi', self._list('raspberrypi4-64'))
+
+
+class GenerateResolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.features_dir = self.base / '.oebuild' / 'features'
+        (self.features_dir / 'os').mkdir(parents=True)
+        (self.features_dir / 'os' / 'rt.yaml').write_text('id: rt\n')
+        (self.features_dir / 'os' / 'debug.yaml').write_text(
+            'id: debug\ndependencies: [os/rt]\n'
+        )
+        env = mock.patch.dict(
+            os.environ, {'OEBUILD_CACHE_DIR': str(self.base / 'cache')}
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _resolve(self, *requested):
+        generate = Generate()
+        generate.yocto_dir = str(self.base)
+        generate.features_dir = self.features_dir
+        with mock.patch.object(
+            Generate,
+            '_maybe_fallback_registry',
+            wraps=Generate._maybe_fallback_registry,
+        ) as load:
+            resolution = generate._resolve_features('qemu-aarch64', requested)
+        return [f.full_id for f in resolution.features], load.call_count
+
+    def test_hit_skips_registry_loading(self):
+        self.assertEqual(self._resolve('debug'), (['os/debug', 'os/rt'], 1))
+        self.assertEqual(self._resolve('debug'), (['os/debug', 'os/rt'], 0))
+        self.assertEqual(self._resolve('rt'), (['os/rt'], 1))
+
+    def test_changed_feature_tree_misses(self):
+        self._resolve('debug')
+        path = self.features_dir / 'os' / 'debug.yaml'
+        path.write_text('id: debug\n')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self._resolve('debug'), (['os/debug'], 1))
+
+    def test_list_and_clear(self):
+        self._resolve('debug')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            Generate.resolve_cache('list')
+        self.assertIn('-p qemu-aarch64 -f debug  -> 2 features', out.getvalue())
+        Generate.resolve_cache('clear')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            Generate.resolve_cache('list')
+        self.assertEqual(out.getvalue(), '')
+
+    def test_menuconfig_reuses_kconfig(self):
+        platform_dir = self.base / '.oebuild' / 'platform'
+        platform_dir.mkdir()
+        (platform_dir / 'qemu-aarch64.yaml').write_text('')
+        cwd = os.getcwd()
+        os.chdir(self.base)
+        self.addCleanup(os.chdir, cwd)
+        args = argparse.Namespace(platform='qemu-aarch64')
+        texts = []
+        for expected_loads in (1, 0):
+            generate = Generate()
+            generate.yocto_dir = str(self.base)
+            generate.features_dir = self.features_dir
+            with mock.patch.object(
+                Generate,
+                '_maybe_fallback_registry',
+                wraps=Generate._maybe_fallback_registry,
+            ) as load, mock.patch(
+                'oebuild.app.plugins.generate.generate.'
+                'MenuconfigGenerator.run_artifact',
+                side_effect=lambda artifact, kconf: pathlib.Path(
+                    artifact.kconfig_path
+                )
+                .with_name('features')
+                .joinpath('os.Kconfig')
+                .read_text(),
+            ):
+                texts.append(generate._run_menuconfig(args))
+            self.assertEqual(load.call_count, expected_loads)
+        self.assertEqual(texts[0], texts[1])
+        self.assertIn('config FEATURE_OS_DEBUG', texts[0])
+
+
+class GenerateMatrixTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        oebuild_dir = self.base / 'yocto' / '.oebuild'
+        features_dir = oebuild_dir / 'features'
+        (features_dir / 'os').mkdir(parents=True)
+        (features_dir / 'os' / 'rt.yaml').write_text(
+            'id: rt\nconfig:\n  local_conf:\n    - RT = "1"\n'
+        )
+        (oebuild_dir / 'platform').mkdir()
+        (oebuild_dir / 'platform' / 'qemu-aarch64.yaml').write_text(
+            'type: platform\nmachine: qemu-aarch64\ntoolchain_type: x\n'
+        )
+        (oebuild_dir / 'common.yaml').write_text('local_conf: |\n  A = "1"\n')
+        self.build_root = self.base / 'build'
+        self.matrix = self.base / 'matrix.yaml'
+        env = mock.patch.dict(
+            os.environ, {'OEBUILD_CACHE_DIR': str(self.base / 'cache')}
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _generate(self, matrix):
+        self.matrix.write_text(matrix)
+        generate = Generate()
+        generate.yocto_dir = str(self.base / 'yocto')
+        generate.features_dir = self.base / 'yocto' / '.oebuild' / 'features'
+        generate.configure = mock.Mock()
+        generate.configure.build_dir.return_value = str(self.build_root)
+        generate.configure.source_dir.return_value = str(self.base / 'src')
+        args = argparse.Namespace(
+            matrix=str(self.matrix),
+            build_in='docker',
+            directory=None,
+            nativesdk_dir=None,
+            toolchain_dir=None,
+            llvm_toolchain_dir=None,
+            sstate_mirrors=None,
+            sstate_dir=None,
+            tmp_dir=None,
+            datetime=None,
+            no_fetch=False,
+            no_layer=False,
+            cache_src_dir=None,
+        )
+        generate.generate_matrix(args)
+
+    def test_builds_are_generated_and_rewritten_only_on_change(self):
+        matrix = textwrap.dedent("""
+            defaults:
+              build_in: host
+            builds:
+              - platform: qemu-aarch64
+              - platform: qemu-aarch64
+                directory: qemu-rt
+                features: [rt]
+            """)
+        self._generate(matrix)
+        plain = self.build_root / 'qemu-aarch64' / 'compile.yaml'
+        rt_yaml = self.build_root / 'qemu-rt' / 'compile.yaml'
+        self.assertNotIn('RT = "1"', plain.read_text())
+        self.assertIn('RT = "1"', rt_yaml.read_text())
+        self.assertIn('build_in: host', rt_yaml.read_text())
+
+        for build in ('qemu-aarch64', 'qemu-rt'):
+            (self.build_root / build / 'conf').mkdir()
+        self._generate(matrix.replace('features: [rt]', 'no_fetch: true'))
+        # the unchanged build keeps its conf/
+        self.assertTrue((self.build_root / 'qemu-aarch64' / 'conf').exists())
+        self.assertFalse((self.build_root / 'qemu-rt' / 'conf').exists())
+        self.assertIn('OPENEULER_FETCH = "disable"', rt_yaml.read_text())
+
+    def test_invalid_builds_stop_before_writing(self):
+        matrix = textwrap.dedent("""
+            builds:
+              - platform: qemu-aarch64
+              - platform: qemu-arm
+              - platform: qemu-aarch64
+                directory: ../escape
+              - platform: qemu-aarch64
+                directory: missing
+                features: [missing]
+            """)
+        with self.assertLogs(level='ERROR') as logs:
+            with self.assertRaises(SystemExit):
+                self._generate(matrix)
+        self.assertEqual(len(logs.records), 3)
+        self.assertFalse(self.build_root.exists())
+
+    def test_malformed_matrix_is_rejected(self):
+        for matrix in (
+            'builds: []\n',
+            'builds:\n  - directory: x\n',
+            'builds:\n  - platform: a\n  - platform: a\n',
+            'builds:\n  - platform: a\n    no_fetch: maybe\n',
+            'builds:\n  - platform: a\n    build_in: vm\n',
+            'builds:\n  - platform: a\n    unknown: 1\n',
+        ):
+            with self.subTest(matrix=matrix):
+                with self.assertRaises(SystemExit):
+                    self._generate(matrix)
+
+
 if __name__ == '__main__':
     unittest.main()
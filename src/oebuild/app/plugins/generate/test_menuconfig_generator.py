@@ -9,7 +9,11 @@ from kconfiglib import Kconfig
 from oebuild.feature_resolver import FeatureRegistry
 
 sys.path.insert(0, os.path.dirname(__file__))
-from menuconfig_generator import MenuconfigGenerator  # noqa: E402
+from menuconfig_generator import (  # noqa: E402
+    KCONFIG_CACHE_DIR,
+    KconfigCache,
+    MenuconfigGenerator,
+)
 
 
 class MenuconfigGeneratorTest(unittest.TestCase):
@@ -171,6 +175,110 @@ class MenuconfigGeneratorTest(unittest.TestCase):
         endif_pos = kconfig.index('    endif', podman_pos)
         self.assertTrue(if_block_start < podman_pos < endif_pos)
 
+    def _generator(self):
+        return MenuconfigGenerator(
+            registry=FeatureRegistry(self.features_dir),
+            platform_dir=self.platform_dir,
+            default_platform='qemu-aarch64',
+        )
+
+    def test_kconfig_cache_round_trip(self):
+        cache = KconfigCache(Path(self.workspace.name, 'cache'))
+        platforms = ['qemu-aarch64']
+        key = KconfigCache.make_key('d', platforms, 'qemu-aarch64')
+        self.assertIsNone(cache.load(key))
+        generator = self._generator()
+        artifact = cache.store(key, generator)
+        self.assertEqual(cache.load(key), artifact)
+        top = Path(artifact.kconfig_path)
+        self.assertEqual(top, cache.cache_path / key / 'Kconfig')
+        self.assertIn('rsource "features/system.Kconfig"', top.read_text())
+        self.assertEqual(
+            artifact.feature_symbol_map['FEATURE_SYSTEM'], 'system'
+        )
+        self.assertEqual(list(cache.cache_path.iterdir()), [top.parent])
+        # the tree, the platform list and the default all change the key
+        self.assertEqual(
+            len(
+                {
+                    key,
+                    KconfigCache.make_key('e', platforms, 'qemu-aarch64'),
+                    KconfigCache.make_key('d', ['qemu-arm'], 'qemu-aarch64'),
+                    KconfigCache.make_key('d', platforms, None),
+                }
+            ),
+            4,
+        )
+        stored = [key, '0', '1', '2']
+        for name in stored[1:]:
+            cache.store(name, generator)
+        # make the entries age in store order, then use the oldest again
+        for age, name in enumerate(reversed(stored)):
+            path = cache.cache_path / name
+            mtime = path.stat().st_mtime_ns - age * 10**9
+            os.utime(path, ns=(mtime, mtime))
+        self.assertEqual(cache.load(key), artifact)
+        cache.store('3', generator)
+        self.assertEqual(
+            sorted(path.name for path in cache.cache_path.iterdir()),
+            sorted([key, '1', '2', '3']),
+        )
+
+    def test_kconfig_cache_follows_a_moved_cache_dir(self):
+        cache_dir = Path(self.workspace.name, 'cache')
+        KconfigCache(cache_dir).store('k', self._generator())
+        moved = cache_dir.rename(Path(self.workspace.name, 'moved'))
+        artifact = KconfigCache(moved).load('k')
+        self.assertEqual(
+            artifact.kconfig_path,
+            str(moved / KCONFIG_CACHE_DIR / 'k' / 'Kconfig'),
+        )
+
+    def test_parsed_kconfig_is_reused_without_user_values(self):
+        cache = KconfigCache(Path(self.workspace.name, 'cache'))
+        key = f'test-{id(self)}'
+        artifact = cache.store(key, self._generator())
+        self.addCleanup(KconfigCache._parsed.pop, key, None)
+        kconf = KconfigCache.parsed(key, artifact)
+        kconf.syms['FEATURE_SYSTEM'].set_value('y')
+        selection = MenuconfigGenerator._collect_selections(kconf, artifact)
+        self.assertEqual(selection.platform, 'qemu-aarch64')
+        self.assertIn('system', selection.features)
+        again = KconfigCache.parsed(key, artifact)
+        self.assertIs(again, kconf)
+        self.assertEqual(again.syms['FEATURE_SYSTEM'].str_value, 'n')
+        self.assertIsNot(KconfigCache.parsed(None, artifact), kconf)
+
+    def test_machine_dependencies_follow_listed_platforms(self):
+        kconf = self._build_kconfig_with_custom_features({
+            'bsp': [
+                ('rpi', textwrap.dedent('''\
+                    id: rpi
+                    machines:
+                      - raspberrypi4-64
+                    ''')),
+                ('qemu', textwrap.dedent('''\
+                    id: qemu
+                    machines:
+                      - QEMU-AARCH64
+                      - raspberrypi4-64
+                    ''')),
+                ('any', 'id: any\n'),
+            ],
+        })
+        # no listed platform supports rpi, so it can never be enabled
+        self.assertEqual(kconf.syms['FEATURE_BSP_RPI'].direct_dep.name, 'n')
+        self.assertEqual(
+            kconf.syms['FEATURE_BSP_QEMU'].direct_dep.name,
+            'PLATFORM_QEMU_AARCH64',
+        )
+        kconf.syms['FEATURE_BSP_QEMU'].set_value('y')
+        kconf.syms['FEATURE_BSP_RPI'].set_value('y')
+        kconf.syms['FEATURE_BSP_ANY'].set_value('y')
+        self.assertEqual(kconf.syms['FEATURE_BSP_QEMU'].str_value, 'y')
+        self.assertEqual(kconf.syms['FEATURE_BSP_RPI'].str_value, 'n')
+        self.assertEqual(kconf.syms['FEATURE_BSP_ANY'].str_value, 'y')
+
 
 class SelectSemanticTest(unittest.TestCase):
     """Tests that verify Kconfig 'select' semantics work correctly.
@@ -466,5 +574,132 @@ class SelectSemanticTest(unittest.TestCase):
                          'DEP_C should be auto-enabled')
 
 
+
+class KconfigTreeTest(unittest.TestCase):
+    """Tests for the streamed per-category Kconfig with simplified
+    depends on expressions."""
+
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = Path(workspace.name)
+        self.features_dir = self.base / 'features'
+        self.platform_dir = self.base / 'platform'
+        self.platform_dir.mkdir()
+        for machine in ('qemu-aarch64', 'qemu-arm', 'x86-64'):
+            (self.platform_dir / f'{machine}.yaml').write_text('')
+        self._write('os', 'os', 'id: os\n')
+        self._write('os', 'kernel', textwrap.dedent("""\
+            id: kernel
+            machines: [qemu-aarch64, qemu-arm]
+            dependencies: [os]
+            sub_feats:
+              - id: rt
+            """))
+        self._write(
+            'os', 'debug', 'id: debug\ndependencies: [os, os/kernel]\n'
+        )
+        self._write('os', 'trace', textwrap.dedent("""\
+            id: trace
+            machines: [qemu-aarch64, qemu-arm]
+            dependencies: [os/kernel]
+            """))
+        self._write(
+            'app', 'web', 'id: web\nmachines: [qemu-aarch64, qemu-arm]\n'
+        )
+
+    def _write(self, category, name, content):
+        (self.features_dir / category).mkdir(parents=True, exist_ok=True)
+        (self.features_dir / category / f'{name}.yaml').write_text(content)
+
+    def _generator(self, simplify=True):
+        return MenuconfigGenerator(
+            registry=FeatureRegistry(self.features_dir),
+            platform_dir=self.platform_dir,
+            default_platform='qemu-aarch64',
+            simplify=simplify,
+        )
+
+    def _write_tree(self):
+        return self._generator().write_kconfig_tree(self.base / 'kconfig')
+
+    @staticmethod
+    def _depends(text, symbol):
+        block = text.split(f'config {symbol}\n', 1)[1].split('\n\n', 1)[0]
+        for line in block.splitlines():
+            if line.strip().startswith('depends on '):
+                return line.strip()[len('depends on ') :]
+        return None
+
+    def test_fragments_are_sourced_per_category(self):
+        top = self._write_tree()
+        text = top.read_text()
+        self.assertIn('rsource "features/app.Kconfig"', text)
+        self.assertIn('rsource "features/os.Kconfig"', text)
+        self.assertIn('config COMMON_NO-FETCH', text)
+        self.assertNotIn('config FEATURE_', text)
+        self.assertIn(
+            'config FEATURE_OS_TRACE',
+            (top.parent / 'features' / 'os.Kconfig').read_text(),
+        )
+        tree = Kconfig(str(top), warn=False)
+        text_path = self.base / 'Kconfig.text'
+        text_path.write_text(self._generator(False).build_kconfig_text())
+        monolithic = Kconfig(str(text_path), warn=False)
+        self.assertEqual(
+            sorted(sym.name for sym in tree.unique_defined_syms),
+            sorted(sym.name for sym in monolithic.unique_defined_syms),
+        )
+        # a removed category loses its fragment
+        for path in (self.features_dir / 'app').iterdir():
+            path.unlink()
+        (self.features_dir / 'app').rmdir()
+        self._write_tree()
+        self.assertEqual(
+            [p.name for p in (top.parent / 'features').iterdir()],
+            ['os.Kconfig'],
+        )
+
+    def test_implied_terms_are_left_out(self):
+        top = self._write_tree()
+        text = (top.parent / 'features' / 'os.Kconfig').read_text()
+        # os and the machines are implied by the kernel
+        for name in ('DEBUG', 'TRACE'):
+            self.assertEqual(
+                self._depends(text, f'FEATURE_OS_{name}'), 'FEATURE_OS_KERNEL'
+            )
+        # inside the if block of its parent, with the parent's machines
+        self.assertIsNone(self._depends(text, 'FEATURE_OS_KERNEL_RT'))
+        self.assertEqual(
+            self._depends(text, 'FEATURE_OS_KERNEL'),
+            'FEATURE_OS && (!PLATFORM_X86_64)',
+        )
+        app = (top.parent / 'features' / 'app.Kconfig').read_text()
+        self.assertEqual(
+            self._depends(app, 'FEATURE_APP_WEB'), '!PLATFORM_X86_64'
+        )
+
+        kconf = Kconfig(str(top), warn=False)
+        kconf.syms['PLATFORM_X86_64'].set_value('y')
+        for name in ('OS', 'OS_KERNEL', 'OS_TRACE', 'OS_KERNEL_RT'):
+            kconf.syms[f'FEATURE_{name}'].set_value('y')
+        self.assertEqual(kconf.syms['FEATURE_OS'].str_value, 'y')
+        self.assertEqual(kconf.syms['FEATURE_OS_TRACE'].str_value, 'n')
+        self.assertEqual(kconf.syms['FEATURE_OS_KERNEL_RT'].str_value, 'n')
+
+    def test_selected_features_imply_nothing(self):
+        # a select enables the kernel whatever its depends on say
+        self._write('app', 'tool', 'id: tool\nselects: [os/kernel]\n')
+        text = self._generator().build_kconfig_text()
+        self.assertEqual(
+            self._depends(text, 'FEATURE_OS_DEBUG'),
+            'FEATURE_OS && FEATURE_OS_KERNEL && (!PLATFORM_X86_64)',
+        )
+        self.assertEqual(
+            self._depends(text, 'FEATURE_OS_TRACE'),
+            'FEATURE_OS_KERNEL && (!PLATFORM_X86_64)',
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
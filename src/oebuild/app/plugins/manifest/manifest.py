@@ -23,7 +23,7 @@ from oebuild.command import OebuildCommand
 from oebuild.configure import Configure
 import oebuild.util as oebuild_util
 from oebuild.m_log import logger
-from oebuild.ogit import OGit
+from oebuild.repo_fetch import FetchTask, fetch_repos
 
 
 class Manifest(OebuildCommand):
@@ -159,47 +159,56 @@ class Manifest(OebuildCommand):
             w_f.write(manifest_content)
 
     def _restore_manifest(self, manifest_dir, subrepo):
-        manifest_data = oebuild_util.read_yaml(pathlib.Path(manifest_dir))
+        manifest_data = oebuild_util.read_yaml_safe(manifest_dir)
         manifest_list = manifest_data.get('manifest_list', {})
         src_dir = self.configure.source_dir()
         if subrepo != '':
             if subrepo in manifest_list:
-                self._download_repo(src_dir, subrepo, manifest_list[subrepo])
+                self._download_repos(
+                    src_dir, {subrepo: manifest_list[subrepo]}
+                )
                 return
             logger.error('%s not in manifest.yaml', subrepo)
             sys.exit(-1)
-        final_res = []
-        for key, value in manifest_list.items():
-            if not self._download_repo(src_dir, key, value):
-                final_res.append(key)
+        final_res = self._download_repos(src_dir, manifest_list)
         if len(final_res) > 0:
             print('')
             print('the list package download failed:')
             for item in final_res:
-                remote_url = manifest_list[item]['remote_url']
-                version = manifest_list[item]['version']
-                print(f'{item}: {remote_url}, {version}')
+                print(f'{item.name}: {item.remote_url}, {item.version}')
             print('you can manually download them!!!')
         else:
             print("""
     all package download successful!!!""")
 
-    def _download_repo(self, src_dir, key, value):
-        logger.info(
-            '====================download %s=====================', key
-        )
-        repo_git = OGit(
-            os.path.join(src_dir, key),
-            remote_url=value['remote_url'],
-            branch=None,
-        )
-        if repo_git.check_out_version(version=value['version']):
-            logger.info(
-                '====================download %s successful=====================',
-                key,
+    def _download_repos(self, src_dir, repos):
+        """
+        fetch the given manifest entries in parallel, return the results
+        of the ones that failed in manifest order
+        """
+        tasks = [
+            FetchTask(
+                name=key,
+                repo_dir=os.path.join(src_dir, key),
+                remote_url=value['remote_url'],
+                version=value['version'],
             )
-            return True
-        logger.warning(
-            '====================download %s failed=====================', key
-        )
-        return False
+            for key, value in repos.items()
+        ]
+        logger.info('downloading %d repos ...', len(tasks))
+        failed = []
+        for result in fetch_repos(tasks):
+            if result.ok:
+                logger.info(
+                    '====================download %s successful'
+                    '=====================',
+                    result.name,
+                )
+                continue
+            logger.warning(
+                '====================download %s failed=====================',
+                result.name,
+            )
+            logger.warning('%s', result.error)
+            failed.append(result)
+        return failed
@@ -163,7 +163,7 @@ class Update(OebuildCommand):
         else:
             common_path = os.path.join(yocto_dir, '.oebuild/common.yaml')
             repos = oebuild_util.trans_dict_key_to_list(
-                oebuild_util.read_yaml(yaml_path=common_path)['repos']
+                oebuild_util.read_yaml_safe(common_path)['repos']
             )
 
         if repos is None:
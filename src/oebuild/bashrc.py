@@ -10,18 +10,22 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import shutil
 import subprocess
-
-from docker.models.containers import Container
+from typing import TYPE_CHECKING
 
 import oebuild.util as oebuild_util
 import oebuild.const as oebuild_const
 from oebuild.docker_proxy import DockerProxy
 from oebuild.m_log import logger
 
+if TYPE_CHECKING:
+    from docker.models.containers import Container
+
 
 class Bashrc:
     """
@@ -13,6 +13,8 @@ import fnmatch
 import os
 import re
 
+import oebuild.util as oebuild_util
+
 
 def preserved_envvars_exported():
     """Variables which are taken from the environment and placed in and exported
@@ -338,6 +340,13 @@ def _layerlist_param(value):
     return [_remove_trailing_sep(value)]
 
 
+def canonical_layer_paths(value):
+    """Layer path (or list of layer paths) as a list of canonical paths,
+    the form edit_bblayers_conf compares them in."""
+    approved = approved_variables()
+    return [_canonicalise_path(x, approved) for x in _layerlist_param(value)]
+
+
 def _process_layer_removals(bblayers, removelayers, approved, removed):
     """Process layer removals from BBLAYERS list."""
     updated = False
@@ -407,6 +416,40 @@ def _calculate_not_added_layers(addlayers, orig_bblayers, removelayers, approved
     return notadded
 
 
+def _read_bblayers(bblayers_conf, approved):
+    """First pass over bblayers.conf, collecting the BBLAYERS operations,
+    the canonical layer list they produce and the lines of the file."""
+    # Need to use a list here because we can't set non-local variables
+    # from a callback in python 2.x
+    bblayercalls = []
+    orig_bblayers = []
+
+    def handle_bblayers_firstpass(_varname, origvalue, op, _newlines):
+        """First pass handler to collect initial BBLAYERS values."""
+        bblayercalls.append(op)
+        if op == '=':
+            del orig_bblayers[:]
+        orig_bblayers.extend(
+            [_canonicalise_path(x, approved) for x in origvalue.split()]
+        )
+        return (origvalue, None, 2, False)
+
+    with open(bblayers_conf, encoding='utf-8') as f:
+        (_, newlines) = edit_metadata(
+            f, ['BBLAYERS'], handle_bblayers_firstpass
+        )
+
+    if not bblayercalls:
+        raise ValueError(f'Unable to find BBLAYERS in {bblayers_conf}')
+    return bblayercalls, orig_bblayers, newlines
+
+
+def read_bblayers_conf(bblayers_conf):
+    """Return the layers BBLAYERS holds in bblayers.conf, in order and
+    canonicalised like edit_bblayers_conf compares them."""
+    return _read_bblayers(bblayers_conf, approved_variables())[1]
+
+
 def edit_bblayers_conf(bblayers_conf, add, remove, edit_cb=None):  # pylint: disable=too-many-locals
     """Edit bblayers.conf, adding and/or removing layers
     Parameters:
@@ -427,19 +470,8 @@ def edit_bblayers_conf(bblayers_conf, add, remove, edit_cb=None):  # pylint: dis
     addlayers = _layerlist_param(add)
     removelayers = _layerlist_param(remove)
 
-    # Need to use a list here because we can't set non-local variables from a callback in python 2.x
-    bblayercalls = []
     removed = []
     plusequals = False
-    orig_bblayers = []
-
-    def handle_bblayers_firstpass(_varname, origvalue, op, _newlines):
-        """First pass handler to collect initial BBLAYERS values."""
-        bblayercalls.append(op)
-        if op == '=':
-            del orig_bblayers[:]
-        orig_bblayers.extend([_canonicalise_path(x, approved) for x in origvalue.split()])
-        return (origvalue, None, 2, False)
 
     def handle_bblayers(_varname, origvalue, op, _newlines):
         """Second pass handler to modify BBLAYERS values."""
@@ -459,13 +491,9 @@ def edit_bblayers_conf(bblayers_conf, add, remove, edit_cb=None):  # pylint: dis
 
         return (origvalue, None, 2, False)
 
-    with open(bblayers_conf, 'r', encoding='utf-8') as f:
-        (_, newlines) = edit_metadata(
-            f, ['BBLAYERS'], handle_bblayers_firstpass
-        )
-
-    if not bblayercalls:
-        raise ValueError(f'Unable to find BBLAYERS in {bblayers_conf}')
+    bblayercalls, orig_bblayers, newlines = _read_bblayers(
+        bblayers_conf, approved
+    )
 
     # Try to do the "smart" thing depending on how the user has laid out
     # their bblayers.conf file
@@ -485,8 +513,8 @@ def edit_bblayers_conf(bblayers_conf, add, remove, edit_cb=None):  # pylint: dis
         updated = True
 
     if updated:
-        with open(bblayers_conf, 'w', encoding='utf-8') as f:
-            f.writelines(newlines)
+        # an unchanged file keeps its mtime, bitbake would re-parse otherwise
+        oebuild_util.write_if_changed(bblayers_conf, ''.join(newlines))
 
     notremoved = list(set(removelayers) - set(removed))
 
@@ -10,16 +10,36 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+import fnmatch
+import hashlib
+import json
 import os
+from typing import Dict, List, Optional, Tuple
 
 import oebuild.bb.utils as bb_utils
+import oebuild.util as oebuild_util
+
+BBLAYERS_CACHE_DIR = 'bblayers'
+
+# realpath -> (stat key, layers), filled by BBLayers.layers
+_BBLAYERS_CACHE: Dict[str, Tuple[Tuple[int, int, int], List[str]]] = {}
+
+
+def _stat_key(path) -> Tuple[int, int, int]:
+    stat = os.stat(path)
+    # a rewritten bblayers.conf is a new file, see write_if_changed
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
 
 class BBLayers:
     """
     The BBlayer class implements the layer added in the
     container environment in the physical environment,
-    and the add operation references bitbake-related code
+    and the add operation references bitbake-related code.
+
+    The layers BBLAYERS holds are cached in process and under
+    <cache_dir>/bblayers, keyed on the file's inode, mtime and size, so
+    a build that needs no new layer neither parses nor edits the file
     """
 
     def __init__(self, bblayers_dir: str, base_dir: str):
@@ -40,51 +60,144 @@ class BBLayers:
         """
         return self._bblayers_dir
 
+    def _cache_path(self, path: str):
+        digest = hashlib.sha256(path.encode('utf-8', 'surrogateescape'))
+        return os.path.join(
+            oebuild_util.get_cache_dir(),
+            BBLAYERS_CACHE_DIR,
+            f'{digest.hexdigest()}.json',
+        )
+
+    def _load_cached(self, path: str, key) -> Optional[List[str]]:
+        try:
+            with open(self._cache_path(path), encoding='utf-8') as r_f:
+                record = json.load(r_f)
+            if record['path'] == path and tuple(record['stat']) == key:
+                return list(record['layers'])
+        # a damaged or foreign entry only costs a parse
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return None
+
+    def _store_cached(self, path: str, key, layers: List[str]):
+        _BBLAYERS_CACHE[path] = (key, layers)
+        record = {'path': path, 'stat': list(key), 'layers': layers}
+        try:
+            oebuild_util.write_if_changed(
+                self._cache_path(path), json.dumps(record)
+            )
+        except OSError:
+            # the cache is an optimization only
+            pass
+
+    def layers(self) -> List[str]:
+        """
+        the layers BBLAYERS holds, in order, parsing bblayers.conf only
+        when it changed since it was last read
+        """
+        path = os.path.realpath(self.bblayers_dir)
+        key = _stat_key(path)
+        cached = _BBLAYERS_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return list(cached[1])
+        layers = self._load_cached(path, key)
+        if layers is None:
+            layers = bb_utils.read_bblayers_conf(path)
+            self._store_cached(path, key, layers)
+        else:
+            _BBLAYERS_CACHE[path] = (key, layers)
+        return list(layers)
+
+    def delta(self, add=None, remove=None) -> Tuple[List[str], List[str]]:
+        """
+        the layer paths of add that BBLAYERS misses and the entries of
+        BBLAYERS that the paths or patterns of remove match, both in order
+        """
+        current = self.layers()
+        present = set(current)
+        to_add = []
+        for layer in bb_utils.canonical_layer_paths(add):
+            if layer not in present:
+                present.add(layer)
+                to_add.append(layer)
+        patterns = bb_utils.canonical_layer_paths(remove)
+        to_remove = [
+            layer
+            for layer in current
+            if any(fnmatch.fnmatch(layer, pattern) for pattern in patterns)
+        ]
+        return to_add, to_remove
+
+    def update_layers(self, add=None, remove=None) -> bool:
+        """
+        add and remove layer paths in bblayers.conf, without touching it
+        when BBLAYERS already matches. Returns whether it changed
+        """
+        to_add, to_remove = self.delta(add, remove)
+        if not to_add and not to_remove:
+            return False
+        path = os.path.realpath(self.bblayers_dir)
+        before = _stat_key(path)
+        bb_utils.edit_bblayers_conf(path, add=to_add, remove=to_remove)
+        if _stat_key(path) == before:
+            return False
+        # cache the new list now, the next build then needs no parse
+        self.layers()
+        return True
+
     def add_layer(self, pre_dir: str, layers):
         """
         Add a layer layer to bblayers.conf, but our layer
         layer verification is done on the host,
-        and the added path is written as a path in the container
+        and the added path is written as a path in the container.
+        Only layers bblayers.conf misses are checked and added
         args:
             pre_dir (str): when added layer with path, for example
             pre_dir/layer
             layers (str or list): needed to add to bblayers.conf
+        returns:
+            whether bblayers.conf changed
         """
-        try:
-            self.check_layer_exist(layers=layers)
-        except Exception as e_p:
-            raise e_p
-
-        bblayers = []
-        if isinstance(layers, str):
-            bblayers = [os.path.join(pre_dir, layers)]
-        if isinstance(layers, list):
-            for layer in layers:
-                bblayers.append(os.path.join(pre_dir, layer))
-
-        bb_utils.edit_bblayers_conf(
-            self.bblayers_dir, add=bblayers, remove=None
+        names = [layers] if isinstance(layers, str) else list(layers or [])
+        paths = dict(
+            zip(
+                bb_utils.canonical_layer_paths(
+                    [os.path.join(pre_dir, layer) for layer in names]
+                ),
+                names,
+            )
         )
+        to_add, _ = self.delta(add=list(paths))
+        self.check_layer_exist(layers=[paths[path] for path in to_add])
+        return self.update_layers(add=to_add)
 
     def check_layer_exist(self, layers):
         """
         To check if it is legitimate to add a layer,
-        the main thing is to verify the existence of layer.conf
+        the main thing is to verify the existence of layer.conf.
+        Every layer is checked before one error names all bad ones
         args:
             layers (str or list): needed to add to bblayers.conf
         """
-        bblayers = []
+        missing = []
+        invalid = []
         if isinstance(layers, str):
-            bblayers.append(layers)
-        else:
-            bblayers.extend(bblayers)
-
-        for layer in bblayers:
+            layers = [layers]
+        for layer in layers or []:
             layer_dir = os.path.join(self.base_dir, layer)
-            if not os.path.exists(layer_dir):
-                raise ValueError('layer does not exists')
-
-            layer_conf_dir = os.path.join(layer_dir, 'conf', 'layer.conf')
-            if not os.path.exists(layer_conf_dir):
-                print(layer_conf_dir)
-                raise ValueError('invalid layer')
+            # one stat for a valid layer
+            if os.path.isfile(os.path.join(layer_dir, 'conf', 'layer.conf')):
+                continue
+            if os.path.exists(layer_dir):
+                invalid.append(layer)
+            else:
+                missing.append(layer)
+        errors = []
+        if missing:
+            errors.append(f'layer does not exists: {", ".join(missing)}')
+        if invalid:
+            errors.append(
+                f'invalid layer, no conf/layer.conf: {", ".join(invalid)}'
+            )
+        if errors:
+            raise ValueError('; '.join(errors))
@@ -11,9 +11,6 @@ See the Mulan PSL v2 for more details.
 """
 
 import os
-import pathlib
-
-from git import Repo
 
 from oebuild.configure import Configure
 import oebuild.util as oebuild_util
@@ -80,9 +77,11 @@ the openeuler embedded docker tag can be selected list:
         yocto_dir = self.configure.source_yocto_dir()
         env_path = os.path.join(yocto_dir, '.oebuild/env.yaml')
         if os.path.exists(env_path):
-            env_parse = oebuild_util.read_yaml(pathlib.Path(env_path))
+            env_parse = oebuild_util.read_yaml_safe(env_path)
             return str(env_parse['docker_tag'])
 
+        from git import Repo  # pylint: disable=C0415
+
         yocto_repo = Repo.init(yocto_dir)
         oebuild_config = self.configure.parse_oebuild_config()
         docker_config = oebuild_config.docker
@@ -10,8 +10,9 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+import copy
 import os
-from typing import Dict, Optional, Union
+from typing import Dict, Optional, Tuple, Union
 import pathlib
 from dataclasses import dataclass
 
@@ -67,6 +68,98 @@ class Config:
     feat_root_dir: str = 'features'
 
 
+class WorkspaceContext:
+    """
+    per-process cache of the workspace lookups done by Configure, a single
+    oebuild run asks for the top dir and the parsed .oebuild/config dozens
+    of times. The top dir found for a start directory is kept as long as its
+    .oebuild/config still exists, and the parsed config is kept until the
+    mtime or size of .oebuild/config changes.
+    """
+
+    def __init__(self):
+        self._topdirs: Dict[str, str] = {}
+        self._configs: Dict[str, Tuple[Tuple[int, int], Config]] = {}
+
+    def topdir(self, start: PathType) -> Optional[str]:
+        """
+        return the workspace top dir for start, or None if there is none
+        """
+        start = os.fspath(start)
+        topdir = self._topdirs.get(start)
+        if topdir is not None and os.path.isfile(
+            os.path.join(topdir, '.oebuild', oebuild_const.CONFIG)
+        ):
+            return topdir
+
+        cur_dir = pathlib.Path(start)
+        while True:
+            if (cur_dir / '.oebuild' / oebuild_const.CONFIG).is_file():
+                topdir = os.fspath(cur_dir)
+                self._topdirs[start] = topdir
+                return topdir
+
+            parent_dir = cur_dir.parent
+            if cur_dir == parent_dir:
+                self._topdirs.pop(start, None)
+                return None
+            cur_dir = parent_dir
+
+    def config(self, config_path: str) -> Config:
+        """
+        return the parsed config in config_path, the returned object is
+        shared and must not be modified
+        """
+        stat = os.stat(config_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._configs.get(config_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        config = _parse_config(oebuild_util.read_yaml(yaml_path=config_path))
+        self._configs[config_path] = (key, config)
+        return config
+
+    def invalidate(self):
+        """
+        drop everything cached so far
+        """
+        self._topdirs.clear()
+        self._configs.clear()
+
+
+def _parse_config(config) -> Config:
+    tag_map = {}
+    for key, value in config['docker']['tag_map'].items():
+        tag_map[key] = value
+    docker_config = ConfigContainer(
+        repo_url=config['docker']['repo_url'], tag_map=tag_map
+    )
+
+    basic_config = {}
+    for key, repo in config['basic_repo'].items():
+        basic_config[key] = ConfigBasicRepo(
+            path=repo['path'],
+            remote_url=repo['remote_url'],
+            branch=repo['branch'],
+        )
+
+    raw_feat_root = config.get('feat_root_dir')
+    # features is the fallback
+    feat_root_dir = (
+        raw_feat_root.strip()
+        if isinstance(raw_feat_root, str) and raw_feat_root.strip()
+        else 'features'
+    )
+    return Config(
+        docker=docker_config,
+        basic_repo=basic_config,
+        feat_root_dir=feat_root_dir,
+    )
+
+
+WORKSPACE_CONTEXT = WorkspaceContext()
+
+
 class Configure:
     """
     Configure object is to contain some generally param or function about oebuild
@@ -80,22 +173,16 @@ class Configure:
         Like oebuild_dir(), but returns the path to the parent directory of the .oebuild/
         directory instead, where project repositories are stored
         """
-        cur_dir = pathlib.Path(start or os.getcwd())
-
-        while True:
-            if (cur_dir / '.oebuild/config').is_file():
-                return os.fspath(cur_dir)
-
-            parent_dir = cur_dir.parent
-            if cur_dir == parent_dir:
-                # At the root. Should we fall back?
-                if fall_back:
-                    return Configure.oebuild_topdir(fall_back=False)
-
-                raise OebuildNotFound(
-                    'Could not find a oebuild workspace in this or any parent directory'
-                )
-            cur_dir = parent_dir
+        topdir = WORKSPACE_CONTEXT.topdir(start or os.getcwd())
+        if topdir is not None:
+            return topdir
+        # At the root. Should we fall back?
+        if fall_back:
+            return Configure.oebuild_topdir(fall_back=False)
+
+        raise OebuildNotFound(
+            'Could not find a oebuild workspace in this or any parent directory'
+        )
 
     @staticmethod
     def oebuild_dir(start: Optional[PathType] = None):
@@ -133,7 +220,7 @@ class Configure:
         """
         return src/yocto-meta-openeuler path
         """
-        config = Configure.parse_oebuild_config()
+        config = WORKSPACE_CONTEXT.config(Configure._config_path())
         basic_config = config.basic_repo
         yocto_config: ConfigBasicRepo = basic_config[
             oebuild_const.YOCTO_META_OPENEULER
@@ -193,48 +280,18 @@ class Configure:
         """
         return os.path.join(Configure.build_dir(), '.env')
 
+    @staticmethod
+    def _config_path():
+        return os.path.join(Configure.oebuild_dir(), oebuild_const.CONFIG)
+
     @staticmethod
     def parse_oebuild_config():
         """
         just parse oebuild config and return a json object,
-        the file path is {WORKSPACE}.oebuild/config
+        the file path is {WORKSPACE}.oebuild/config, the file is parsed once
+        per process and a copy is returned so callers can modify it freely
         """
-
-        config = oebuild_util.read_yaml(
-            yaml_path=os.path.join(
-                Configure.oebuild_dir(), oebuild_const.CONFIG
-            )
-        )
-
-        tag_map = {}
-        for key, value in config['docker']['tag_map'].items():
-            tag_map[key] = value
-        docker_config = ConfigContainer(
-            repo_url=config['docker']['repo_url'], tag_map=tag_map
-        )
-
-        basic_config = {}
-        for key, repo in config['basic_repo'].items():
-            basic_config[key] = ConfigBasicRepo(
-                path=repo['path'],
-                remote_url=repo['remote_url'],
-                branch=repo['branch'],
-            )
-
-        raw_feat_root = config.get('feat_root_dir')
-        # features is the fallback
-        feat_root_dir = (
-            raw_feat_root.strip()
-            if isinstance(raw_feat_root, str) and raw_feat_root.strip()
-            else 'features'
-        )
-        config = Config(
-            docker=docker_config,
-            basic_repo=basic_config,
-            feat_root_dir=feat_root_dir,
-        )
-
-        return config
+        return copy.deepcopy(WORKSPACE_CONTEXT.config(Configure._config_path()))
 
     @staticmethod
     def update_oebuild_config(config: Config):
@@ -264,11 +321,11 @@ class Configure:
 
         try:
             oebuild_util.write_yaml(
-                yaml_path=pathlib.Path(
-                    Configure.oebuild_dir(), oebuild_const.CONFIG
-                ),
-                data=data,
+                yaml_path=pathlib.Path(Configure._config_path()), data=data
             )
             return True
         except TypeError:
             return False
+        finally:
+            # mtime may not move when rewritten within the same tick
+            WORKSPACE_CONTEXT.invalidate()
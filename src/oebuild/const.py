@@ -26,6 +26,10 @@ DEFAULT_SDK_DOCKER = (
 CONTAINER_SRC = '/usr1/openeuler/src'
 NATIVESDK_DIR = '/opt/buildtools/nativesdk'
 PROXY_LIST = ['http_proxy', 'https_proxy']
+CACHE_DIR_ENV = 'OEBUILD_CACHE_DIR'
+
+# used for spec.py
+COMMAND_MANIFEST = 'command_manifest.json'
 
 # used for local_conf
 NATIVESDK_DIR_NAME = 'OPENEULER_NATIVESDK_SYSROOT'
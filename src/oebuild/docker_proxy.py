@@ -10,20 +10,21 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
 import os
 from io import BytesIO
 import tarfile
 import subprocess
 import sys
-from typing import List
+from typing import TYPE_CHECKING, List
 import re
 
-import docker
-from docker.errors import ImageNotFound, NotFound
-from docker.models.containers import Container
-
 from oebuild.m_log import logger
 
+if TYPE_CHECKING:
+    from docker.models.containers import Container
+
 
 class DockerProxy:
     """
@@ -31,6 +32,10 @@ class DockerProxy:
     """
 
     def __init__(self):
+        # docker pulls in requests/urllib3, so only load it once a proxy
+        # is actually needed
+        import docker  # pylint: disable=C0415
+
         self._docker = docker.from_env()
 
     def is_image_exists(self, image_name):
@@ -39,6 +44,8 @@ class DockerProxy:
         args:
             image_name (str): docker image name
         """
+        from docker.errors import ImageNotFound  # pylint: disable=C0415
+
         try:
             self._docker.images.get(image_name)
             return True
@@ -51,6 +58,8 @@ class DockerProxy:
         args:
             container_id (str): docker container short_id or id
         """
+        from docker.errors import NotFound  # pylint: disable=C0415
+
         try:
             container = self._docker.containers.get(container_id=container_id)
             return container.image.id
@@ -63,6 +72,8 @@ class DockerProxy:
         args:
             container_id (str): docker container short_id or id
         """
+        from docker.errors import NotFound  # pylint: disable=C0415
+
         try:
             self._docker.containers.get(container_id=container_id)
             return True
@@ -8,12 +8,27 @@ outputs the deterministic set to inject into ParseTemplate.
 
 from __future__ import annotations
 
+import hashlib
+import heapq
+import os
 import pathlib
+import pickle
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import oebuild.util as oebuild_util
+from oebuild.version import __version__
+
+# bump when Feature/FeatureConfig or the indexes kept in a snapshot change
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_DIR = 'feature_registry'
+# below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 128
+# below this many distinct batch entries resolving in process is faster
+PARALLEL_MIN_ENTRIES = 64
 
 
 class FeatureError(Exception):
@@ -78,10 +93,370 @@ class ResolutionResult:
     features: List[Feature]
 
 
-class FeatureRegistry:
-    """Indexes features defined under .oebuild/<feat_root_dir>."""
+@dataclass
+class BatchEntryResult:
+    """Outcome of one (machine, requested) entry of a batch resolution."""
+
+    machine: str
+    requested: Tuple[str, ...]
+    result: Optional[ResolutionResult] = None
+    error: Optional[FeatureError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FeatureReloadResult:
+    added: List[pathlib.Path] = field(default_factory=list)
+    modified: List[pathlib.Path] = field(default_factory=list)
+    removed: List[pathlib.Path] = field(default_factory=list)
+    # full ids whose references or machine constraints were recomputed
+    affected: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+@dataclass(frozen=True)
+class _DeclaredFeature:
+    """What a feature file declared, before canonicalization/propagation."""
+
+    dependencies: Tuple[str, ...]
+    selects: Tuple[str, ...]
+    one_of: Tuple[str, ...]
+    choice: Tuple[str, ...]
+    default_one_of: Optional[str]
+    machines: Optional[Tuple[str, ...]]
+    machine_set: Optional[frozenset]
+
+
+@dataclass(frozen=True)
+class FeatureParseTiming:
+    path: pathlib.Path
+    size: int
+    seconds: float
+
+
+def _read_feature_file(path: pathlib.Path) -> Tuple[object, float]:
+    """Load one feature file, also used as the process pool worker."""
+    start = time.perf_counter()
+    data = oebuild_util.read_yaml_safe(path)
+    return data, time.perf_counter() - start
+
+
+def _transitive_closures(edges: List[List[int]]) -> List[int]:
+    """Reflexive transitive closure bitset of every node.
+
+    Strongly connected components are found with an iterative Tarjan walk,
+    which emits them sinks first, so each component's closure only needs
+    the already finished closures of its successors.
+    """
+    count = len(edges)
+    index = [-1] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    component_of = [-1] * count
+    stack: List[int] = []
+    closures: List[int] = []
+    counter = 0
+    for root in range(count):
+        if index[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            recurse = False
+            for position in range(child, len(edges[node])):
+                succ = edges[node][position]
+                if index[succ] == -1:
+                    work.append((node, position + 1))
+                    work.append((succ, 0))
+                    recurse = True
+                    break
+                if on_stack[succ]:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            if recurse:
+                continue
+            if lowlink[node] == index[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component_of[member] = len(closures)
+                    members.append(member)
+                    if member == node:
+                        break
+                closure = 0
+                for member in members:
+                    closure |= 1 << member
+                for member in members:
+                    for succ in edges[member]:
+                        if component_of[succ] != component_of[member]:
+                            closure |= closures[component_of[succ]]
+                closures.append(closure)
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return [closures[component_of[node]] for node in range(count)]
+
+
+def _index_machines(
+    features: Iterable[Feature],
+) -> Tuple[Dict[str, Set[str]], Set[str]]:
+    """Map every machine to the full ids of the features it supports.
+
+    A feature supports a machine when it and all of its parents allow it.
+    Features that allow every machine are returned apart instead of being
+    copied under each machine. ``features`` must list parents before their
+    sub-features, as the registry does.
+    """
+    machine_index: Dict[str, Set[str]] = defaultdict(set)
+    unrestricted: Set[str] = set()
+    allowed: Dict[str, Optional[Set[str]]] = {}
+    for feature in features:
+        # an empty machine set restricts nothing, see supports_machine()
+        machines = feature.machine_set or None
+        parent_machines = allowed.get(feature.parent_full_id)
+        if parent_machines is not None:
+            machines = (
+                parent_machines
+                if machines is None
+                else machines & parent_machines
+            )
+        allowed[feature.full_id] = machines
+        if machines is None:
+            unrestricted.add(feature.full_id)
+            continue
+        for machine in machines:
+            machine_index[machine].add(feature.full_id)
+    return dict(machine_index), unrestricted
+
+
+def _scan_feature_files(
+    features_dir: pathlib.Path,
+) -> List[Tuple[str, pathlib.Path, os.stat_result]]:
+    """Return (category, path, stat) for every feature file, sorted."""
+    feature_files = []
+    with os.scandir(features_dir) as categories:
+        category_dirs = sorted(
+            (entry for entry in categories if entry.is_dir()),
+            key=lambda entry: entry.name,
+        )
+    for category_dir in category_dirs:
+        category = category_dir.name.strip()
+        if not category:
+            continue
+        with os.scandir(category_dir.path) as entries:
+            files = sorted(
+                (entry for entry in entries if entry.is_file()),
+                key=lambda entry: entry.name,
+            )
+        for entry in files:
+            if os.path.splitext(entry.name)[1] not in ('.yaml', '.yml'):
+                continue
+            feature_files.append(
+                (category, pathlib.Path(entry.path), entry.stat())
+            )
+    return feature_files
+
+
+def _tree_digest(
+    features_dir: pathlib.Path,
+    feature_files: List[Tuple[str, pathlib.Path, os.stat_result]],
+) -> str:
+    digest = hashlib.sha256(f'{SNAPSHOT_FORMAT}\0{__version__}\0'.encode())
+    # two trees with the same files are still two trees
+    digest.update(os.fsencode(features_dir.resolve()) + b'\0')
+    for _, feature_file, _ in feature_files:
+        relpath = feature_file.relative_to(features_dir).as_posix()
+        content = feature_file.read_bytes()
+        digest.update(
+            f'{relpath}\0{len(content)}\0'.encode('utf-8', 'surrogateescape')
+        )
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def feature_tree_digest(features_dir: os.PathLike) -> str:
+    """The ``digest`` a FeatureRegistry of features_dir would get.
+
+    It covers the resolved directory and the content of every feature
+    file, so it changes with what the registry would hold, and is computed
+    without parsing any feature file.
+    """
+    features_dir = pathlib.Path(features_dir)
+    if not features_dir.exists():
+        raise FeatureError(f'Feature directory not found: {features_dir}')
+    return _tree_digest(features_dir, _scan_feature_files(features_dir))
 
-    def __init__(self, features_dir_path: pathlib.Path):
+
+class FeatureClosureIndex:
+    """Dense feature indices with precomputed closures as int bitsets.
+
+    Bit ``i`` stands for ``features[i]``. ``enable_closure[i]`` holds every
+    feature enabled along with feature ``i`` (itself, its dependencies,
+    selects and parents, transitively) and ``select_closure[i]`` the
+    features reachable from ``i`` through ``selects`` edges only.
+
+    ``one_of_groups`` lists the positions of the one_of owners in
+    ``one_of_owners`` order, ``one_of_group_of`` maps an owner position
+    back to its ordinal, and ``one_of_watchers[i]`` the ordinals of
+    the groups whose outcome can change when feature ``i`` is enabled.
+
+    ``machine_index`` and ``unrestricted`` are the registry's machine
+    index; they are computed from ``features`` when not given.
+    """
+
+    def __init__(
+        self,
+        features: Iterable[Feature],
+        one_of_owners: Iterable[Feature] = (),
+        machine_index: Optional[Dict[str, Set[str]]] = None,
+        unrestricted: Optional[Set[str]] = None,
+    ):
+        self.features: List[Feature] = list(features)
+        self.index: Dict[str, int] = {
+            feature.full_id: position
+            for position, feature in enumerate(self.features)
+        }
+        # same edge order as FeatureResolver._enable_feature walks them
+        self._enable_edges: List[List[int]] = []
+        select_edges: List[List[int]] = []
+        for feature in self.features:
+            edges = [self.index[dep] for dep in feature.dependencies]
+            edges.extend(self.index[sel] for sel in feature.selects)
+            if feature.is_subfeature and feature.parent_full_id:
+                edges.append(self.index[feature.parent_full_id])
+            self._enable_edges.append(edges)
+            select_edges.append([self.index[sel] for sel in feature.selects])
+        self.enable_closure = _transitive_closures(self._enable_edges)
+        reachable = _transitive_closures(select_edges)
+        # like FeatureResolver._selects_closure, a feature is only part of
+        # its own select closure when it sits on a selects cycle
+        self.select_closure = []
+        for edges in select_edges:
+            closure = 0
+            for succ in edges:
+                closure |= reachable[succ]
+            self.select_closure.append(closure)
+        self.one_of_groups: List[int] = []
+        self.one_of_group_of: Dict[int, int] = {}
+        self.one_of_watchers: Dict[int, List[int]] = defaultdict(list)
+        for owner in one_of_owners:
+            if not owner.one_of:
+                continue
+            ordinal = len(self.one_of_groups)
+            self.one_of_groups.append(self.index[owner.full_id])
+            self.one_of_group_of[self.index[owner.full_id]] = ordinal
+            watched = {owner.full_id, *owner.one_of}
+            if owner.default_one_of:
+                watched.add(owner.default_one_of)
+            for full_id in watched:
+                position = self.index.get(full_id)
+                if position is not None:
+                    self.one_of_watchers[position].append(ordinal)
+        self._enable_orders: Dict[int, Tuple[int, ...]] = {}
+        if machine_index is None or unrestricted is None:
+            machine_index, unrestricted = _index_machines(self.features)
+        self._machine_index = machine_index
+        self._unrestricted_mask = self.mask(unrestricted)
+        self._machine_masks: Dict[str, int] = {}
+
+    def enable_order(self, position: int) -> Tuple[int, ...]:
+        """Order in which enabling a feature on a blank resolver enables
+        its closure; enabling it later yields the same order minus
+        whatever is already enabled."""
+        order = self._enable_orders.get(position)
+        if order is not None:
+            return order
+        seen = {position}
+        result = [position]
+        work = [iter(self._enable_edges[position])]
+        while work:
+            for succ in work[-1]:
+                if succ not in seen:
+                    seen.add(succ)
+                    result.append(succ)
+                    work.append(iter(self._enable_edges[succ]))
+                    break
+            else:
+                work.pop()
+        order = tuple(result)
+        self._enable_orders[position] = order
+        return order
+
+    def machine_mask(self, machine: str) -> int:
+        """Bitset of features that, with all their parents, allow machine."""
+        machine = machine.strip().lower()
+        mask = self._machine_masks.get(machine)
+        if mask is not None:
+            return mask
+        mask = self._unrestricted_mask | self.mask(
+            self._machine_index.get(machine, ())
+        )
+        self._machine_masks[machine] = mask
+        return mask
+
+    def mask(self, full_ids: Iterable[str]) -> int:
+        result = 0
+        for full_id in full_ids:
+            result |= 1 << self.index[full_id]
+        return result
+
+    def full_ids(self, mask: int) -> Set[str]:
+        result = set()
+        while mask:
+            low = mask & -mask
+            result.add(self.features[low.bit_length() - 1].full_id)
+            mask ^= low
+        return result
+
+
+class FeatureRegistry:
+    """Indexes features defined under .oebuild/<feat_root_dir>.
+
+    When ``cache_dir`` is given, the built indexes are pickled there as a
+    snapshot keyed on ``digest``, a hash of the features directory and the
+    feature files' paths and contents, and later instances load the
+    snapshot instead of parsing the tree again until a feature file is
+    added, removed or modified.
+
+    Long-lived callers can call ``reload()`` to pick up edits; only changed
+    files are parsed again.
+
+    ``machine_index`` maps every machine named by a feature to the full ids
+    of the machine-restricted features it supports, and
+    ``unrestricted_features`` holds the features every machine supports;
+    ``machine_features()`` and ``supports_machine()`` answer from them.
+    """
+
+    # attributes restored from a snapshot, in the order they are stored
+    _SNAPSHOT_FIELDS = (
+        'features_by_full_id',
+        'leaf_index',
+        'features_with_one_of',
+        'category_roots',
+        'long_alias_index',
+        'machine_index',
+        'unrestricted_features',
+        '_file_features',
+        '_declared',
+    )
+
+    def __init__(
+        self,
+        features_dir_path: pathlib.Path,
+        cache_dir: Optional[os.PathLike] = None,
+        jobs: int = 1,
+    ):
         self.features_dir = pathlib.Path(features_dir_path)
         if not self.features_dir.exists():
             raise FeatureError(
@@ -92,39 +467,282 @@ class FeatureRegistry:
         self.features_with_one_of: List[Feature] = []
         self.category_roots: Dict[str, Feature] = {}
         self.long_alias_index: Dict[str, Feature] = {}
-        self._load_features()
-        self._compute_category_roots()
-        self._build_long_alias_index()
+        self.machine_index: Dict[str, Set[str]] = {}
+        self.unrestricted_features: Set[str] = set()
+        # feature file -> full ids it defines, the parent first
+        self._file_features: Dict[str, List[str]] = {}
+        self._declared: Dict[str, _DeclaredFeature] = {}
+        self._feature_files = _scan_feature_files(self.features_dir)
+        self.digest = _tree_digest(self.features_dir, self._feature_files)
+        self.loaded_from_snapshot = False
+        self.parse_timings: List[FeatureParseTiming] = []
+        self._jobs = max(1, jobs or 1)
+        self._needs_full_load = False
+        self._closure_index: Optional[FeatureClosureIndex] = None
+
+        self._snapshot = self._snapshot_path(cache_dir)
+        if self._snapshot is not None and self._load_snapshot(self._snapshot):
+            self.loaded_from_snapshot = True
+            return
+        self._full_load()
+
+    def closure_index(self) -> FeatureClosureIndex:
+        """Bitset closures of the current registry, built on first use."""
+        if self._closure_index is None:
+            self._closure_index = FeatureClosureIndex(
+                self.features_by_full_id.values(),
+                self.features_with_one_of,
+                self.machine_index,
+                self.unrestricted_features,
+            )
+        return self._closure_index
+
+    def _full_load(self) -> None:
+        self._closure_index = None
+        self._file_features = {}
+        self._declared = {}
+        self.features_by_full_id = {}
+        self._load_features(self._feature_files)
+        self._rebuild_indexes()
         self._validate_refs()
         self._apply_machine_constraints()
+        self._needs_full_load = False
+        if self._snapshot is not None:
+            self._save_snapshot(self._snapshot)
+
+    def reload(self) -> FeatureReloadResult:
+        """Pick up added, modified and removed feature files.
+
+        Only changed files are parsed. References are canonicalized again
+        for features whose targets may resolve differently, and machine
+        constraints are propagated again for the changed features and
+        everything that depends on them. If a FeatureError is raised the
+        registry is left partially updated and the next reload() parses
+        the whole tree.
+        """
+        old_keys = self._file_keys()
+        self._feature_files = _scan_feature_files(self.features_dir)
+        new_keys = self._file_keys()
+        result = FeatureReloadResult(
+            added=[pathlib.Path(p) for p in new_keys if p not in old_keys],
+            modified=[
+                pathlib.Path(p)
+                for p in new_keys
+                if p in old_keys and old_keys[p] != new_keys[p]
+            ],
+            removed=[pathlib.Path(p) for p in old_keys if p not in new_keys],
+        )
+        if not result.changed and not self._needs_full_load:
+            return result
+        self.digest = _tree_digest(self.features_dir, self._feature_files)
+        self.parse_timings = []
+        self.loaded_from_snapshot = False
+        if self._needs_full_load:
+            self._full_load()
+            result.affected = list(self.features_by_full_id)
+            return result
+        try:
+            result.affected = self._apply_file_changes(result)
+        except FeatureError:
+            self._needs_full_load = True
+            raise
+        if self._snapshot is not None:
+            self._save_snapshot(self._snapshot)
+        return result
+
+    def _file_keys(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            str(path): (stat.st_mtime_ns, stat.st_size)
+            for _, path, stat in self._feature_files
+        }
 
-    # a demo logic,
-    # we need more effective approach to load features
-    def _load_features(self) -> None:
-        for category_dir in sorted(self.features_dir.iterdir()):
-            if not category_dir.is_dir():
-                continue
-            category = category_dir.name.strip()
-            if not category:
+    def _apply_file_changes(self, result: FeatureReloadResult) -> List[str]:
+        self._closure_index = None
+        stale_files = [str(p) for p in result.modified + result.removed]
+        old_ids: Set[str] = set()
+        for path in stale_files:
+            old_ids.update(self._file_features.pop(path, []))
+        old_alias_keys = {
+            key
+            for key, feature in self.long_alias_index.items()
+            if feature.full_id in old_ids
+        }
+        old_leaves = {
+            self.features_by_full_id[full_id].leaf_id for full_id in old_ids
+        }
+        for full_id in old_ids:
+            del self.features_by_full_id[full_id]
+            del self._declared[full_id]
+
+        fresh_files = {str(p) for p in result.added + result.modified}
+        before = set(self.features_by_full_id)
+        self._load_features(
+            [
+                entry
+                for entry in self._feature_files
+                if str(entry[1]) in fresh_files
+            ]
+        )
+        new_ids = set(self.features_by_full_id) - before
+        self._rebuild_indexes()
+
+        # a reference resolves through a full id, a long alias or a leaf id,
+        # so only entries naming one of the touched keys can change
+        touched = old_ids | new_ids | old_alias_keys
+        touched.update(
+            key
+            for key, feature in self.long_alias_index.items()
+            if feature.full_id in new_ids
+        )
+        touched_leaves = old_leaves | {
+            self.features_by_full_id[full_id].leaf_id for full_id in new_ids
+        }
+        revalidate = set(new_ids)
+        for full_id, declared in self._declared.items():
+            if full_id in revalidate:
                 continue
-            for feature_file in sorted(category_dir.iterdir()):
-                if not feature_file.is_file():
-                    continue
-                if feature_file.suffix not in ('.yaml', '.yml'):
-                    continue
-                data = oebuild_util.read_yaml(feature_file)
-                if not isinstance(data, dict):
-                    raise FeatureError(
-                        f'{feature_file} must contain at least one YAML mapping'
-                    )
-                self._parse_feature_file(category, data, feature_file)
+            for entry in self._declared_refs(declared):
+                if entry in touched or entry.split('/')[-1] in touched_leaves:
+                    revalidate.add(full_id)
+                    break
+        self._validate_refs(revalidate)
+
+        affected = self._dependents_closure(revalidate)
+        self._apply_machine_constraints(affected)
+        return sorted(affected)
+
+    @staticmethod
+    def _declared_refs(declared: _DeclaredFeature) -> Iterable[str]:
+        yield from declared.dependencies
+        yield from declared.selects
+        yield from declared.one_of
+        yield from declared.choice
+        if declared.default_one_of:
+            yield declared.default_one_of
+
+    def _dependents_closure(self, full_ids: Set[str]) -> Set[str]:
+        """full_ids plus every feature whose machine set derives from them."""
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for feature in self.features_by_full_id.values():
+            for dep_id in feature.dependencies:
+                dependents[dep_id].append(feature.full_id)
+            if feature.parent_full_id:
+                dependents[feature.parent_full_id].append(feature.full_id)
+        closure = set(full_ids)
+        stack = list(full_ids)
+        while stack:
+            for dependent in dependents.get(stack.pop(), ()):
+                if dependent not in closure:
+                    closure.add(dependent)
+                    stack.append(dependent)
+        return closure
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the lookup indexes in feature file order.
+
+        Keeping file order makes a reloaded registry iterate, list
+        candidates and report errors exactly like a freshly loaded one.
+        """
+        ordered: Dict[str, Feature] = {}
+        for _, feature_file, _ in self._feature_files:
+            for full_id in self._file_features.get(str(feature_file), ()):
+                ordered[full_id] = self.features_by_full_id[full_id]
+        self.features_by_full_id = ordered
+        self.leaf_index = defaultdict(list)
+        self.features_with_one_of = []
+        for feature in ordered.values():
+            self.leaf_index[feature.leaf_id].append(feature)
+            if feature.one_of:
+                self.features_with_one_of.append(feature)
+        self.category_roots = {}
+        self._compute_category_roots()
+        self.long_alias_index = {}
+        self._build_long_alias_index()
+
+    def _snapshot_path(
+        self, cache_dir: Optional[os.PathLike]
+    ) -> Optional[pathlib.Path]:
+        if cache_dir is None:
+            return None
+        key = hashlib.sha256(
+            os.fsencode(self.features_dir.resolve())
+        ).hexdigest()[:16]
+        return pathlib.Path(cache_dir, SNAPSHOT_DIR, f'{key}.pickle')
+
+    def _load_snapshot(self, snapshot_path: pathlib.Path) -> bool:
+        try:
+            with open(snapshot_path, 'rb') as r_f:
+                snapshot = pickle.load(r_f)
+        # a missing, damaged or foreign snapshot only costs a full parse
+        except Exception:  # pylint: disable=broad-except
+            return False
+        if not isinstance(snapshot, dict):
+            return False
+        if snapshot.get('digest') != self.digest:
+            return False
+        for name in self._SNAPSHOT_FIELDS:
+            setattr(self, name, snapshot[name])
+        return True
+
+    def _save_snapshot(self, snapshot_path: pathlib.Path) -> None:
+        snapshot = {'digest': self.digest}
+        for name in self._SNAPSHOT_FIELDS:
+            snapshot[name] = getattr(self, name)
+        try:
+            oebuild_util.write_atomic(
+                snapshot_path,
+                pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        except OSError:
+            # the snapshot is an optimization only
+            return
+
+    def _load_features(
+        self, feature_files: List[Tuple[str, pathlib.Path, os.stat_result]]
+    ) -> None:
+        paths = [feature_file for _, feature_file, _ in feature_files]
+        # results come back in input order, so registration, duplicate id
+        # detection and the first reported error do not depend on scheduling
+        for (category, feature_file, stat), (data, seconds) in zip(
+            feature_files, self._read_feature_files(paths)
+        ):
+            self.parse_timings.append(
+                FeatureParseTiming(feature_file, stat.st_size, seconds)
+            )
+            if not isinstance(data, dict):
+                raise FeatureError(
+                    f'{feature_file} must contain at least one YAML mapping'
+                )
+            feature = self._parse_feature_file(category, data, feature_file)
+            self._file_features[str(feature_file)] = [
+                feature.full_id,
+                *feature.child_full_ids,
+            ]
+
+    def _read_feature_files(
+        self, paths: List[pathlib.Path]
+    ) -> Iterable[Tuple[object, float]]:
+        workers = min(self._jobs, os.cpu_count() or 1)
+        if workers < 2 or len(paths) < PARALLEL_MIN_FILES:
+            return map(_read_feature_file, paths)
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(_read_feature_file, paths, chunksize=chunksize)
+            )
+
+    def slowest_files(self, count: int = 10) -> List[FeatureParseTiming]:
+        """Feature files that took longest to parse during this load."""
+        return sorted(
+            self.parse_timings, key=lambda timing: timing.seconds, reverse=True
+        )[:count]
 
     def _parse_feature_file(
         self,
         category: str,
         data: dict,
         origin: pathlib.Path,
-    ) -> None:
+    ) -> Feature:
         leaf_id = self._normalize_leaf(data.get('id'))
         if not leaf_id:
             raise FeatureError(f'{origin}: missing feature "id" field')
@@ -167,6 +785,7 @@ class FeatureRegistry:
                     f'{origin}: each entry of "sub_feats" must be a mapping'
                 )
             self._parse_sub_feature(feature, sub, origin)
+        return feature
 
     def _parse_sub_feature(
         self, parent: Feature, data: dict, origin: pathlib.Path
@@ -348,9 +967,17 @@ class FeatureRegistry:
                 f'Duplicate feature id detected: {feature.full_id}'
             )
         self.features_by_full_id[feature.full_id] = feature
-        self.leaf_index[feature.leaf_id].append(feature)
-        if feature.one_of:
-            self.features_with_one_of.append(feature)
+        self._declared[feature.full_id] = _DeclaredFeature(
+            dependencies=tuple(feature.dependencies),
+            selects=tuple(feature.selects),
+            one_of=tuple(feature.one_of),
+            choice=tuple(feature.choice),
+            default_one_of=feature.default_one_of,
+            machines=tuple(feature.machines) if feature.machines else None,
+            machine_set=frozenset(feature.machine_set)
+            if feature.machine_set is not None
+            else None,
+        )
 
     def _make_full_id(self, category: str, leaf_id: str) -> str:
         # Apply syntax sugar rule: when category equals leaf_id,
@@ -397,27 +1024,31 @@ class FeatureRegistry:
             )
         alias_map[key] = feature
 
-    def _validate_refs(self) -> None:
+    def _validate_refs(self, full_ids: Optional[Set[str]] = None) -> None:
         for feature in self.features_by_full_id.values():
+            if full_ids is not None and feature.full_id not in full_ids:
+                continue
+            declared = self._declared[feature.full_id]
             feature.dependencies = self._canonicalize_reference_list(
-                feature, feature.dependencies
+                feature, declared.dependencies
             )
             feature.selects = self._canonicalize_reference_list(
-                feature, feature.selects
+                feature, declared.selects
             )
             feature.one_of = self._canonicalize_reference_list(
-                feature, feature.one_of
+                feature, declared.one_of
             )
             feature.choice = self._canonicalize_reference_list(
-                feature, feature.choice
+                feature, declared.choice
+            )
+            feature.default_one_of = (
+                self._canonicalize_ref(feature, declared.default_one_of)
+                if declared.default_one_of
+                else None
             )
-            if feature.default_one_of:
-                feature.default_one_of = self._canonicalize_ref(
-                    feature, feature.default_one_of
-                )
 
     def _canonicalize_reference_list(
-        self, feature: Feature, entries: List[str]
+        self, feature: Feature, entries: Iterable[str]
     ) -> List[str]:
         return [self._canonicalize_ref(feature, entry) for entry in entries]
 
@@ -432,8 +1063,25 @@ class FeatureRegistry:
             ) from err
         return resolved.full_id
 
-    def _apply_machine_constraints(self) -> None:
+    def _apply_machine_constraints(
+        self, full_ids: Optional[Set[str]] = None
+    ) -> None:
         cache: Dict[str, Optional[Set[str]]] = {}
+        if full_ids is not None:
+            # everything outside full_ids keeps its propagated machine set
+            for feature_obj in self.features_by_full_id.values():
+                if feature_obj.full_id not in full_ids:
+                    cache[feature_obj.full_id] = feature_obj.machine_set
+                    continue
+                declared = self._declared[feature_obj.full_id]
+                feature_obj.machines = (
+                    list(declared.machines) if declared.machines else None
+                )
+                feature_obj.machine_set = (
+                    set(declared.machine_set)
+                    if declared.machine_set is not None
+                    else None
+                )
 
         def compute(feature: Feature) -> Optional[Set[str]]:
             if feature.full_id in cache:
@@ -461,7 +1109,11 @@ class FeatureRegistry:
             return result
 
         for feature_obj in list(self.features_by_full_id.values()):
-            compute(feature_obj)
+            if full_ids is None or feature_obj.full_id in full_ids:
+                compute(feature_obj)
+        self.machine_index, self.unrestricted_features = _index_machines(
+            self.features_by_full_id.values()
+        )
 
     def _intersect_machine_sets(
         self, sets: List[Optional[Set[str]]]
@@ -560,6 +1212,21 @@ class FeatureRegistry:
             self.features_by_full_id.values(), key=lambda feat: feat.full_id
         )
 
+    def machine_features(self, machine: str) -> List[Feature]:
+        """Features available on machine, sorted like list_features()."""
+        full_ids = self.unrestricted_features.union(
+            self.machine_index.get(machine.strip().lower(), ())
+        )
+        return [
+            self.features_by_full_id[full_id] for full_id in sorted(full_ids)
+        ]
+
+    def supports_machine(self, full_id: str, machine: str) -> bool:
+        """Whether the feature and all of its parents allow machine."""
+        if full_id in self.unrestricted_features:
+            return True
+        return full_id in self.machine_index.get(machine.strip().lower(), ())
+
 
 class FeatureResolver:
     """Resolves machine-aware dependency trees for features."""
@@ -572,16 +1239,52 @@ class FeatureResolver:
         self.explicit_features: Set[str] = set()
         self._visiting: Set[str] = set()
         self._context_stack: List[tuple[Feature, str]] = []
+        self._closures = registry.closure_index()
+        self._supported_mask = self._closures.machine_mask(self.machine)
+        self._enabled_mask = 0
+        self._explicit_mask = 0
 
     def resolve(self, requested: Iterable[str]) -> ResolutionResult:
-        for identifier in requested or []:
-            feature = self.registry.resolve_id(identifier)
-            self._enable_feature(feature, source='user')
+        return self.resolve_features(
+            self.registry.resolve_id(identifier)
+            for identifier in requested or []
+        )
+
+    def resolve_features(self, features: Iterable[Feature]) -> ResolutionResult:
+        """Like resolve, for features already looked up in the registry."""
+        for feature in features:
+            self._enable_closure(feature, source='user')
         self._resolve_one_of_groups()
         return ResolutionResult(
             features=[self.enabled[full_id] for full_id in self.enabled_order]
         )
 
+    def _enable_closure(self, feature: Feature, source: str) -> None:
+        """Enable feature and everything it pulls in with bitset operations.
+
+        Enabled features are always closed under dependencies, selects and
+        parents, so this enables exactly what _enable_feature would, in the
+        same order. Only when a machine constraint fails does it hand over
+        to _enable_feature, which builds the detailed error trace.
+        """
+        closures = self._closures
+        position = closures.index[feature.full_id]
+        if self._enabled_mask >> position & 1:
+            return
+        closure = closures.enable_closure[position]
+        if closure & ~self._enabled_mask & ~self._supported_mask:
+            self._enable_feature(feature, source)
+            return
+        if source == 'user':
+            self.explicit_features.add(feature.full_id)
+            self._explicit_mask |= 1 << position
+        for member in closures.enable_order(position):
+            if not self._enabled_mask >> member & 1:
+                enabled = closures.features[member]
+                self.enabled[enabled.full_id] = enabled
+                self.enabled_order.append(enabled.full_id)
+        self._enabled_mask |= closure
+
     def _enable_feature(self, feature: Feature, source: str) -> None:
         if feature.full_id in self.enabled:
             return
@@ -594,8 +1297,11 @@ class FeatureResolver:
             self._ensure_machine_support(feature)
             self.enabled[feature.full_id] = feature
             self.enabled_order.append(feature.full_id)
+            position = self._closures.index[feature.full_id]
+            self._enabled_mask |= 1 << position
             if source == 'user':
                 self.explicit_features.add(feature.full_id)
+                self._explicit_mask |= 1 << position
             for dependency in feature.dependencies:
                 dep_feature = self.registry.features_by_full_id[dependency]
                 self._enable_feature(dep_feature, source='dependency')
@@ -620,6 +1326,9 @@ class FeatureResolver:
         raise ResolutionError(f'[Error] Circular dependency detected: {detail}')
 
     def _ensure_machine_support(self, feature: Feature) -> None:
+        if self.registry.supports_machine(feature.full_id, self.machine):
+            return
+        # report the first feature up the parent chain that rejects it
         current = feature
         while current:
             if (
@@ -664,29 +1373,72 @@ class FeatureResolver:
         raise ResolutionError('\n'.join(lines))
 
     def _resolve_one_of_groups(self) -> None:
-        changed = True
-        while changed:
-            changed = False
-            for feature in self.registry.features_with_one_of:
-                if feature.full_id not in self.enabled:
-                    continue
-                if not feature.one_of:
-                    continue
-                selected = [
-                    option
-                    for option in feature.one_of
-                    if self._is_one_of_option_satisfied(option)
-                ]
-                if len(selected) > 1:
-                    self._raise_one_of_conflict(feature, selected)
-                if not selected and feature.default_one_of:
-                    default_id = feature.default_one_of
-                    if default_id not in self.enabled:
-                        default_feature = self.registry.features_by_full_id[
-                            default_id
-                        ]
-                        self._enable_feature(default_feature, source='default')
-                        changed = True
+        """Settle the one_of groups of the enabled features.
+
+        Groups are visited in ``features_with_one_of`` order, in repeated
+        passes, like a loop over all of them until nothing changes, but a
+        group is only queued again once its owner, one of its options or
+        its default gets enabled, so every default enabled costs a visit to
+        the groups it affects instead of another pass over all of them.
+        """
+        closures = self._closures
+        groups = closures.one_of_groups
+        watchers = closures.one_of_watchers
+        # groups after the cursor run in this pass, the others in the next,
+        # ascending ordinals already form a heap. Seeding from the enabled
+        # features instead of testing every group's bit in the mask keeps
+        # this from costing O(groups * features) per resolve.
+        group_of = closures.one_of_group_of
+        current = sorted(
+            group_of[position]
+            for position in map(closures.index.__getitem__, self.enabled)
+            if position in group_of
+        )
+        next_pass: List[int] = []
+        queued = set(current)
+        cursor = -1
+        while current or next_pass:
+            if not current:
+                current, next_pass = next_pass, current
+                cursor = -1
+            ordinal = heapq.heappop(current)
+            queued.discard(ordinal)
+            cursor = ordinal
+            if not self._enabled_mask >> groups[ordinal] & 1:
+                continue
+            feature = closures.features[groups[ordinal]]
+            selected = [
+                option
+                for option in feature.one_of
+                if self._is_one_of_option_satisfied(option)
+            ]
+            if len(selected) > 1:
+                self._raise_one_of_conflict(feature, selected)
+            if selected or not feature.default_one_of:
+                continue
+            default_id = feature.default_one_of
+            if default_id in self.enabled:
+                continue
+            before = self._enabled_mask
+            self._enable_closure(
+                self.registry.features_by_full_id[default_id],
+                source='default',
+            )
+            # enabling its own default alone leaves this group settled
+            changed = self._enabled_mask & ~before
+            default_bit = 1 << closures.index[default_id]
+            while changed:
+                low = changed & -changed
+                changed ^= low
+                for watcher in watchers.get(low.bit_length() - 1, ()):
+                    if watcher in queued or (
+                        watcher == ordinal and low == default_bit
+                    ):
+                        continue
+                    queued.add(watcher)
+                    heapq.heappush(
+                        current if watcher > cursor else next_pass, watcher
+                    )
 
     def _is_one_of_option_satisfied(self, option_full_id: str) -> bool:
         """Whether a one_of option counts as already chosen.
@@ -702,26 +1454,18 @@ class FeatureResolver:
         """
         if option_full_id in self.enabled:
             return True
-        option = self.registry.features_by_full_id.get(option_full_id)
-        if option is None:
+        position = self._closures.index.get(option_full_id)
+        if position is None:
             return False
         return bool(
-            self._selects_closure(option) & self.explicit_features
+            self._closures.select_closure[position] & self._explicit_mask
         )
 
     def _selects_closure(self, feature: Feature) -> Set[str]:
         """Transitive set of full ids reachable via ``selects`` edges."""
-        seen: Set[str] = set()
-        stack = list(feature.selects)
-        while stack:
-            current_id = stack.pop()
-            if current_id in seen:
-                continue
-            seen.add(current_id)
-            current = self.registry.features_by_full_id.get(current_id)
-            if current is not None:
-                stack.extend(current.selects)
-        return seen
+        return self._closures.full_ids(
+            self._closures.select_closure[self._closures.index[feature.full_id]]
+        )
 
     def _raise_one_of_conflict(
         self, feature: Feature, selected: List[str]
@@ -740,3 +1484,119 @@ class FeatureResolver:
             f"[Error] Conflict in feature '{feature.full_id}':\n"
             f"{detail} cannot be enabled together (one_of)."
         )
+
+
+# registry shared by the batch resolution workers of a process pool
+_BATCH_REGISTRY: Optional[FeatureRegistry] = None
+
+
+def _init_batch_worker(registry: FeatureRegistry) -> None:
+    global _BATCH_REGISTRY  # pylint: disable=global-statement
+    _BATCH_REGISTRY = registry
+
+
+def _resolve_batch_entry(
+    key: Tuple[str, Tuple[str, ...]],
+) -> Tuple[Optional[List[str]], Optional[FeatureError]]:
+    """Resolve one batch entry in a worker, features travel back as ids."""
+    machine, requested = key
+    try:
+        result = FeatureResolver(_BATCH_REGISTRY, machine).resolve(requested)
+    except FeatureError as err:
+        return None, err
+    return [feature.full_id for feature in result.features], None
+
+
+class BatchResolver:
+    """Resolves many (machine, requested features) entries against one
+    registry, for build matrices that cross every platform with a set of
+    feature combinations.
+
+    Identifier lookups, the per-machine support masks and the closures are
+    shared by all entries, and entries with the same machine and request
+    are resolved once and share their result. Every entry gets its own
+    result or error, one failing entry does not stop the others.
+    """
+
+    def __init__(self, registry: FeatureRegistry):
+        self.registry = registry
+        self._ids: Dict[str, object] = {}
+        self._results: Dict[
+            Tuple[str, Tuple[str, ...]],
+            Tuple[Optional[ResolutionResult], Optional[FeatureError]],
+        ] = {}
+
+    def resolve(
+        self,
+        entries: Iterable[Tuple[str, Iterable[str]]],
+        jobs: int = 1,
+    ) -> List[BatchEntryResult]:
+        """Resolve entries in order, with up to jobs worker processes."""
+        keys = [
+            (machine.strip(), tuple(requested or ()))
+            for machine, requested in entries
+        ]
+        pending = list(
+            dict.fromkeys(key for key in keys if key not in self._results)
+        )
+        # the pool only pays off for distinct entries, never for repeats
+        workers = min(max(1, jobs or 1), os.cpu_count() or 1, len(pending))
+        if workers < 2 or len(pending) < PARALLEL_MIN_ENTRIES:
+            for key in pending:
+                self._results[key] = self._resolve_one(*key)
+        else:
+            self._resolve_in_pool(pending, workers)
+        return [BatchEntryResult(*key, *self._results[key]) for key in keys]
+
+    def _resolve_one(
+        self, machine: str, requested: Tuple[str, ...]
+    ) -> Tuple[Optional[ResolutionResult], Optional[FeatureError]]:
+        resolver = FeatureResolver(self.registry, machine)
+        try:
+            return (
+                resolver.resolve_features(
+                    self._resolve_id(identifier) for identifier in requested
+                ),
+                None,
+            )
+        except FeatureError as err:
+            # a kept traceback would keep every frame of the failed
+            # resolution alive for the lifetime of the batch
+            return None, err.with_traceback(None)
+
+    def _resolve_id(self, identifier: str) -> Feature:
+        found = self._ids.get(identifier)
+        if found is None:
+            try:
+                found = self.registry.resolve_id(identifier)
+            except FeatureError as err:
+                found = err.with_traceback(None)
+            self._ids[identifier] = found
+        if isinstance(found, FeatureError):
+            raise found
+        return found
+
+    def _resolve_in_pool(
+        self, pending: List[Tuple[str, Tuple[str, ...]]], workers: int
+    ) -> None:
+        # built once here so that workers receive the closures ready to use
+        self.registry.closure_index()
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(self.registry,),
+        ) as executor:
+            outcomes = executor.map(
+                _resolve_batch_entry, pending, chunksize=chunksize
+            )
+            for key, (full_ids, error) in zip(pending, outcomes):
+                result = None
+                if error is None:
+                    result = ResolutionResult(
+                        features=[
+                            self.registry.features_by_full_id[full_id]
+                            for full_id in full_ids
+                        ]
+                    )
+                self._results[key] = (result, error)
@@ -0,0 +1,598 @@
+"""
+Counting, enumerating and sampling the valid feature configurations of a
+machine.
+
+A configuration is a set of features that FeatureResolver enables for some
+request: it is closed under dependencies, selects and parents, holds only
+features the machine supports, and enables at most one option of every
+enabled one_of group, exactly one when the group has a default (or the
+default itself when it is not an option). ``choice`` children are optional
+add-ons and only need their parent. As in FeatureResolver, a one_of option
+also counts as chosen when a requested feature selects it, so besides one
+boolean per feature the clauses carry booleans for the requests that
+matter and for the defaults that fire. Those only have to exist, so a
+configuration counts once however many requests reach it, and every
+configuration carries one request that reproduces it.
+
+The configurations are counted by a DPLL search with unit propagation that
+branches on the feature variables only, splits the remaining clauses into
+independent components and caches the count of every component,
+branching on variables in min-degree elimination order, so a registry
+with hundreds of features is counted without walking the 2^N subsets.
+Enumeration and uniform sampling walk the same search and use the cached
+counts to prune branches without solutions and to weigh the branches
+while sampling.
+"""
+
+from __future__ import annotations
+
+import heapq
+import random
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from oebuild.feature_resolver import Feature, FeatureRegistry
+
+Clause = Tuple[int, ...]
+
+
+@dataclass
+class FeatureConfiguration:
+    # every enabled feature, in registry order
+    features: List[Feature]
+    # full ids whose resolution, in this order, enables exactly them
+    requested: List[str]
+
+
+class _Split(NamedTuple):
+    """Clauses left once some literals are set, split up for counting."""
+
+    count: int
+    # features enabled by the literals set
+    fixed: int
+    # variables no clause mentions any more, either value is valid
+    free: Tuple[int, ...]
+    components: Tuple[frozenset, ...]
+
+
+def _assign(
+    clauses: Iterable[Clause], literals: Iterable[int]
+) -> Optional[Tuple[List[Clause], Set[int]]]:
+    """Set literals true and propagate unit clauses.
+
+    Returns the clauses that are neither satisfied nor decided yet and every
+    literal set true on the way, or None when the assignment contradicts.
+    """
+    true = set(literals)
+    pending = clauses
+    while True:
+        false = {-literal for literal in true}
+        if not true.isdisjoint(false):
+            return None
+        units = set()
+        remaining = []
+        for clause in pending:
+            if not true.isdisjoint(clause):
+                continue
+            if false.isdisjoint(clause):
+                remaining.append(clause)
+                continue
+            rest = tuple(literal for literal in clause if literal not in false)
+            if not rest:
+                return None
+            if len(rest) == 1:
+                units.add(rest[0])
+            else:
+                remaining.append(rest)
+        if not units:
+            return remaining, true
+        true |= units
+        pending = remaining
+
+
+def _variables(clauses: Iterable[Clause]) -> Set[int]:
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def _components(clauses: List[Clause]) -> List[List[Clause]]:
+    """Split clauses into groups that share no variable."""
+    parent: Dict[int, int] = {}
+
+    def find(var: int) -> int:
+        root = var
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[var] != root:
+            parent[var], var = root, parent[var]
+        return root
+
+    for clause in clauses:
+        first = find(abs(clause[0]))
+        for literal in clause[1:]:
+            other = find(abs(literal))
+            if other != first:
+                parent[other] = first
+    groups: Dict[int, List[Clause]] = {}
+    for clause in clauses:
+        groups.setdefault(find(abs(clause[0])), []).append(clause)
+    return list(groups.values())
+
+
+def _elimination_ranks(clauses: Iterable[Clause]) -> Dict[int, int]:
+    """Rank variables by a min-degree elimination of the primal graph.
+
+    Variables eliminated last are the ones that hold the graph together,
+    deciding them first splits the clauses into components soonest.
+    """
+    neighbours: Dict[int, Set[int]] = {}
+    for clause in clauses:
+        variables = {abs(literal) for literal in clause}
+        for var in variables:
+            neighbours.setdefault(var, set()).update(variables)
+    for var, adjacent in neighbours.items():
+        adjacent.discard(var)
+    heap = [(len(adjacent), var) for var, adjacent in neighbours.items()]
+    heapq.heapify(heap)
+    ranks: Dict[int, int] = {}
+    while heap:
+        degree, var = heapq.heappop(heap)
+        if var in ranks or degree != len(neighbours[var]):
+            continue
+        ranks[var] = len(ranks)
+        adjacent = neighbours[var]
+        for other in adjacent:
+            other_adjacent = neighbours[other]
+            other_adjacent.discard(var)
+            other_adjacent.update(adjacent)
+            other_adjacent.discard(other)
+            heapq.heappush(heap, (len(other_adjacent), other))
+    return ranks
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        yield low.bit_length() - 1
+
+
+class FeatureSpace:
+    """Valid feature configurations of one machine.
+
+    ``required`` lists identifiers, resolved like ``-f`` arguments, that
+    every configuration must enable.
+    """
+
+    def __init__(
+        self,
+        registry: FeatureRegistry,
+        machine: str,
+        required: Iterable[str] = (),
+    ):
+        self.registry = registry
+        self.machine = machine.strip()
+        self._closures = registry.closure_index()
+        self._components: Dict[frozenset, Tuple[int, List[_Split]]] = {}
+        self._solutions: Dict[frozenset, Optional[Set[int]]] = {}
+        self._clauses, units = self._build_clauses(
+            [registry.resolve_id(identifier) for identifier in required]
+        )
+        self._clauses.extend((unit,) for unit in units)
+        # only the feature variables are counted, the others stand for the
+        # requests that reach a configuration and only have to exist
+        self._features = set(range(1, len(self._closures.features) + 1))
+        self._top: Optional[_Split] = None
+        assigned = _assign(self._clauses, units)
+        if assigned is not None:
+            rest, true = assigned
+            self._ranks = _elimination_ranks(rest)
+            self._top = self._split(
+                rest, self._features - {abs(lit) for lit in true}, true
+            )
+
+    def _build_clauses(
+        self, required: List[Feature]
+    ) -> Tuple[List[Clause], Set[int]]:
+        closures = self._closures
+        supported = closures.machine_mask(self.machine)
+        self._next_variable = len(closures.features)
+        self._cycles: Dict[int, int] = {}
+        self._chosen_variables: Dict[int, int] = {}
+        # the feature to request for the owner of a fired default, if any
+        self._supports: Dict[int, Optional[int]] = {}
+        clauses: List[Clause] = []
+        units = {closures.index[feature.full_id] + 1 for feature in required}
+        owners = []
+        for position, feature in enumerate(closures.features):
+            var = position + 1
+            if not supported >> position & 1:
+                units.add(-var)
+                continue
+            # pylint: disable=protected-access
+            for succ in closures._enable_edges[position]:
+                if succ != position:
+                    clauses.append((-var, succ + 1))
+            if feature.one_of:
+                owners.append(position)
+        self._request_clauses(owners, supported, clauses)
+        defaults: Dict[int, List[int]] = {}
+        for owner in owners:
+            self._one_of_clauses(owner, clauses, defaults)
+        self._cover_clauses(defaults, clauses)
+        return clauses, units
+
+    def _new_variable(self) -> int:
+        self._next_variable += 1
+        return self._next_variable
+
+    def _options(self, owner: int) -> List[int]:
+        closures = self._closures
+        return sorted(
+            {
+                closures.index[option]
+                for option in closures.features[owner].one_of
+                if option in closures.index
+            }
+        )
+
+    def _selected(self, option: int) -> int:
+        # like FeatureResolver._is_one_of_option_satisfied, an option counts
+        # as chosen when a requested feature is in its selects closure
+        return self._closures.select_closure[option] & ~(1 << option)
+
+    def _request_clauses(
+        self, owners: List[int], supported: int, clauses: List[Clause]
+    ) -> None:
+        """Add a variable for every feature whose being requested matters.
+
+        Only a requested feature in the selects closure of a one_of option
+        changes what FeatureResolver does. Any other feature nothing pulls
+        in can always be requested, so it needs no variable. Of an enable
+        cycle only the first feature requested counts as requested, the
+        rest are enabled already.
+        """
+        relevant = 0
+        for owner in owners:
+            for option in self._options(owner):
+                relevant |= self._selected(option)
+        relevant &= supported
+        self._requested_mask = relevant
+        self._request_variables: Dict[int, int] = {}
+        cycles: Dict[int, List[int]] = {}
+        for position in _bits(relevant):
+            var = self._new_variable()
+            self._request_variables[position] = var
+            clauses.append((-var, position + 1))
+            cycles.setdefault(self._cycle(position), []).append(var)
+        for members in cycles.values():
+            for first, var in enumerate(members):
+                for other in members[first + 1 :]:
+                    clauses.append((-var, -other))
+
+    def _chosen_variable(self, option: int, clauses: List[Clause]) -> int:
+        """Variable true when option is enabled or counts as chosen."""
+        chosen = self._chosen_variables.get(option)
+        if chosen is not None:
+            return chosen
+        requests = [
+            self._request_variables[position]
+            for position in _bits(self._selected(option))
+            if position in self._request_variables
+        ]
+        chosen = option + 1
+        if requests:
+            chosen = self._new_variable()
+            clauses.append((-chosen, option + 1, *requests))
+            clauses.append((-(option + 1), chosen))
+            clauses.extend((-request, chosen) for request in requests)
+        self._chosen_variables[option] = chosen
+        return chosen
+
+    def _one_of_clauses(
+        self, owner: int, clauses: List[Clause], defaults: Dict[int, List[int]]
+    ) -> None:
+        closures = self._closures
+        var = owner + 1
+        options = self._options(owner)
+        chosen = [self._chosen_variable(option, clauses) for option in options]
+        for first, option in enumerate(chosen):
+            for other in chosen[first + 1 :]:
+                clauses.append((-var, -option, -other))
+        default = closures.index.get(
+            closures.features[owner].default_one_of or ''
+        )
+        if default is None:
+            return
+        clauses.append((-var, default + 1, *chosen))
+        cycle = self._cycle(default)
+        if cycle & ~self._requested_mask:
+            return
+        # the default may be enabled by the group alone, which needs the
+        # owner enabled by a request or by a feature the default does not
+        # pull in, and no other option chosen
+        default_closure = closures.enable_closure[default]
+        supporters = []
+        support = None
+        for position, closure in enumerate(closures.enable_closure):
+            if not closure >> owner & 1:
+                continue
+            if not default_closure >> position & 1:
+                supporters.append(position + 1)
+            elif position in self._request_variables:
+                supporters.append(self._request_variables[position])
+            else:
+                # requesting it changes nothing else
+                support = position
+                break
+        if support is None and not supporters:
+            return
+        fired = self._new_variable()
+        self._supports[fired] = support
+        clauses.append((-fired, var))
+        clauses.append((-fired, default + 1))
+        if support is None and default_closure >> owner & 1:
+            clauses.append((-fired, *supporters))
+        for option, chosen_var in zip(options, chosen):
+            if option != default:
+                clauses.append((-fired, -chosen_var))
+        clauses.extend(
+            (-fired, -self._request_variables[position])
+            for position in _bits(self._selected(default))
+            if position in self._request_variables
+        )
+        defaults.setdefault(cycle, []).append(fired)
+
+    def _cover_clauses(
+        self, defaults: Dict[int, List[int]], clauses: List[Clause]
+    ) -> None:
+        """Have every enabled enable cycle that only requests can start
+        requested, pulled in by another enabled feature or a fired default."""
+        closures = self._closures
+        covered = set()
+        for position in _bits(self._requested_mask):
+            cycle = self._cycle(position)
+            if cycle in covered or cycle & ~self._requested_mask:
+                continue
+            covered.add(cycle)
+            pullers = [
+                other + 1
+                for other, closure in enumerate(closures.enable_closure)
+                if not cycle >> other & 1 and closure >> position & 1
+            ]
+            requests = [
+                self._request_variables[member] for member in _bits(cycle)
+            ]
+            clauses.append(
+                (-(position + 1), *pullers, *requests, *defaults.get(cycle, ()))
+            )
+
+    def _cycle(self, position: int) -> int:
+        """Bitset of the features enabled whenever position is and that
+        enable it in turn, its enable cycle; just position when acyclic."""
+        cycle = self._cycles.get(position)
+        if cycle is not None:
+            return cycle
+        closures = self._closures
+        cycle = 0
+        for member in _bits(closures.enable_closure[position]):
+            if closures.enable_closure[member] >> position & 1:
+                cycle |= 1 << member
+        self._cycles[position] = cycle
+        return cycle
+
+    def count(self) -> int:
+        """Number of valid configurations."""
+        return self._top.count if self._top else 0
+
+    def configurations(
+        self, limit: Optional[int] = None
+    ) -> Iterator[FeatureConfiguration]:
+        """Yield valid configurations in a deterministic order."""
+        if limit == 0 or not self.count():
+            return
+        for produced, mask in enumerate(self._iter_split(self._top), 1):
+            yield self._configuration(mask)
+            if limit is not None and produced >= limit:
+                return
+
+    def sample(
+        self, count: int, seed: Optional[int] = None
+    ) -> List[FeatureConfiguration]:
+        """Draw count configurations uniformly at random, with repetition."""
+        if count <= 0 or not self.count():
+            return []
+        rng = random.Random(seed)
+        return [
+            self._configuration(self._sample_split(self._top, rng))
+            for _ in range(count)
+        ]
+
+    def _split(
+        self, clauses: List[Clause], variables: Set[int], true: Set[int]
+    ) -> _Split:
+        free = tuple(sorted(variables - _variables(clauses)))
+        components = tuple(
+            frozenset(component) for component in _components(clauses)
+        )
+        count = 1 << len(free)
+        for component in components:
+            count *= self._component(component)[0]
+            if not count:
+                break
+        fixed = 0
+        for literal in true:
+            if 0 < literal <= len(self._features):
+                fixed |= 1 << (literal - 1)
+        return _Split(count, fixed, free, components)
+
+    def _component(self, clauses: frozenset) -> Tuple[int, List[_Split]]:
+        """Count of a component and its branches that have solutions."""
+        cached = self._components.get(clauses)
+        if cached is not None:
+            return cached
+        variables = _variables(clauses) & self._features
+        if not variables:
+            # only requests are left, they either exist or do not
+            found = self._solve(clauses) is not None
+            cached = (1, [_Split(1, 0, (), ())]) if found else (0, [])
+            self._components[clauses] = cached
+            return cached
+        var = max(variables, key=self._ranks.__getitem__)
+        branches = []
+        # enabling first lists the larger configurations first
+        for literal in (var, -var):
+            assigned = _assign(clauses, (literal,))
+            if assigned is None:
+                continue
+            rest, true = assigned
+            split = self._split(
+                rest, variables - {abs(lit) for lit in true}, true
+            )
+            if split.count:
+                branches.append(split)
+        cached = (sum(split.count for split in branches), branches)
+        self._components[clauses] = cached
+        return cached
+
+    def _solve(self, clauses: Iterable[Clause]) -> Optional[Set[int]]:
+        """Literals that satisfy clauses, None when nothing does."""
+        key = frozenset(clauses)
+        if key in self._solutions:
+            return self._solutions[key]
+        solution: Optional[Set[int]] = set()
+        for component in _components(list(key)):
+            occurrences: Dict[int, int] = {}
+            for clause in component:
+                for literal in clause:
+                    occurrences[abs(literal)] = (
+                        occurrences.get(abs(literal), 0) + 1
+                    )
+            var = max(sorted(occurrences), key=occurrences.__getitem__)
+            found = None
+            # leaving a feature unrequested first keeps the requests small
+            for literal in (-var, var):
+                assigned = _assign(component, (literal,))
+                if assigned is None:
+                    continue
+                rest, true = assigned
+                found = self._solve(rest)
+                if found is not None:
+                    found = found | true
+                    break
+            if found is None:
+                solution = None
+                break
+            solution = solution | found
+        self._solutions[key] = solution
+        return solution
+
+    def _iter_split(self, split: _Split) -> Iterator[int]:
+        parts = [
+            (lambda component=component: self._iter_component(component))
+            for component in split.components
+        ]
+        parts.append(lambda: self._iter_free(split.free))
+        for mask in self._product(parts):
+            yield split.fixed | mask
+
+    def _iter_component(self, clauses: frozenset) -> Iterator[int]:
+        for split in self._component(clauses)[1]:
+            yield from self._iter_split(split)
+
+    @staticmethod
+    def _iter_free(free: Tuple[int, ...]) -> Iterator[int]:
+        for bits in range(1 << len(free)):
+            mask = 0
+            for offset, var in enumerate(free):
+                if bits >> offset & 1:
+                    mask |= 1 << (var - 1)
+            yield mask
+
+    def _product(self, parts) -> Iterator[int]:
+        # itertools.product would materialize every part up front
+        if not parts:
+            yield 0
+            return
+        for head in parts[0]():
+            for tail in self._product(parts[1:]):
+                yield head | tail
+
+    def _sample_split(self, split: _Split, rng: random.Random) -> int:
+        mask = split.fixed
+        for var in split.free:
+            if rng.getrandbits(1):
+                mask |= 1 << (var - 1)
+        for component in split.components:
+            total, branches = self._component(component)
+            pick = rng.randrange(total)
+            for branch in branches:
+                if pick < branch.count:
+                    mask |= self._sample_split(branch, rng)
+                    break
+                pick -= branch.count
+        return mask
+
+    def _configuration(self, mask: int) -> FeatureConfiguration:
+        closures = self._closures
+        positions = [
+            position
+            for position in range(len(closures.features))
+            if mask >> position & 1
+        ]
+        assigned = _assign(
+            self._clauses,
+            [var if mask >> (var - 1) & 1 else -var for var in self._features],
+        )
+        rest, true = assigned
+        true = true | self._solve(rest)
+        requested = {
+            position
+            for position, var in self._request_variables.items()
+            if var in true
+        }
+        requested.update(
+            support
+            for fired, support in self._supports.items()
+            if fired in true and support is not None
+        )
+        # any other enable cycle no enabled feature outside it pulls in is
+        # started by a request, unless it is a fired default
+        pulled = 0
+        for position in positions:
+            pulled |= closures.enable_closure[position] & ~self._cycle(position)
+        started = set()
+        for position in positions:
+            cycle = self._cycle(position)
+            if pulled >> position & 1 or cycle in started:
+                continue
+            started.add(cycle)
+            if any(member in requested for member in _bits(cycle)):
+                continue
+            free = cycle & ~self._requested_mask
+            if free:
+                requested.add((free & -free).bit_length() - 1)
+        # features another request pulls in go first, or they would be
+        # enabled already and not count as requested
+        order = sorted(
+            requested,
+            key=lambda position: (
+                bin(closures.enable_closure[position]).count('1'),
+                position,
+            ),
+        )
+        return FeatureConfiguration(
+            features=[closures.features[position] for position in positions],
+            requested=[
+                closures.features[position].full_id for position in order
+            ],
+        )
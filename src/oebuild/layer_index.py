@@ -0,0 +1,434 @@
+"""
+Index of the layers under the src dir and their dependency graph.
+
+Every ``conf/layer.conf`` one or two levels below the src dir is read for
+BBFILE_COLLECTIONS, LAYERDEPENDS, LAYERVERSION, LAYERSERIES_COMPAT,
+LAYERSERIES_CORENAMES and BBFILE_PRIORITY, deeper layers are read when
+they are asked for by path. Values are not expanded, a value holding a
+``${`` reference is unknown and left to bitbake. The results are cached
+per layer under ``<cache_dir>/layers``, keyed on the file's mtime and
+size, so only changed layers are read again.
+
+``LayerIndex.plan`` checks the layers of compile.yaml the way bitbake
+does after parsing its configuration: missing dependencies are added
+from the index, versions and series are checked, and the new layers are
+ordered after the layers they depend on. Problems are reported before
+bitbake starts instead of after a full parse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import pickle
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import oebuild.util as oebuild_util
+
+LAYER_CACHE_DIR = 'layers'
+LAYER_CONF = os.path.join('conf', 'layer.conf')
+
+_ASSIGNMENT = re.compile(
+    r'^(?:export\s+)?([\w\-.+${}/~]+)(:append|:prepend|:remove)?\s*'
+    r'(\?\?=|\?=|:=|\+=|=\+|\.=|=\.|=)\s*(["\'])(.*)\4\s*$',
+    re.DOTALL,
+)
+_DEPENDENCY = re.compile(r'([^\s()]+)(?:\s*\(([^)]*)\))?')
+_CONSTRAINT = re.compile(r'^\s*(>=|<=|==|=|>|<)?\s*(\S+)\s*$')
+
+
+@dataclass
+class LayerInfo:
+    """What bitbake reads from the layer.conf of one layer."""
+
+    # relative to the src dir
+    path: str
+    collections: List[str] = field(default_factory=list)
+    # (collection, version constraint like '>= 12' or None)
+    depends: List[Tuple[str, Optional[str]]] = field(default_factory=list)
+    version: Optional[str] = None
+    series_compat: List[str] = field(default_factory=list)
+    # set by the core layer, the series the other layers must support
+    core_names: List[str] = field(default_factory=list)
+    priority: Optional[int] = None
+    # the variables left out because their value holds a ${} reference
+    unexpanded: List[str] = field(default_factory=list)
+
+    def version_unknown(self) -> bool:
+        """Whether LAYERVERSION is set to a value that was not expanded."""
+        return self.version is None and any(
+            name.startswith('LAYERVERSION_') for name in self.unexpanded
+        )
+
+
+@dataclass
+class LayerPlan:
+    """Outcome of LayerIndex.plan."""
+
+    # the layers to add, dependencies first
+    layers: List[str] = field(default_factory=list)
+    # added layer -> the layer that needs it
+    added: Dict[str, str] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+def read_layer_conf(conf_path: os.PathLike) -> Dict[str, str]:
+    """
+    the variables a layer.conf assigns, with the assignment operators
+    applied in order. Values are not expanded
+    """
+    with open(conf_path, encoding='utf-8') as r_f:
+        text = r_f.read()
+    variables: Dict[str, str] = {}
+    for line in re.sub(r'\\\n', ' ', text).split('\n'):
+        match = _ASSIGNMENT.match(line.strip())
+        if match is None:
+            continue
+        name, override, op, _, value = match.groups()
+        current = variables.get(name)
+        if override == ':append':
+            variables[name] = (current or '') + value
+        elif override == ':prepend':
+            variables[name] = value + (current or '')
+        elif override == ':remove':
+            if current is not None:
+                removed = set(value.split())
+                variables[name] = ' '.join(
+                    item for item in current.split() if item not in removed
+                )
+        elif op in ('?=', '??='):
+            variables.setdefault(name, value)
+        elif op == '+=':
+            variables[name] = f'{current} {value}' if current else value
+        elif op == '=+':
+            variables[name] = f'{value} {current}' if current else value
+        elif op == '.=':
+            variables[name] = (current or '') + value
+        elif op == '=.':
+            variables[name] = value + (current or '')
+        else:
+            variables[name] = value
+    return variables
+
+
+def parse_layer(path: str, conf_path: os.PathLike) -> LayerInfo:
+    """
+    the LayerInfo of the layer at path, relative to the src dir
+    """
+    variables = read_layer_conf(conf_path)
+    info = LayerInfo(path=path)
+
+    def value(name: str) -> Optional[str]:
+        if '${' in variables.get(name, ''):
+            info.unexpanded.append(name)
+            return None
+        return variables.get(name)
+
+    info.collections = (value('BBFILE_COLLECTIONS') or '').split()
+    for collection in info.collections:
+        for name, constraint in _DEPENDENCY.findall(
+            value(f'LAYERDEPENDS_{collection}') or ''
+        ):
+            info.depends.append((name, constraint.strip() or None))
+        info.series_compat.extend(
+            (value(f'LAYERSERIES_COMPAT_{collection}') or '').split()
+        )
+        if info.version is None:
+            info.version = value(f'LAYERVERSION_{collection}')
+        priority = value(f'BBFILE_PRIORITY_{collection}') or ''
+        if info.priority is None and priority.strip().isdigit():
+            info.priority = int(priority)
+    info.core_names = (value('LAYERSERIES_CORENAMES') or '').split()
+    return info
+
+
+def _version_key(version: str):
+    return tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in re.split(r'[.\-_]', version)
+    )
+
+
+def version_satisfies(version: Optional[str], constraint: str) -> bool:
+    """
+    whether version meets a LAYERDEPENDS constraint like '>= 12'
+    """
+    match = _CONSTRAINT.match(constraint)
+    if match is None or version is None:
+        return False
+    op, wanted = match.group(1) or '=', match.group(2)
+    have, want = _version_key(version), _version_key(wanted)
+    return {
+        '=': have == want,
+        '==': have == want,
+        '>': have > want,
+        '>=': have >= want,
+        '<': have < want,
+        '<=': have <= want,
+    }[op]
+
+
+class LayerIndex:
+    """Layers found under src_dir, parsed once per layer.conf change."""
+
+    def __init__(
+        self, src_dir: os.PathLike, cache_dir: Optional[os.PathLike] = None
+    ):
+        self.src_dir = os.path.realpath(src_dir)
+        self._cache_file = None
+        if cache_dir is not None:
+            digest = hashlib.sha256(
+                self.src_dir.encode('utf-8', 'surrogateescape')
+            ).hexdigest()
+            self._cache_file = pathlib.Path(
+                cache_dir, LAYER_CACHE_DIR, f'{digest}.pickle'
+            )
+        self.layers: Dict[str, LayerInfo] = {}
+        self.by_collection: Dict[str, List[LayerInfo]] = {}
+        self._cached = self._load_cache()
+        self._stored = self._cached
+        # path -> ((st_mtime_ns, st_size), LayerInfo), as cached
+        self._entries: Dict[str, Tuple[Tuple[int, int], LayerInfo]] = {}
+        self._scan()
+
+    def _candidates(self) -> Iterable[str]:
+        try:
+            with os.scandir(self.src_dir) as entries:
+                repos = sorted(e.name for e in entries if e.is_dir())
+        except OSError:
+            return
+        for repo in repos:
+            yield repo
+            repo_dir = os.path.join(self.src_dir, repo)
+            if os.path.isfile(os.path.join(repo_dir, LAYER_CONF)):
+                continue
+            # repositories like poky or meta-openembedded hold the layers
+            try:
+                with os.scandir(repo_dir) as entries:
+                    subdirs = sorted(e.name for e in entries if e.is_dir())
+            except OSError:
+                continue
+            for subdir in subdirs:
+                if not subdir.startswith('.'):
+                    yield f'{repo}/{subdir}'
+
+    def _load_cache(self) -> Dict[str, Tuple[Tuple[int, int], LayerInfo]]:
+        if self._cache_file is None:
+            return {}
+        try:
+            with open(self._cache_file, 'rb') as r_f:
+                cached = pickle.load(r_f)
+            if isinstance(cached, dict):
+                return cached
+        # a damaged or foreign cache only costs a parse
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return {}
+
+    def _store_cache(self):
+        if self._cache_file is None or self._entries == self._stored:
+            return
+        try:
+            oebuild_util.write_atomic(
+                self._cache_file,
+                pickle.dumps(self._entries, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        except OSError:
+            # the cache is an optimization only
+            return
+        self._stored = dict(self._entries)
+
+    def _read(self, path: str) -> Optional[LayerInfo]:
+        """
+        the layer at path, relative to the src dir, reading its layer.conf
+        unless the cache holds it. None if path is no layer
+        """
+        if path in self.layers:
+            return self.layers[path]
+        conf_path = os.path.join(self.src_dir, path, LAYER_CONF)
+        try:
+            stat = os.stat(conf_path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self._cached.get(path)
+        if entry is None or entry[0] != key:
+            try:
+                entry = (key, parse_layer(path, conf_path))
+            except (OSError, UnicodeDecodeError):
+                return None
+        self._entries[path] = entry
+        info = entry[1]
+        self.layers[path] = info
+        for collection in info.collections:
+            self.by_collection.setdefault(collection, []).append(info)
+        return info
+
+    def _scan(self):
+        for path in self._candidates():
+            self._read(path)
+        # layers read by path stay cached while they are unchanged, they
+        # are only indexed when asked for again
+        for path, entry in self._cached.items():
+            if path in self._entries:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.src_dir, path, LAYER_CONF))
+            except OSError:
+                continue
+            if entry[0] == (stat.st_mtime_ns, stat.st_size):
+                self._entries[path] = entry
+        self._store_cache()
+
+    def _provider(self, collection: str) -> Optional[LayerInfo]:
+        providers = self.by_collection.get(collection)
+        # the shortest path wins, sorted input keeps it deterministic
+        if not providers:
+            return None
+        return min(providers, key=lambda info: (len(info.path), info.path))
+
+    def plan(
+        self, requested: Iterable[str], present: Iterable[str] = ()
+    ) -> LayerPlan:
+        """
+        the layers to add for requested, relative to the src dir, when the
+        layers of present are in bblayers.conf already. Missing
+        dependencies are added, a missing layer or dependency is an error
+        and the layers come dependencies first, in requested order
+        otherwise. Version and series mismatches are warnings, bitbake
+        has the final say on them. present may hold layers outside the
+        index, then, like for a layer whose collections are not expanded,
+        a dependency nothing known provides is only a warning
+        """
+        result = LayerPlan()
+        present = [os.path.normpath(path) for path in present]
+        selected: Dict[str, LayerInfo] = {}
+        unknown = []
+        for path in present:
+            info = self._read(path)
+            if info is None:
+                unknown.append(path)
+            else:
+                selected[path] = info
+        new: List[str] = []
+        queue = []
+        for path in requested:
+            path = os.path.normpath(path)
+            if path in selected or path in new:
+                continue
+            info = self._read(path)
+            if info is None:
+                result.errors.append(
+                    f'{path} is not a layer, {LAYER_CONF} not found'
+                )
+                continue
+            new.append(path)
+            queue.append(path)
+            selected[path] = info
+        self._store_cache()
+        unknown.extend(
+            info.path
+            for info in self.layers.values()
+            if 'BBFILE_COLLECTIONS' in info.unexpanded
+        )
+
+        collections = {
+            collection: info
+            for info in selected.values()
+            for collection in info.collections
+        }
+        while queue:
+            info = self.layers[queue.pop(0)]
+            for dependency, _ in info.depends:
+                if dependency in collections:
+                    continue
+                provider = self._provider(dependency)
+                if provider is None:
+                    message = (
+                        f'{info.path} depends on layer {dependency}, '
+                        'which no layer in the src dir provides'
+                    )
+                    if unknown:
+                        result.warnings.append(message)
+                    else:
+                        result.errors.append(message)
+                    # report it once
+                    collections[dependency] = None
+                    continue
+                result.added[provider.path] = info.path
+                new.append(provider.path)
+                queue.append(provider.path)
+                selected[provider.path] = provider
+                for collection in provider.collections:
+                    collections[collection] = provider
+
+        self._check(selected, collections, result)
+        result.layers = self._order(new, selected, collections, result)
+        return result
+
+    @staticmethod
+    def _check(selected, collections, result: LayerPlan):
+        seen: Dict[str, str] = {}
+        for info in selected.values():
+            for collection in info.collections:
+                if collection in seen and seen[collection] != info.path:
+                    result.errors.append(
+                        f'{info.path} and {seen[collection]} both provide '
+                        f'layer {collection}'
+                    )
+                seen.setdefault(collection, info.path)
+        core_names = {
+            name for info in selected.values() for name in info.core_names
+        }
+        for info in selected.values():
+            for dependency, constraint in info.depends:
+                provider = collections.get(dependency)
+                if provider is None or constraint is None:
+                    continue
+                if provider.version_unknown():
+                    continue
+                if not version_satisfies(provider.version, constraint):
+                    result.warnings.append(
+                        f'{info.path} needs layer {dependency} '
+                        f'({constraint}), {provider.path} has version '
+                        f'{provider.version or "unset"}'
+                    )
+            if core_names and info.series_compat:
+                if not core_names.intersection(info.series_compat):
+                    result.warnings.append(
+                        f'{info.path} supports series '
+                        f'{" ".join(info.series_compat)}, the core layer is '
+                        f'{" ".join(sorted(core_names))}'
+                    )
+
+    @staticmethod
+    def _order(new, selected, collections, result: LayerPlan) -> List[str]:
+        rank = {path: index for index, path in enumerate(new)}
+        ordered: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(info: LayerInfo, trail: List[str]):
+            if state.get(info.path) == 2:
+                return
+            if state.get(info.path) == 1:
+                cycle = trail[trail.index(info.path) :] + [info.path]
+                # bitbake copes, the loop is only broken in given order
+                result.warnings.append(
+                    f'layer dependency loop: {" -> ".join(cycle)}'
+                )
+                return
+            state[info.path] = 1
+            for dependency, _ in info.depends:
+                provider = collections.get(dependency)
+                if provider is not None and provider.path in rank:
+                    visit(provider, trail + [info.path])
+            state[info.path] = 2
+            ordered.append(info.path)
+
+        for path in new:
+            visit(selected[path], [])
+        return ordered
@@ -10,13 +10,15 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+import bisect
 import os
 import re
 import sys
+from typing import Dict, List, Optional, Tuple
 
+import oebuild.const as oebuild_const
 import oebuild.util as oebuild_util
 from oebuild.m_log import logger
-import oebuild.const as oebuild_const
 from oebuild.struct import CompileParam
 
 
@@ -81,9 +83,9 @@ def match_and_replace(pre: str, new_str: str, content: str):
     """
     math line in content when the new_str exist and replace
     """
+    pattern = re.compile(f'^({pre})')
     for line in content.split('\n'):
-        ret = re.match(f'^({pre})', line)
-        if ret is None:
+        if pattern.match(line) is None:
             continue
         return content.replace(line, new_str)
 
@@ -93,6 +95,163 @@ def match_and_replace(pre: str, new_str: str, content: str):
     return content
 
 
+# NAME[flag] op value, NAME may carry overrides like DISTRO_FEATURES:append
+_ASSIGNMENT = re.compile(
+    r'^(?:export\s+)?([\w\-.+${}/~]+(?::[\w\-.+${}/~]+)*)'
+    r'(\[[^\]]*\])?\s*(\?\?=|\?=|:=|\+=|=\+|\.=|=\.|=)\s*(.*)$'
+)
+
+
+class LocalConfModel:
+    """
+    local.conf as an ordered list of lines with an index of the assigned
+    variables and of the line texts, so lookups and edits never scan the
+    file. Comments, blank lines and continued values are kept as they
+    are, and text() returns the file unchanged until it is edited
+    """
+
+    def __init__(self, content: str = ''):
+        # a replaced multi-line assignment leaves None for its other lines
+        self._lines: List[Optional[str]] = ['']
+        # variable name -> indexes of the lines assigning it, in order
+        self._names: Dict[str, List[int]] = {}
+        # line text without surrounding spaces -> indexes of its lines
+        self._texts: Dict[str, Dict[int, None]] = {}
+        # the variable each line assigns, None for any other line
+        self._assigns: List[Optional[str]] = [None]
+        self._index(0)
+        self.add(content)
+
+    def _unindex(self, index: int):
+        line = self._lines[index]
+        del self._texts[line.strip(' ')][index]
+        name = self._assigns[index]
+        if name is not None:
+            self._names[name].remove(index)
+            self._assigns[index] = None
+
+    def _index(self, index: int):
+        line = self._lines[index]
+        self._texts.setdefault(line.strip(' '), {})[index] = None
+        previous = index - 1
+        while previous >= 0 and self._lines[previous] is None:
+            previous -= 1
+        if previous >= 0 and self._lines[previous].endswith('\\'):
+            # continuation of the value above
+            return
+        match = _ASSIGNMENT.match(line.lstrip(' '))
+        if match is not None:
+            name = match.group(1)
+            self._assigns[index] = name
+            bisect.insort(self._names.setdefault(name, []), index)
+
+    def _last(self) -> int:
+        last = len(self._lines) - 1
+        while self._lines[last] is None:
+            last -= 1
+        return last
+
+    def add(self, content: str):
+        """
+        append content to the file, like adding it to the file text
+        """
+        parts = content.split('\n')
+        last = self._last()
+        self._unindex(last)
+        self._lines[last] += parts[0]
+        self._index(last)
+        for part in parts[1:]:
+            self._lines.append(part)
+            self._assigns.append(None)
+            self._index(len(self._lines) - 1)
+
+    def has_line(self, line: str) -> bool:
+        """
+        whether a line of the file holds line, surrounding spaces ignored
+        """
+        return bool(self._texts.get(line.strip(' ')))
+
+    def _parse(self, index: int):
+        match = _ASSIGNMENT.match(self._lines[index].lstrip(' '))
+        return match.group(3), match.group(4)
+
+    def get(self, name: str) -> Optional[Tuple[str, str]]:
+        """
+        the operator and raw value of the last assignment of name, None
+        when the file does not assign it
+        """
+        indexes = self._names.get(name)
+        if not indexes:
+            return None
+        return self._parse(indexes[-1])
+
+    def _replace(self, index: int, line: str):
+        self._unindex(index)
+        self._lines[index] = line
+        self._index(index)
+
+    def _replace_assignment(self, index: int, line: str):
+        # the continuation lines of the old value go with it
+        continued = self._lines[index].endswith('\\')
+        following = index + 1
+        while continued and following < len(self._lines):
+            if self._lines[following] is not None:
+                continued = self._lines[following].endswith('\\')
+                self._unindex(following)
+                self._lines[following] = None
+            following += 1
+        self._replace(index, line)
+
+    def set(self, name: str, value: str, op: str = '=') -> bool:
+        """
+        replace the last assignment of name, whatever its operator, with
+        `name op "value"`, appending one when there is none. Returns whether
+        the file changed, setting a value twice changes it once
+        """
+        line = f'{name} {op} "{value}"'
+        indexes = self._names.get(name)
+        if indexes:
+            if self._lines[indexes[-1]] == line:
+                return False
+            self._replace_assignment(indexes[-1], line)
+            return True
+        if self._lines[self._last()] != '':
+            self.add('\n')
+        self.add(f'{line}\n')
+        return True
+
+    def comment_out(self, line: str, commented: str) -> bool:
+        """
+        replace every line holding line with commented, only that line and
+        not the rest of a continued value. Returns whether one was found
+        """
+        indexes = list(self._texts.get(line.strip(' '), ()))
+        for index in indexes:
+            self._replace(index, commented)
+        return bool(indexes)
+
+    def strip_indent(self):
+        """
+        remove the spaces at the beginning of every line, local.conf lines
+        must not start with one
+        """
+        for index, line in enumerate(self._lines):
+            if line is None or not line.startswith(' '):
+                continue
+            self._unindex(index)
+            self._lines[index] = line.lstrip(' ')
+            self._index(index)
+
+    def text(self) -> str:
+        return '\n'.join(line for line in self._lines if line is not None)
+
+    def write(self, path) -> bool:
+        """
+        write the file atomically when it changed, return whether it did
+        """
+        return oebuild_util.write_if_changed(path, self.text())
+
+
 class LocalConf:
     """
     LocalConf corresponds to the local.conf configuration
@@ -105,78 +264,77 @@ class LocalConf:
             raise ValueError(f'{local_conf_path} not exists')
 
         with open(local_conf_path, 'r', encoding='utf-8') as r_f:
-            self.content = r_f.read()
+            self.model = LocalConfModel(r_f.read())
 
-    def __del__(self):
-        # The local file specifies that each line cannot start with a space.
-        # Therefore, after each modification to the local file, the spaces at
-        # the beginning of lines that start with spaces are removed.
-        os.system(rf"sed -i 's/^ \+//' {self.local_path}")
+    @property
+    def content(self) -> str:
+        """
+        the local.conf text with the changes made so far
+        """
+        return self.model.text()
 
-    def update(self, compile_param: CompileParam, src_dir=None):
+    def update(self, compile_param: CompileParam, src_dir=None) -> bool:
         """
-        update local.conf by ParseCompile
+        update local.conf by ParseCompile, return whether the file changed
         """
-        pre_content = self._deal_other_local_param(
+        for name, value in self._deal_other_local_param(
             compile_param=compile_param, src_dir=src_dir
-        )
+        ):
+            self.model.set(name, value)
 
-        compile_param.local_conf = f'{pre_content}\n{compile_param.local_conf}'
-        self._add_content_to_local_conf(local_conf=compile_param.local_conf)
+        return self._add_content_to_local_conf(
+            local_conf=compile_param.local_conf
+        )
 
     def _deal_llvm_toolchain_dir(self, compile_param: CompileParam):
         # replace llvm toolchain
-        if compile_param.llvm_toolchain_dir is not None:
-            if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
-                # check if exists TXTERNAL_TOOLCHAIN_GCC, replace it or replace TXTERNAL_TOOLCHAIN
-                replace_toolchain_str = f'''
-{oebuild_const.EXTERNAL_LLVM} = "{oebuild_const.NATIVE_LLVM_MAP}"'''
-            else:
-                replace_toolchain_str = f'''
-{oebuild_const.EXTERNAL_LLVM} = "{compile_param.llvm_toolchain_dir}"'''
-            return replace_toolchain_str
-        return ''
+        if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
+            return oebuild_const.EXTERNAL_LLVM, oebuild_const.NATIVE_LLVM_MAP
+        return oebuild_const.EXTERNAL_LLVM, compile_param.llvm_toolchain_dir
 
     def _deal_cache_src_dir(self, compile_param: CompileParam):
-        if compile_param.cache_src_dir is not None:
-            if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
-                # check if exists cache_src_dir, map it to build environment
-                replace_cache_src_str = f'''
-{oebuild_const.CACHE_SRC_DIR} = "{oebuild_const.CACHE_SRC_DIR_MAP}"'''
-            else:
-                replace_cache_src_str = f'''
-{oebuild_const.CACHE_SRC_DIR} = "{compile_param.cache_src_dir}"'''
-            return replace_cache_src_str
-        return ''
+        if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
+            # map cache_src_dir to build environment
+            return oebuild_const.CACHE_SRC_DIR, oebuild_const.CACHE_SRC_DIR_MAP
+        return oebuild_const.CACHE_SRC_DIR, compile_param.cache_src_dir
 
     def _deal_sstate_mirrors(self, compile_param: CompileParam):
         # replace sstate_cache
-        if compile_param.sstate_mirrors is not None:
-            if os.path.islink(compile_param.sstate_mirrors):
-                new_str = f'file://.* {compile_param.sstate_mirrors}/PATH;downloadfilename=PATH'
-            else:
-                if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
-                    new_str = f'file://.* file://{oebuild_const.SSTATE_MIRRORS_MAP}/PATH'
-                else:
-                    new_str = (
-                        f'file://.* file://{compile_param.sstate_mirrors}/PATH'
-                    )
-            return f'{oebuild_const.SSTATE_MIRRORS} = "{new_str}"'
-        return ''
+        if os.path.islink(compile_param.sstate_mirrors):
+            new_str = (
+                f'file://.* {compile_param.sstate_mirrors}'
+                '/PATH;downloadfilename=PATH'
+            )
+        elif compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
+            new_str = (
+                f'file://.* file://{oebuild_const.SSTATE_MIRRORS_MAP}/PATH'
+            )
+        else:
+            new_str = f'file://.* file://{compile_param.sstate_mirrors}/PATH'
+        return oebuild_const.SSTATE_MIRRORS, new_str
 
-    def _deal_other_local_param(self, compile_param: CompileParam, src_dir):
-        pre_content = ''
+    def _deal_other_local_param(
+        self, compile_param: CompileParam, src_dir
+    ) -> List[Tuple[str, str]]:
+        """
+        the variables oebuild sets in local.conf, in the order they are set
+        """
+        assignments = []
         # add MACHINE
         if compile_param.machine is not None:
-            pre_content += f'MACHINE = "{compile_param.machine}"\n'
+            assignments.append(('MACHINE', compile_param.machine))
 
-        pre_content = self._deal_toolchain_replace(compile_param, pre_content)
+        if compile_param.toolchain_dir is not None:
+            assignments.append(self._deal_toolchain_replace(compile_param))
 
-        pre_content += self._deal_llvm_toolchain_dir(compile_param) + '\n'
+        if compile_param.llvm_toolchain_dir is not None:
+            assignments.append(self._deal_llvm_toolchain_dir(compile_param))
 
-        pre_content += self._deal_cache_src_dir(compile_param) + '\n'
+        if compile_param.cache_src_dir is not None:
+            assignments.append(self._deal_cache_src_dir(compile_param))
 
-        pre_content += self._deal_sstate_mirrors(compile_param) + '\n'
+        if compile_param.sstate_mirrors is not None:
+            assignments.append(self._deal_sstate_mirrors(compile_param))
 
         # replace nativesdk OPENEULER_SP_DIR
         if compile_param.build_in == oebuild_const.BUILD_IN_HOST:
@@ -190,94 +348,58 @@ class LocalConf:
                 compile_param.nativesdk_dir, nativesdk_sysroot
             )
 
-            pre_content += (
-                f'{oebuild_const.NATIVESDK_DIR_NAME} = "{nativesdk_sys_dir}"\n'
+            assignments.append(
+                (oebuild_const.NATIVESDK_DIR_NAME, nativesdk_sys_dir)
             )
-            pre_content += f'{oebuild_const.OPENEULER_SP_DIR} = "{src_dir}"\n'
+            assignments.append((oebuild_const.OPENEULER_SP_DIR, src_dir))
 
         # replace sstate_dir
         if compile_param.sstate_dir is not None:
-            pre_content += (
-                f'{oebuild_const.SSTATE_DIR} = "{compile_param.sstate_dir}"\n'
+            assignments.append(
+                (oebuild_const.SSTATE_DIR, compile_param.sstate_dir)
             )
 
         # replace tmpdir
         if compile_param.tmp_dir is not None:
-            pre_content += (
-                f'{oebuild_const.TMP_DIR} = "{compile_param.tmp_dir}"\n'
-            )
+            assignments.append((oebuild_const.TMP_DIR, compile_param.tmp_dir))
 
-        return pre_content
+        return assignments
 
-    def _deal_toolchain_replace(
-        self, compile_param: CompileParam, pre_content
-    ):
+    def _deal_toolchain_replace(self, compile_param: CompileParam):
         # The newly added external compiler chain is named EXTERNAL_TOOLCHAIN_GCC, however,
         # the old version still uses EXTERNAL_TOOLCHAIN. Therefore, to maintain compatibility
         # with both new and old versions, we have made the following adjustment:
         # If EXTERNAL_TOOLCHAIN_GCC exists in the original configuration file, replace
         # EXTERNAL_TOOLCHAIN with EXTERNAL_TOOLCHAIN_GCC.
-        if compile_param.toolchain_dir is not None:
-            if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
-                # check if exists TXTERNAL_TOOLCHAIN_GCC, replace it or replace TXTERNAL_TOOLCHAIN
-                if (
-                    len(
-                        re.findall(
-                            f'^({oebuild_const.EXTERNAL_GCC})*', self.content
-                        )
-                    )
-                    > 0
-                ):
-                    toolchain_type = compile_param.toolchain_type.replace(
-                        oebuild_const.EXTERNAL, oebuild_const.EXTERNAL_GCC
-                    )
-                    replace_toolchain_str = f'''
-{toolchain_type} = "{oebuild_const.NATIVE_GCC_MAP}"'''
-                else:
-                    replace_toolchain_str = f'''
-{compile_param.toolchain_type} = "{oebuild_const.NATIVE_GCC_MAP}"'''
-            else:
-                if (
-                    len(
-                        re.findall(
-                            f'^({oebuild_const.EXTERNAL_GCC})*', self.content
-                        )
-                    )
-                    > 0
-                ):
-                    toolchain_type = compile_param.toolchain_type.replace(
-                        oebuild_const.EXTERNAL, oebuild_const.EXTERNAL_GCC
-                    )
-                    replace_toolchain_str = f'''
-{toolchain_type} = "{compile_param.toolchain_dir}"'''
-                else:
-                    replace_toolchain_str = f'''
-{compile_param.toolchain_type} = "{compile_param.toolchain_dir}"'''
-            pre_content += replace_toolchain_str + '\n'
-
-        return pre_content
+        toolchain_type = compile_param.toolchain_type.replace(
+            oebuild_const.EXTERNAL, oebuild_const.EXTERNAL_GCC
+        )
+        if compile_param.build_in == oebuild_const.BUILD_IN_DOCKER:
+            return toolchain_type, oebuild_const.NATIVE_GCC_MAP
+        return toolchain_type, compile_param.toolchain_dir
 
     def _add_content_to_local_conf(self, local_conf):
         user_content_flag = (
             '#===========the content is user added=================='
         )
         if (
-            user_content_flag not in self.content
+            not self.model.has_line(user_content_flag)
             and local_conf is not None
             and local_conf != ''
         ):
             # check if exists remark sysmbol, if exists and replace it
-            self.content += f'\n{user_content_flag}\n'
+            self.model.add(f'\n{user_content_flag}\n')
             for line in local_conf.split('\n'):
                 if line.startswith('#'):
-                    r_line = line.lstrip('#').strip(' ')
-                    self.content = self.content.replace(r_line, line)
+                    self.model.comment_out(line.lstrip('#').strip(' '), line)
                 if line.strip(' ') == 'None':
                     continue
-                self.content += line + '\n'
+                self.model.add(line + '\n')
 
-        with open(self.local_path, 'w', encoding='utf-8') as r_f:
-            r_f.write(self.content)
+        # The local file specifies that each line cannot start with a space,
+        # so the spaces at the beginning of lines are removed.
+        self.model.strip_indent()
+        return self.model.write(self.local_path)
 
     def check_nativesdk_valid(self, nativesdk_dir):
         """
@@ -10,28 +10,35 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+import functools
 import os
-
-import git
-from git.repo import Repo
-from git import GitCommandError, RemoteProgress
+import re
 
 from oebuild.m_log import logger
 
+# GitPython is imported inside the methods that talk to a repository: it costs
+# tens of milliseconds to load and most oebuild commands never touch git
+
+_COMMIT_ID = re.compile(r'[0-9a-f]{7,64}')
+_CONFIG_SECTION = re.compile(r'\s*\[\s*(\w+)')
+_CONFIG_URL = re.compile(r'\s*url\s*=\s*(.*?)\s*$', re.IGNORECASE)
+
 
 class OGit:
     """
     owner git to print progress in clone action
     """
 
-    def __init__(self, repo_dir, remote_url, branch=None) -> None:
+    def __init__(
+        self, repo_dir, remote_url, branch=None, progress=True
+    ) -> None:
         self._repo_dir = repo_dir
         self._remote_url = remote_url
         self._branch = branch
-        try:
-            _, self._screen_width = os.popen('stty size', 'r').read().split()
-        except ValueError as v_e:
-            logger.warning(str(v_e))
+        # progress lines of parallel fetches would overwrite each other
+        self._progress = progress
+        # why the last fetch or checkout failed
+        self.error = None
 
     @property
     def repo_dir(self):
@@ -58,19 +65,52 @@ class OGit:
         """
         check out version
         """
+        if self.is_at_version(version):
+            self.error = None
+            logger.info('%s is already at %s', self._repo_dir, version)
+            return True
         return self._fetch_upstream(version=version)
 
+    def is_at_version(self, version):
+        """
+        whether the repo is already checked out at the commit id version
+        from one of its remotes matching remote_url. Only reads files under
+        .git, so it is cheap enough to run before every fetch. Branch and
+        tag names may have moved upstream, they always need a fetch
+        """
+        if not version or not _COMMIT_ID.fullmatch(version):
+            return False
+        git_dir = os.path.join(self._repo_dir, '.git')
+        try:
+            head = _read_head(git_dir)
+            if head is None or not head.startswith(version):
+                return False
+            return any(
+                _same_remote(url, self._remote_url)
+                for url in _read_remote_urls(git_dir)
+            )
+        except (OSError, UnicodeDecodeError):
+            return False
+
     def clone_or_pull_repo(self):
         """
         clone or pull git repo
         """
-        self._fetch_upstream()
+        return self._fetch_upstream()
 
     def _fetch_upstream(self, version=None):
-        repo = Repo.init(self._repo_dir)
+        # pylint: disable=C0415
+        import git
+        from git import GitCommandError
+
+        def progress():
+            return _custom_remote_class()() if self._progress else None
+
+        self.error = None
+        repo = git.Repo.init(self._repo_dir)
         remote = None
         for item in repo.remotes:
-            if self._remote_url.rstrip('.git') == item.url.rstrip('.git'):
+            if _same_remote(self._remote_url, item.url):
                 remote = item
             else:
                 continue
@@ -82,16 +122,18 @@ class OGit:
         logger.info('Fetching into %s ...', self._repo_dir)
         try:
             if version is None:
-                remote.fetch(self._branch, progress=CustomRemote(), depth=1)
+                remote.fetch(self._branch, progress=progress(), depth=1)
             else:
                 repo.commit(version)
         except ValueError:
             try:
-                remote.fetch(version, progress=CustomRemote(), depth=1)
-            except GitCommandError:
+                remote.fetch(version, progress=progress(), depth=1)
+            except GitCommandError as g_e:
+                self.error = f'fetch failed: {g_e.stderr.strip()}'
                 logger.error('fetch failed')
                 return False
-        except GitCommandError:
+        except GitCommandError as g_e:
+            self.error = f'fetch failed: {g_e.stderr.strip()}'
             logger.error('fetch failed')
             return False
 
@@ -100,7 +142,8 @@ class OGit:
                 repo.git.checkout(self._branch)
             else:
                 repo.git.checkout(version)
-        except GitCommandError:
+        except GitCommandError as g_e:
+            self.error = f'checkout failed: {g_e.stderr.strip()}'
             logger.error('update faild')
             return False
         logger.info('Fetching into %s successful\n', self._repo_dir)
@@ -111,8 +154,10 @@ class OGit:
         """
         return git repo info: remote_url, branch
         """
+        import git  # pylint: disable=C0415
+
         try:
-            repo = Repo(repo_dir)
+            repo = git.Repo(repo_dir)
             remote_url = repo.remote().url
             branch = repo.active_branch.name
             return remote_url, branch
@@ -124,16 +169,86 @@ class OGit:
             return '', ''
 
 
-class CustomRemote(git.RemoteProgress):
+def _same_remote(url_a, url_b):
+    def normalize(url):
+        url = url.rstrip('/')
+        return url[: -len('.git')] if url.endswith('.git') else url
+
+    return normalize(url_a) == normalize(url_b)
+
+
+def _read_head(git_dir):
+    """
+    the commit id HEAD points at, resolving one level of symbolic ref
+    through loose and packed refs, or None
+    """
+    with open(os.path.join(git_dir, 'HEAD'), encoding='utf-8') as r_f:
+        head = r_f.read().strip()
+    if not head.startswith('ref: '):
+        return head
+    ref = head[len('ref: ') :]
+    try:
+        with open(os.path.join(git_dir, ref), encoding='utf-8') as r_f:
+            return r_f.read().strip()
+    except FileNotFoundError:
+        pass
+    try:
+        with open(
+            os.path.join(git_dir, 'packed-refs'), encoding='utf-8'
+        ) as r_f:
+            for line in r_f:
+                commit_id, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return commit_id
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _read_remote_urls(git_dir):
+    """
+    the urls of the remotes in .git/config
+    """
+    urls = []
+    in_remote = False
+    with open(os.path.join(git_dir, 'config'), encoding='utf-8') as r_f:
+        for line in r_f:
+            section = _CONFIG_SECTION.match(line)
+            if section is not None:
+                in_remote = section.group(1).lower() == 'remote'
+                continue
+            url = _CONFIG_URL.match(line) if in_remote else None
+            if url is not None:
+                urls.append(url.group(1).strip('"'))
+    return urls
+
+
+@functools.lru_cache(maxsize=None)
+def _custom_remote_class():
     """
-    Rewrote RemoteProgress to show the process of code updates
+    build CustomRemote on first use, its base class lives in GitPython
     """
+    from git import RemoteProgress  # pylint: disable=C0415
 
-    def update(self, op_code, cur_count, max_count=None, message=''):
+    class CustomRemote(RemoteProgress):
         """
-        rewrote update function
+        Rewrote RemoteProgress to show the process of code updates
         """
-        end_str = '\r'
-        if op_code & 2 == RemoteProgress.END:
-            end_str = '\r\n'
-        print(self._cur_line, end=end_str)
+
+        def update(self, op_code, cur_count, max_count=None, message=''):
+            """
+            rewrote update function
+            """
+            end_str = '\r'
+            if op_code & 2 == RemoteProgress.END:
+                end_str = '\r\n'
+            print(self._cur_line, end=end_str)
+
+    return CustomRemote
+
+
+def __getattr__(name):
+    # keep `from oebuild.ogit import CustomRemote` working
+    if name == 'CustomRemote':
+        return _custom_remote_class()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -10,17 +10,21 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
 import logging
 import sys
 from dataclasses import dataclass
-from typing import Optional, Any, Dict
+from typing import TYPE_CHECKING, Optional, Any, Dict
 import pathlib
 import os
 
-from ruamel.yaml.scalarstring import LiteralScalarString
-
 import oebuild.util as oebuild_util
 import oebuild.const as oebuild_const
+from oebuild.template_cache import read_template
+
+if TYPE_CHECKING:
+    from ruamel.yaml.scalarstring import LiteralScalarString
 
 
 @dataclass
@@ -110,13 +114,17 @@ class ParseTemplate:
         will append to feature_template anywhere, the feature_template adding must after
         board_templiate, else throw exception
         """
+        from ruamel.yaml.scalarstring import (  # pylint: disable=C0415
+            LiteralScalarString,
+        )
+
         if not isinstance(config_dir, pathlib.Path):
             config_dir = pathlib.Path(config_dir)
         if not os.path.exists(config_dir):
             raise ConfigPathNotExists(f'{config_dir} is not exists')
 
         try:
-            data = oebuild_util.read_yaml(config_dir)
+            data = read_template(config_dir)
             repo_list = None
             if 'repos' in data:
                 repo_list = self.parse_repos_list(data['repos'])
@@ -220,6 +228,10 @@ class ParseTemplate:
             compile_dir: str = None,
             cache_src_dir: str = None
         """
+        from ruamel.yaml.scalarstring import (  # pylint: disable=C0415
+            LiteralScalarString,
+        )
+
         # first param common yaml
         if self.platform_template is None:
             raise PlatformNotAdd('please set platform template first')
@@ -411,12 +423,16 @@ def parse_repos_layers_local_obj(common_yaml_path):
     """
     parse from yaml to repos, layers and local
     """
+    from ruamel.yaml.scalarstring import (  # pylint: disable=C0415
+        LiteralScalarString,
+    )
+
     if not os.path.exists(common_yaml_path):
         logging.error(
             'can not find .oebuild/common.yaml in yocto-meta-openeuler'
         )
         sys.exit(-1)
-    data = oebuild_util.read_yaml(common_yaml_path)
+    data = read_template(common_yaml_path)
 
     repos = []
     if 'repos' in data:
@@ -0,0 +1,118 @@
+"""
+Parallel fetch of the repositories pinned in manifest.yaml.
+
+Every repository is fetched and checked out by its own OGit on a bounded
+thread pool. Fetches are network bound, so threads overlap them well; a
+semaphore per remote host keeps a large manifest from opening more
+connections to one server than it tolerates. Results come back in the
+order of the tasks, whatever order the fetches finish in, so failures are
+always reported the same way.
+"""
+
+from __future__ import annotations
+
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+MAX_FETCH_WORKERS = 8
+MAX_FETCHES_PER_HOST = 4
+
+
+@dataclass
+class FetchTask:
+    """One repository to fetch and check out at a version."""
+
+    name: str
+    repo_dir: str
+    remote_url: str
+    version: Optional[str] = None
+
+
+@dataclass
+class FetchResult:
+    """The outcome of a FetchTask, error is None on success."""
+
+    name: str
+    remote_url: str
+    version: Optional[str]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the repository is at the requested version."""
+        return self.error is None
+
+
+def remote_host(remote_url: str) -> str:
+    """
+    the host a remote url connects to, '' for local paths and file:// urls.
+    Understands url and scp-like (git@host:path) remotes
+    """
+    parsed = urllib.parse.urlsplit(remote_url)
+    if parsed.scheme == 'file':
+        return ''
+    if parsed.scheme and parsed.netloc:
+        return (parsed.hostname or '').lower()
+    if '://' not in remote_url and ':' in remote_url.split('/', 1)[0]:
+        return remote_url.split(':', 1)[0].rsplit('@', 1)[-1].lower()
+    return ''
+
+
+def fetch_repo(task: FetchTask, progress: bool = True) -> FetchResult:
+    """
+    fetch one repository and check out its version, or its remote's
+    default branch if it has none
+    """
+    from oebuild.ogit import OGit  # pylint: disable=C0415
+
+    repo_git = OGit(
+        repo_dir=task.repo_dir,
+        remote_url=task.remote_url,
+        branch=None,
+        progress=progress,
+    )
+    try:
+        if task.version is None:
+            ok = repo_git.clone_or_pull_repo()
+        else:
+            ok = repo_git.check_out_version(version=task.version)
+    # one broken repository must not abort the others
+    except Exception as e:  # pylint: disable=broad-except
+        return FetchResult(
+            task.name, task.remote_url, task.version, str(e) or repr(e)
+        )
+    error = None if ok else repo_git.error or 'fetch failed'
+    return FetchResult(task.name, task.remote_url, task.version, error)
+
+
+def fetch_repos(
+    tasks: List[FetchTask],
+    jobs: int = MAX_FETCH_WORKERS,
+    per_host: int = MAX_FETCHES_PER_HOST,
+) -> List[FetchResult]:
+    """
+    fetch all tasks with up to jobs at a time and up to per_host against
+    one remote host, return their results in task order
+    """
+    if not tasks:
+        return []
+    jobs = max(1, min(jobs, len(tasks)))
+    if jobs == 1:
+        return [fetch_repo(task) for task in tasks]
+
+    # created up front, so no two threads race to add the same host
+    host_slots: Dict[str, threading.BoundedSemaphore] = {
+        host: threading.BoundedSemaphore(max(1, per_host))
+        for host in {remote_host(task.remote_url) for task in tasks}
+    }
+
+    def run(task: FetchTask) -> FetchResult:
+        with host_slots[remote_host(task.remote_url)]:
+            # progress lines of concurrent fetches would garble each other
+            return fetch_repo(task, progress=False)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run, tasks))
@@ -0,0 +1,193 @@
+"""
+On-disk cache of feature resolution results.
+
+A result is stored under a key derived from the feature tree digest (see
+``feature_tree_digest``, which covers the features directory and the
+content of its feature files), the machine and the normalized request, so
+a hit is valid as long as no feature file changed and can be served
+without loading the registry. Entries are evicted least recently used first once
+the cache grows past ``max_bytes``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import pickle
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import oebuild.util as oebuild_util
+from oebuild.feature_resolver import ResolutionResult
+
+RESOLUTION_CACHE_DIR = 'resolutions'
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+_SUFFIX = '.pickle'
+
+
+@dataclass
+class ResolutionCacheEntry:
+    key: str
+    digest: str
+    machine: str
+    requested: Tuple[str, ...]
+    features: List[str]
+    size: int
+    last_used_ns: int
+
+
+def normalize_request(
+    machine: str, requested: Iterable[str]
+) -> Tuple[str, Tuple[str, ...]]:
+    """Machine and request as the resolver sees them.
+
+    Identifiers are matched case-insensitively; repeating one does not
+    change the result, but the order does, so it is kept.
+    """
+    normalized = dict.fromkeys(entry.strip().lower() for entry in requested)
+    return machine.strip().lower(), tuple(normalized)
+
+
+class ResolutionCache:
+    """Resolution results pickled under <cache_dir>/resolutions."""
+
+    def __init__(
+        self, cache_dir: os.PathLike, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.cache_path = pathlib.Path(cache_dir, RESOLUTION_CACHE_DIR)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(digest: str, machine: str, requested: Iterable[str]) -> str:
+        machine, requested = normalize_request(machine, requested)
+        payload = '\0'.join((digest, machine, *requested))
+        return hashlib.sha256(
+            payload.encode('utf-8', 'surrogateescape')
+        ).hexdigest()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self.cache_path / f'{key}{_SUFFIX}'
+
+    def get(
+        self, digest: str, machine: str, requested: Iterable[str]
+    ) -> Optional[ResolutionResult]:
+        """The cached result, or None when missing or unreadable."""
+        path = self._entry_path(self.make_key(digest, machine, requested))
+        try:
+            with open(path, 'rb') as r_f:
+                record = pickle.load(r_f)
+            result = record['result']
+        # a damaged or foreign entry only costs a resolution
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if not isinstance(result, ResolutionResult):
+            return None
+        try:
+            # the mtime is the last use, eviction drops the oldest first
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(
+        self,
+        digest: str,
+        machine: str,
+        requested: Iterable[str],
+        result: ResolutionResult,
+    ) -> None:
+        requested = list(requested)
+        key = self.make_key(digest, machine, requested)
+        norm_machine, norm_requested = normalize_request(machine, requested)
+        record = {
+            'digest': digest,
+            'machine': norm_machine,
+            'requested': norm_requested,
+            'result': result,
+        }
+        try:
+            oebuild_util.write_atomic(
+                self._entry_path(key),
+                pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        except OSError:
+            # the cache is an optimization only
+            return
+        self.evict(keep=key)
+
+    def _stats(self) -> List[Tuple[pathlib.Path, os.stat_result]]:
+        try:
+            with os.scandir(self.cache_path) as entries:
+                paths = [
+                    pathlib.Path(entry.path)
+                    for entry in entries
+                    if entry.name.endswith(_SUFFIX)
+                ]
+        except OSError:
+            return []
+        stats = []
+        for path in paths:
+            try:
+                stats.append((path, path.stat()))
+            except OSError:
+                continue
+        # most recently used first
+        stats.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+        return stats
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Drop least recently used entries until the cache fits in
+        max_bytes, never the entry of ``keep``. Returns the number of
+        entries removed."""
+        total = 0
+        removed = 0
+        for path, stat in self._stats():
+            total += stat.st_size
+            if total <= self.max_bytes or path.stem == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def entries(self) -> List[ResolutionCacheEntry]:
+        """Readable entries, most recently used first."""
+        result = []
+        for path, stat in self._stats():
+            try:
+                with open(path, 'rb') as r_f:
+                    record = pickle.load(r_f)
+                features = [
+                    feature.full_id for feature in record['result'].features
+                ]
+                entry = ResolutionCacheEntry(
+                    key=path.stem,
+                    digest=record['digest'],
+                    machine=record['machine'],
+                    requested=tuple(record['requested']),
+                    features=features,
+                    size=stat.st_size,
+                    last_used_ns=stat.st_mtime_ns,
+                )
+            except Exception:  # pylint: disable=broad-except
+                continue
+            result.append(entry)
+        return result
+
+    def size(self) -> int:
+        return sum(stat.st_size for _, stat in self._stats())
+
+    def clear(self) -> int:
+        """Remove every entry, return how many were removed."""
+        removed = 0
+        for path, _ in self._stats():
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            removed += 1
+        return removed
@@ -11,9 +11,14 @@ See the Mulan PSL v2 for more details.
 """
 
 import importlib.util
+import json
 import os
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import oebuild.util as oebuild_util
+from oebuild.version import __version__
 
 
 class CommandError(RuntimeError):
@@ -44,8 +49,14 @@ class _CmdFactory:
     py_file: str
     name: str
     attr: str
+    _cmd_class: type = field(default=None, init=False, repr=False)
 
     def __call__(self):
+        # The module is executed only once per factory, repeated calls
+        # return the class loaded the first time.
+        if self._cmd_class is not None:
+            return self._cmd_class
+
         # Append the python file's directory to sys.path. This lets
         # its code import helper modules in a natural way.
         py_dir = os.path.dirname(self.py_file)
@@ -62,7 +73,8 @@ class _CmdFactory:
 
         # Get the attribute which provides the OebuildCommand subclass.
         try:
-            return getattr(mod, self.attr)
+            self._cmd_class = getattr(mod, self.attr)
+            return self._cmd_class
         except AttributeError as a_e:
             raise ExtensionCommandError(
                 hint=f'no attribute {self.attr} in {self.py_file}'
@@ -105,9 +117,126 @@ class _ExtCommand:
     alias: str = None
 
 
-def get_spec(pre_dir, command_ext: _ExtCommand):
+class CommandManifest:
     """
-    xxx
+    CommandManifest records the name, alias, help and description of every
+    extension command in a json file, each entry is keyed on the plugin
+    file's path, mtime and size, so building the top level parser does not
+    need to import any plugin module until one of them changes. The plugin
+    lists of plugins.yaml files are kept the same way, so a warm start
+    parses no YAML at all
+    """
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self._entries: Dict[str, dict] = {}
+        self._used: Dict[str, dict] = {}
+        # plugins.yaml path -> {'stat': ..., 'plugins': [...]}
+        self._plugin_files: Dict[str, dict] = {}
+        self._used_plugin_files: Dict[str, dict] = {}
+        self._dirty = False
+        try:
+            with open(manifest_path, encoding='utf-8') as r_f:
+                data = json.load(r_f)
+            if data.get('version') == __version__:
+                self._entries = data.get('commands', {})
+                self._plugin_files = data.get('plugin_files', {})
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+            self._plugin_files = {}
+
+    @staticmethod
+    def _file_key(py_file):
+        try:
+            stat = os.stat(py_file)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def lookup(self, command_ext: _ExtCommand, py_file) -> Optional[dict]:
+        """
+        return the cached entry for command_ext, None if it is missing or
+        the plugin file has changed since it was recorded
+        """
+        entry = self._entries.get(command_ext.name)
+        if entry is None:
+            return None
+        if (
+            entry.get('path') != py_file
+            or entry.get('class') != command_ext.class_name
+            or entry.get('alias') != command_ext.alias
+            or entry.get('stat') != self._file_key(py_file)
+        ):
+            return None
+        self._used[command_ext.name] = entry
+        return entry
+
+    def plugins(self, yaml_path) -> list:
+        """
+        the plugins list of a plugins.yaml file, parsed only when the file
+        changed since it was recorded
+        """
+        yaml_path = os.path.abspath(yaml_path)
+        stat = self._file_key(yaml_path)
+        entry = self._plugin_files.get(yaml_path)
+        if entry is None or entry.get('stat') != stat:
+            data = oebuild_util.read_yaml_safe(yaml_path)
+            # an empty append_plugins.yaml adds nothing
+            plugins = data['plugins'] if data else []
+            entry = {'stat': stat, 'plugins': plugins}
+            self._dirty = True
+        self._used_plugin_files[yaml_path] = entry
+        return entry['plugins']
+
+    def record(self, command_ext: _ExtCommand, py_file, help_msg, description):
+        """
+        record a freshly imported command, it will be written by save()
+        """
+        entry = {
+            'path': py_file,
+            'class': command_ext.class_name,
+            'alias': command_ext.alias,
+            'stat': self._file_key(py_file),
+            'help': help_msg,
+            'description': description,
+        }
+        self._used[command_ext.name] = entry
+        self._dirty = True
+        return entry
+
+    def save(self):
+        """
+        write the manifest back if any entry was added, changed or removed,
+        the cache is an optimization only so write failures are ignored
+        """
+        if (
+            not self._dirty
+            and self._used.keys() == self._entries.keys()
+            and self._used_plugin_files.keys() == self._plugin_files.keys()
+        ):
+            return
+        manifest = {
+            'version': __version__,
+            'commands': self._used,
+            'plugin_files': self._used_plugin_files,
+        }
+        try:
+            oebuild_util.write_atomic(
+                self.manifest_path, json.dumps(manifest).encode('utf-8')
+            )
+        except OSError:
+            return
+        self._entries = dict(self._used)
+        self._plugin_files = dict(self._used_plugin_files)
+        self._dirty = False
+
+
+def get_spec(
+    pre_dir, command_ext: _ExtCommand, manifest: CommandManifest = None
+):
+    """
+    return the OebuildExtCommandSpec of command_ext, the plugin module is
+    only imported when manifest has no valid entry for it
     """
 
     py_file = (
@@ -119,10 +248,24 @@ def get_spec(pre_dir, command_ext: _ExtCommand):
         py_file=py_file, name=command_ext.name, attr=command_ext.class_name
     )
 
+    entry = None
+    if manifest is not None:
+        entry = manifest.lookup(command_ext, py_file)
+    if entry is None:
+        cmd_class = factory()
+        entry = {
+            'help': cmd_class.help_msg,
+            'description': cmd_class.description,
+        }
+        if manifest is not None:
+            manifest.record(
+                command_ext, py_file, entry['help'], entry['description']
+            )
+
     return OebuildExtCommandSpec(
         name=command_ext.name,
-        description=factory().description,
-        help=factory().help_msg,
+        description=entry['description'],
+        help=entry['help'],
         alias=command_ext.alias,
         factory=factory,
     )
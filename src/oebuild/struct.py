@@ -10,9 +10,13 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
 from dataclasses import dataclass
-from typing import Optional
-from ruamel.yaml.scalarstring import LiteralScalarString
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from ruamel.yaml.scalarstring import LiteralScalarString
 
 
 @dataclass
@@ -0,0 +1,108 @@
+"""
+Cache of parsed platform and common.yaml templates.
+
+Templates are keyed by their absolute path and validated against the
+file's mtime and size. A hit in the process returns a copy of the parsed
+data; the first read in a process loads the pickled data from the cache
+dir instead of parsing YAML, and only a changed or new file is parsed.
+Every template file has one entry, so the cache never grows past the
+number of templates.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import pathlib
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+import oebuild.util as oebuild_util
+
+TEMPLATE_CACHE_DIR = 'templates'
+_SUFFIX = '.pickle'
+_MISSING = object()
+
+
+class TemplateCache:
+    """Parsed templates in process and pickled under
+    <cache_dir>/templates."""
+
+    def __init__(self, cache_dir: Optional[os.PathLike] = None):
+        self.cache_path = (
+            None
+            if cache_dir is None
+            else pathlib.Path(cache_dir, TEMPLATE_CACHE_DIR)
+        )
+        # abspath -> ((st_mtime_ns, st_size), data)
+        self._loaded: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+    def _entry_path(self, path: str) -> pathlib.Path:
+        key = hashlib.sha256(path.encode('utf-8', 'surrogateescape'))
+        return self.cache_path / f'{key.hexdigest()}{_SUFFIX}'
+
+    def _load_entry(self, path: str, stat_key: Tuple[int, int]):
+        try:
+            with open(self._entry_path(path), 'rb') as r_f:
+                record = pickle.load(r_f)
+            if record['path'] == path and record['stat'] == stat_key:
+                return record['data']
+        # a damaged or foreign entry only costs a parse
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return _MISSING
+
+    def _store_entry(self, path: str, stat_key: Tuple[int, int], data):
+        record = {'path': path, 'stat': stat_key, 'data': data}
+        try:
+            oebuild_util.write_atomic(
+                self._entry_path(path),
+                pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+        except OSError:
+            # the cache is an optimization only
+            pass
+
+    def read(self, template_path: os.PathLike) -> Any:
+        """
+        the parsed template, like oebuild_util.read_yaml_safe returns it.
+        Every call returns its own copy, so callers may modify it
+        """
+        path = os.path.abspath(template_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError as f_e:
+            raise ValueError(f'yaml_dir can not find in :{path}') from f_e
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._loaded.get(path)
+        if cached is None or cached[0] != stat_key:
+            data = _MISSING
+            if self.cache_path is not None:
+                data = self._load_entry(path, stat_key)
+            if data is _MISSING:
+                data = oebuild_util.read_yaml_safe(path)
+                if self.cache_path is not None:
+                    self._store_entry(path, stat_key, data)
+            cached = (stat_key, data)
+            self._loaded[path] = cached
+        return copy.deepcopy(cached[1])
+
+    def clear(self) -> None:
+        """Forget the templates loaded in this process."""
+        self._loaded.clear()
+
+
+_TEMPLATE_CACHES: Dict[str, TemplateCache] = {}
+
+
+def read_template(template_path: os.PathLike) -> Any:
+    """
+    read a platform or common.yaml template through the template cache of
+    the current oebuild cache dir
+    """
+    cache_dir = oebuild_util.get_cache_dir()
+    cache = _TEMPLATE_CACHES.get(cache_dir)
+    if cache is None:
+        cache = _TEMPLATE_CACHES[cache_dir] = TemplateCache(cache_dir)
+    return cache.read(template_path)
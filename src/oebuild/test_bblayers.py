@@ -0,0 +1,118 @@
+"""Unit tests for writing bblayers.conf."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import oebuild.bb.utils as bb_utils
+import oebuild.bblayers as oebuild_bblayers
+from oebuild.bblayers import BBLayers
+
+BBLAYERS_CONF = """\
+BBLAYERS ?= " \\
+  /src/yocto-poky/meta \\
+  "
+"""
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class BBLayersTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        (self.base / 'meta-openeuler' / 'conf').mkdir(parents=True)
+        (self.base / 'meta-openeuler' / 'conf' / 'layer.conf').write_text('')
+        self.path = self.base / 'bblayers.conf'
+        self.path.write_text(BBLAYERS_CONF)
+        env = mock.patch.dict(
+            os.environ, {'OEBUILD_CACHE_DIR': str(self.base / 'cache')}
+        )
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(oebuild_bblayers._BBLAYERS_CACHE.clear)
+
+    def _add(self, *layers):
+        """add layers, return whether the file changed and how often it
+        was parsed and edited"""
+        with mock.patch.object(
+            bb_utils, 'read_bblayers_conf', wraps=bb_utils.read_bblayers_conf
+        ) as parse, mock.patch.object(
+            bb_utils, 'edit_bblayers_conf', wraps=bb_utils.edit_bblayers_conf
+        ) as edit:
+            changed = BBLayers(str(self.path), str(self.base)).add_layer(
+                '/src', list(layers)
+            )
+        return changed, parse.call_count, edit.call_count
+
+    def test_layer_is_added_once(self):
+        bblayers = BBLayers(str(self.path), str(self.base))
+        self.assertTrue(bblayers.add_layer('/src', 'meta-openeuler'))
+        self.assertIn('/src/meta-openeuler', self.path.read_text())
+        stamp = _stamp(self.path)
+        self.assertFalse(bblayers.add_layer('/src', 'meta-openeuler'))
+        self.assertEqual(_stamp(self.path), stamp)
+
+    def test_unchanged_layers_skip_parsing_and_editing(self):
+        self.assertEqual(self._add('meta-openeuler'), (True, 2, 1))
+        self.assertEqual(self._add('meta-openeuler'), (False, 0, 0))
+        # a new process finds the parsed layers in the cache dir
+        oebuild_bblayers._BBLAYERS_CACHE.clear()
+        self.assertEqual(self._add('meta-openeuler'), (False, 0, 0))
+        self.assertEqual(
+            BBLayers(str(self.path), str(self.base)).layers(),
+            ['/src/yocto-poky/meta', '/src/meta-openeuler'],
+        )
+
+    def test_edited_file_is_parsed_again(self):
+        self._add('meta-openeuler')
+        self.path.write_text(BBLAYERS_CONF)
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self._add('meta-openeuler'), (True, 2, 1))
+
+    def test_remove_layers(self):
+        bblayers = BBLayers(str(self.path), str(self.base))
+        self.assertFalse(bblayers.update_layers(remove='/src/meta-x*'))
+        self.assertTrue(bblayers.update_layers(remove='/src/yocto-poky/*'))
+        self.assertEqual(bblayers.layers(), [])
+
+    def test_missing_layer_in_a_list_is_rejected(self):
+        # list inputs were never checked before, only a single string was
+        bblayers = BBLayers(str(self.path), str(self.base))
+        with self.assertRaisesRegex(ValueError, 'meta-missing'):
+            bblayers.add_layer('/src', ['meta-missing'])
+        self.assertEqual(self.path.read_text(), BBLAYERS_CONF)
+
+    def test_bad_layers_are_reported_together(self):
+        (self.base / 'meta-empty').mkdir()
+        with self.assertRaises(ValueError) as ctx:
+            self._add('meta-missing', 'meta-openeuler', 'meta-empty')
+        self.assertIn('meta-missing', str(ctx.exception))
+        self.assertIn('meta-empty', str(ctx.exception))
+        self.assertNotIn('meta-openeuler', str(ctx.exception))
+        self.assertEqual(self.path.read_text(), BBLAYERS_CONF)
+
+    def test_check_layer_exist_names_every_bad_layer(self):
+        (self.base / 'meta-empty').mkdir()
+        bblayers = BBLayers(str(self.path), str(self.base))
+        bblayers.check_layer_exist('meta-openeuler')
+        with self.assertRaises(ValueError) as ctx:
+            bblayers.check_layer_exist(
+                ['meta-missing', 'meta-openeuler', 'meta-empty']
+            )
+        self.assertEqual(
+            str(ctx.exception),
+            'layer does not exists: meta-missing; '
+            'invalid layer, no conf/layer.conf: meta-empty',
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Unit tests for the per-process workspace cache behind oebuild.configure."""
+
+import os
+import pathlib
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+import oebuild.util as oebuild_util
+from oebuild.configure import WORKSPACE_CONTEXT, Configure
+
+REGISTRY = 'swr.cn-north-4.myhuaweicloud.com/openeuler-embedded'
+
+CONFIG_BODY = """
+docker:
+  repo_url: {registry}/openeuler-container
+  tag_map:
+    master: latest
+basic_repo:
+  yocto_meta_openeuler:
+    path: {path}
+    remote_url: https://gitee.com/openeuler/yocto-meta-openeuler.git
+    branch: master
+"""
+
+
+class WorkspaceContextTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.topdir = os.path.realpath(workspace.name)
+        self.config_path = pathlib.Path(self.topdir, '.oebuild', 'config')
+        self.config_path.parent.mkdir()
+        self._write_config('yocto-meta-openeuler')
+        self.build_dir = pathlib.Path(self.topdir, 'build', 'qemu')
+        self.build_dir.mkdir(parents=True)
+
+        cwd = os.getcwd()
+        os.chdir(self.build_dir)
+        self.addCleanup(os.chdir, cwd)
+        WORKSPACE_CONTEXT.invalidate()
+        self.addCleanup(WORKSPACE_CONTEXT.invalidate)
+
+        patcher = mock.patch.object(
+            oebuild_util, 'read_yaml', wraps=oebuild_util.read_yaml
+        )
+        self.read_yaml = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_config(self, path):
+        self.config_path.write_text(
+            textwrap.dedent(CONFIG_BODY.format(registry=REGISTRY, path=path))
+        )
+
+    def test_topdir_is_found_from_nested_dir(self):
+        self.assertEqual(Configure.oebuild_topdir(), self.topdir)
+        self.assertEqual(Configure.oebuild_topdir(self.build_dir), self.topdir)
+
+    def test_config_is_parsed_once(self):
+        yocto_dir = os.path.join(self.topdir, 'src', 'yocto-meta-openeuler')
+        for _ in range(5):
+            self.assertEqual(Configure.source_yocto_dir(), yocto_dir)
+            Configure.yocto_manifest_dir()
+            Configure.parse_oebuild_config()
+        self.assertEqual(self.read_yaml.call_count, 1)
+
+    def test_config_change_is_picked_up(self):
+        Configure.source_yocto_dir()
+        self._write_config('yocto-meta-openeuler-new')
+        stat = self.config_path.stat()
+        os.utime(
+            self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)
+        )
+        self.assertEqual(
+            Configure.source_yocto_dir(),
+            os.path.join(self.topdir, 'src', 'yocto-meta-openeuler-new'),
+        )
+        self.assertEqual(self.read_yaml.call_count, 2)
+
+    def test_parsed_config_is_not_shared(self):
+        config = Configure.parse_oebuild_config()
+        config.docker.tag_map['master'] = 'changed'
+        self.assertEqual(
+            Configure.parse_oebuild_config().docker.tag_map['master'],
+            'latest',
+        )
+
+    def test_update_config_refreshes_cache(self):
+        config = Configure.parse_oebuild_config()
+        config.basic_repo['yocto_meta_openeuler'].branch = 'openEuler-24.03'
+        self.assertTrue(Configure.update_oebuild_config(config))
+        self.assertEqual(
+            Configure.parse_oebuild_config()
+            .basic_repo['yocto_meta_openeuler']
+            .branch,
+            'openEuler-24.03',
+        )
+
+    def test_removed_workspace_is_not_served_from_cache(self):
+        Configure.oebuild_topdir()
+        self.config_path.unlink()
+        self.assertFalse(Configure.is_oebuild_dir(self.build_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+"""Unit tests for counting, enumerating and sampling feature configurations."""
+
+import itertools
+import pathlib
+import random
+import tempfile
+import textwrap
+import unittest
+
+from oebuild.feature_resolver import (
+    FeatureRegistry,
+    FeatureResolver,
+    ResolutionError,
+)
+from oebuild.feature_space import FeatureSpace
+
+
+def _write(features_dir: pathlib.Path, category: str, name: str, body: str):
+    cat_dir = features_dir / category
+    cat_dir.mkdir(parents=True, exist_ok=True)
+    (cat_dir / f'{name}.yaml').write_text(textwrap.dedent(body))
+
+
+class FeatureSpaceTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.features_dir = pathlib.Path(workspace.name) / 'features'
+        _write(
+            self.features_dir,
+            'os',
+            'kernel',
+            """
+            id: kernel
+            one_of: [os/rt, os/std]
+            default_one_of: os/std
+            """,
+        )
+        _write(self.features_dir, 'os', 'rt', 'id: rt\n')
+        _write(self.features_dir, 'os', 'std', 'id: std\n')
+        _write(
+            self.features_dir,
+            'bsp',
+            'gpu',
+            """
+            id: gpu
+            machines: [raspberrypi4-64]
+            dependencies: [os/kernel]
+            sub_feats:
+              - id: vulkan
+            """,
+        )
+        _write(self.features_dir, 'app', 'web', 'id: web\n')
+
+    def _space(self, machine='qemu-aarch64', required=()):
+        return FeatureSpace(
+            FeatureRegistry(self.features_dir), machine, required
+        )
+
+    @staticmethod
+    def _ids(config):
+        return sorted(feature.full_id for feature in config.features)
+
+    def _assert_resolvable(self, space, configs):
+        for config in configs:
+            result = FeatureResolver(space.registry, space.machine).resolve(
+                config.requested
+            )
+            self.assertEqual(
+                sorted(feature.full_id for feature in result.features),
+                self._ids(config),
+            )
+
+    def test_count_matches_enumeration(self):
+        space = self._space()
+        configs = list(space.configurations())
+        # kernel off: rt and std free (4); kernel on: rt or std (2); web x2
+        self.assertEqual(space.count(), 12)
+        self.assertEqual(len(configs), 12)
+        self.assertEqual(
+            len({tuple(self._ids(config)) for config in configs}), 12
+        )
+        self._assert_resolvable(space, configs)
+        self.assertNotIn(
+            ['os/kernel'], [self._ids(config) for config in configs]
+        )
+
+    def test_machine_constraints_follow_parents(self):
+        space = self._space('raspberrypi4-64')
+        # gpu pulls in the kernel, vulkan pulls in gpu: 2 * (4 + 2 + 2 + 2)
+        self.assertEqual(space.count(), 20)
+        self._assert_resolvable(space, space.configurations())
+
+    def test_required_features_and_limit(self):
+        space = self._space('raspberrypi4-64', ['gpu'])
+        configs = list(space.configurations(limit=3))
+        self.assertEqual(space.count(), 8)
+        self.assertEqual(len(configs), 3)
+        for config in configs:
+            self.assertIn('bsp/gpu', self._ids(config))
+        self.assertEqual(self._space(required=['gpu']).count(), 0)
+        self.assertEqual(self._space(required=['gpu']).sample(3), [])
+
+    def test_legacy_selects_rule_is_respected(self):
+        # requesting rt directly counts as choosing mode/realtime
+        _write(
+            self.features_dir,
+            'mode',
+            'realtime',
+            'id: realtime\nselects: [os/rt]\n',
+        )
+        _write(
+            self.features_dir,
+            'mode',
+            'mode',
+            """
+            id: mode
+            one_of: [mode/realtime, mode/plain]
+            """,
+        )
+        _write(self.features_dir, 'mode', 'plain', 'id: plain\n')
+        space = self._space()
+        configs = list(space.configurations())
+        self.assertEqual(len(configs), space.count())
+        self._assert_resolvable(space, configs)
+        for config in configs:
+            ids = self._ids(config)
+            self.assertFalse(
+                {'mode', 'mode/plain', 'os/rt'} <= set(ids)
+                and 'mode/realtime' not in ids
+                and 'os/rt' in config.requested
+            )
+
+    def test_sample_is_seeded_and_valid(self):
+        space = self._space()
+        valid = {tuple(self._ids(config)) for config in space.configurations()}
+        samples = space.sample(50, seed=7)
+        self.assertEqual(len(samples), 50)
+        self.assertEqual(
+            [self._ids(config) for config in samples],
+            [self._ids(config) for config in space.sample(50, seed=7)],
+        )
+        for config in samples:
+            self.assertIn(tuple(self._ids(config)), valid)
+
+    def test_scales_to_hundreds_of_features(self):
+        for category in range(20):
+            _write(
+                self.features_dir,
+                f'cat{category}',
+                f'cat{category}',
+                f'id: cat{category}\n',
+            )
+            for leaf in range(15):
+                deps = [f'cat{category}']
+                if leaf % 5 == 0 and category:
+                    deps.append(f'cat{category - 1}/feat{leaf + 1}')
+                _write(
+                    self.features_dir,
+                    f'cat{category}',
+                    f'feat{leaf}',
+                    f'id: feat{leaf}\ndependencies: [{", ".join(deps)}]\n',
+                )
+        space = self._space()
+        self.assertGreater(len(space.registry.features_by_full_id), 300)
+        # far too many to walk one by one
+        self.assertGreater(space.count(), 2**200)
+        self._assert_resolvable(space, space.sample(5, seed=1))
+
+    def test_default_enabled_features_are_not_requested(self):
+        # plain comes in as the default of mode, so lowlatency, which
+        # selects it, is no chosen option and can be enabled alongside
+        _write(
+            self.features_dir,
+            'mode',
+            'mode',
+            """
+            id: mode
+            one_of: [mode/plain, mode/lowlatency]
+            default_one_of: mode/plain
+            """,
+        )
+        _write(self.features_dir, 'mode', 'plain', 'id: plain\n')
+        _write(
+            self.features_dir,
+            'mode',
+            'lowlatency',
+            'id: lowlatency\nselects: [mode/plain]\n',
+        )
+        space = self._space()
+        configs = {
+            tuple(self._ids(config)): config
+            for config in space.configurations()
+        }
+        self.assertEqual(len(configs), space.count())
+        self.assertEqual(configs[('mode', 'mode/plain')].requested, ['mode'])
+        self._assert_resolvable(space, configs.values())
+
+
+class FeatureSpaceBruteForceTest(unittest.TestCase):
+    """Compare with resolving every request on small random trees."""
+
+    FEATURES = 5
+    TREES = 40
+
+    def _random_tree(self, features_dir: pathlib.Path, rng: random.Random):
+        ids = [
+            f'c{rng.randrange(2)}/f{index}' for index in range(self.FEATURES)
+        ]
+        for index, full_id in enumerate(ids):
+            others = [other for other in ids if other != full_id]
+            lines = [f'id: {full_id.split("/")[1]}']
+            # the registry rejects dependency cycles, not select cycles
+            if index and rng.random() < 0.35:
+                lines.append(f'dependencies: [{rng.choice(ids[:index])}]')
+            if rng.random() < 0.35:
+                lines.append(f'selects: [{rng.choice(others)}]')
+            if rng.random() < 0.35:
+                options = rng.sample(others, rng.randint(2, 3))
+                lines.append(f'one_of: [{", ".join(options)}]')
+                if rng.random() < 0.7:
+                    lines.append(f'default_one_of: {rng.choice(options)}')
+            category, name = full_id.split('/')
+            _write(features_dir, category, name, '\n'.join(lines) + '\n')
+
+    @staticmethod
+    def _reachable(registry, machine):
+        reachable = set()
+        full_ids = list(registry.features_by_full_id)
+        for size in range(len(full_ids) + 1):
+            for subset in itertools.combinations(full_ids, size):
+                # the order decides which requests count as explicit
+                for requested in itertools.permutations(subset):
+                    try:
+                        result = FeatureResolver(registry, machine).resolve(
+                            requested
+                        )
+                    except ResolutionError:
+                        continue
+                    reachable.add(
+                        frozenset(
+                            feature.full_id for feature in result.features
+                        )
+                    )
+        return reachable
+
+    def test_configurations_match_resolving_every_request(self):
+        for seed in range(self.TREES):
+            with self.subTest(seed=seed), tempfile.TemporaryDirectory() as tmp:
+                features_dir = pathlib.Path(tmp)
+                self._random_tree(features_dir, random.Random(seed))
+                registry = FeatureRegistry(features_dir)
+                space = FeatureSpace(registry, 'qemu-aarch64')
+                configs = list(space.configurations())
+                found = {
+                    frozenset(feature.full_id for feature in config.features)
+                    for config in configs
+                }
+                self.assertEqual(len(configs), space.count())
+                self.assertEqual(
+                    found, self._reachable(registry, 'qemu-aarch64')
+                )
+                for config in configs:
+                    result = FeatureResolver(registry, 'qemu-aarch64').resolve(
+                        config.requested
+                    )
+                    self.assertEqual(
+                        {feature.full_id for feature in result.features},
+                        {feature.full_id for feature in config.features},
+                    )
+
+
+if __name__ == '__main__':
+    unittest.main()
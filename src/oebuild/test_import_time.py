@@ -0,0 +1,136 @@
+"""Import-time budget for the oebuild entry point.
+
+Every oebuild invocation imports ``oebuild.app.main``; docker, GitPython,
+ruamel.yaml and kconfiglib must only be loaded by the code paths that use
+them, and ``oebuild -v`` must not load them either once the command
+manifest is warm. The budget can be relaxed on slow machines through
+``OEBUILD_IMPORT_BUDGET_MS``.
+"""
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SRC_DIR = pathlib.Path(__file__).resolve().parent.parent
+ENTRY_MODULE = 'oebuild.app.main'
+HEAVY_PACKAGES = ('docker', 'git', 'ruamel', 'kconfiglib', 'menuconfig')
+DEFAULT_BUDGET_MS = 150
+RUNS = 3
+
+# runs `oebuild -v` in process, as a normal user, and reports the time it
+# took and the top level packages it imported
+VERSION_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import oebuild.app.main as app_main
+app_main.check_user = lambda: True
+try:
+    app_main.main(['-v'])
+except SystemExit:
+    pass
+print(json.dumps({
+    'ms': (time.perf_counter() - start) * 1000,
+    'packages': sorted({name.split('.')[0] for name in sys.modules}),
+}))
+"""
+
+
+def _env(**extra):
+    env = dict(os.environ, **extra)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [str(SRC_DIR), env.get('PYTHONPATH')])
+    )
+    return env
+
+
+def _budget():
+    return float(os.environ.get('OEBUILD_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS))
+
+
+def _import_time(module):
+    """
+    import module in a fresh interpreter, return the imported top level
+    packages and the cumulative import time of module in milliseconds
+    """
+    res = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        check=True,
+        text=True,
+        env=_env(),
+    )
+    packages = set()
+    cumulative_ms = None
+    for line in res.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        name = name.strip()
+        packages.add(name.split('.')[0])
+        if name == module:
+            cumulative_ms = int(cumulative) / 1000
+    return packages, cumulative_ms
+
+
+def _run_version(cache_dir):
+    """
+    run `oebuild -v` in a fresh interpreter with cache_dir as cache dir,
+    return its time in milliseconds and the top level packages it imported
+    """
+    res = subprocess.run(
+        [sys.executable, '-c', VERSION_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+        env=_env(OEBUILD_CACHE_DIR=cache_dir),
+    )
+    report = json.loads(res.stdout.strip().splitlines()[-1])
+    return report['ms'], set(report['packages'])
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_entry_point_skips_heavy_packages(self):
+        packages, _ = _import_time(ENTRY_MODULE)
+        self.assertEqual(
+            sorted(packages.intersection(HEAVY_PACKAGES)),
+            [],
+            'heavy packages must be imported lazily',
+        )
+
+    def test_entry_point_within_budget(self):
+        budget = _budget()
+        # the best of a few runs filters out scheduling noise
+        best = min(_import_time(ENTRY_MODULE)[1] for _ in range(RUNS))
+        self.assertLessEqual(
+            best,
+            budget,
+            f'importing {ENTRY_MODULE} took {best:.1f}ms, '
+            f'budget is {budget:.0f}ms',
+        )
+
+    def test_version_skips_heavy_packages_within_budget(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # the first run fills the command manifest
+            _run_version(cache_dir)
+            runs = [_run_version(cache_dir) for _ in range(RUNS)]
+        for _, packages in runs:
+            self.assertEqual(
+                sorted(packages.intersection(HEAVY_PACKAGES)),
+                [],
+                'oebuild -v must not import heavy packages',
+            )
+        best = min(elapsed for elapsed, _ in runs)
+        budget = _budget()
+        self.assertLessEqual(
+            best,
+            budget,
+            f'oebuild -v took {best:.1f}ms, budget is {budget:.0f}ms',
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
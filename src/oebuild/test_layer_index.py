@@ -0,0 +1,182 @@
+"""Unit tests for the layer.conf index and layer planning."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import oebuild.layer_index as layer_index
+from oebuild.layer_index import LayerIndex, read_layer_conf, version_satisfies
+
+CORE_CONF = """\
+BBFILE_COLLECTIONS += "core"
+BBFILE_PRIORITY_core = "5"
+LAYERVERSION_core = "12"
+LAYERSERIES_CORENAMES = "kirkstone"
+LAYERSERIES_COMPAT_core = "kirkstone"
+"""
+
+
+class LayerIndexTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.src = self.base / 'src'
+        self.cache = self.base / 'cache'
+        self._layer('yocto-poky/meta', CORE_CONF)
+        self._layer(
+            'meta-openembedded/meta-oe',
+            'BBFILE_COLLECTIONS += "openembedded-layer"\n'
+            'LAYERVERSION_openembedded-layer = "1"\n'
+            'LAYERDEPENDS_openembedded-layer = "core"\n'
+            'LAYERSERIES_COMPAT_openembedded-layer = "kirkstone"\n',
+        )
+        self._layer(
+            'meta-openeuler',
+            'BBFILE_COLLECTIONS += "openeuler-layer"\n'
+            'LAYERDEPENDS_openeuler-layer = "core (>= 12) \\\n'
+            '    openembedded-layer"\n'
+            'LAYERSERIES_COMPAT_openeuler-layer = "kirkstone langdale"\n',
+        )
+
+    def _layer(self, path, conf):
+        conf_path = self.src / path / 'conf' / 'layer.conf'
+        conf_path.parent.mkdir(parents=True, exist_ok=True)
+        conf_path.write_text(conf)
+        return conf_path
+
+    def _index(self):
+        return LayerIndex(self.src, self.cache)
+
+    def test_read_layer_conf_applies_operators(self):
+        conf_path = self._layer(
+            'meta-x',
+            'A = "1"\nA += "2"\nA =+ "0"\nA ?= "9"\nB ?= "x"\n'
+            'A:append = " 3"\nA:remove = "2"\nC = "a \\\n  b"\n',
+        )
+        variables = read_layer_conf(conf_path)
+        self.assertEqual(variables['A'], '0 1 3')
+        self.assertEqual(variables['B'], 'x')
+        self.assertEqual(variables['C'].split(), ['a', 'b'])
+
+    def test_version_constraints(self):
+        self.assertTrue(version_satisfies('12', '>= 12'))
+        self.assertTrue(version_satisfies('1.10', '> 1.9'))
+        self.assertFalse(version_satisfies('11', '>=12'))
+        self.assertTrue(version_satisfies('3', '3'))
+        self.assertFalse(version_satisfies(None, '3'))
+
+    def test_index_finds_nested_layers(self):
+        index = self._index()
+        self.assertEqual(
+            sorted(index.layers),
+            ['meta-openembedded/meta-oe', 'meta-openeuler', 'yocto-poky/meta'],
+        )
+        info = index.layers['meta-openeuler']
+        self.assertEqual(
+            info.depends, [('core', '>= 12'), ('openembedded-layer', None)]
+        )
+        self.assertEqual(index.layers['yocto-poky/meta'].priority, 5)
+
+    def test_missing_dependencies_are_added_first(self):
+        plan = self._index().plan(['meta-openeuler'], ['yocto-poky/meta'])
+        self.assertEqual((plan.errors, plan.warnings), ([], []))
+        self.assertEqual(
+            plan.layers, ['meta-openembedded/meta-oe', 'meta-openeuler']
+        )
+        self.assertEqual(
+            plan.added, {'meta-openembedded/meta-oe': 'meta-openeuler'}
+        )
+        # present layers are not added again
+        plan = self._index().plan(
+            ['yocto-poky/meta', 'meta-openembedded/meta-oe'],
+            ['yocto-poky/meta'],
+        )
+        self.assertEqual(plan.layers, ['meta-openembedded/meta-oe'])
+
+    def test_missing_layers_are_errors_and_mismatches_warnings(self):
+        self._layer('yocto-poky/meta', CORE_CONF.replace('"12"', '"11"', 1))
+        self._layer(
+            'meta-old',
+            'BBFILE_COLLECTIONS += "old"\nLAYERSERIES_COMPAT_old = "dunfell"\n'
+            'LAYERDEPENDS_old = "missing-layer"\n',
+        )
+        plan = self._index().plan(['meta-openeuler', 'meta-old', 'meta-none'])
+        self.assertEqual(len(plan.errors), 2, plan.errors)
+        for text in ('missing-layer', 'meta-none'):
+            self.assertTrue(any(text in error for error in plan.errors))
+        self.assertEqual(len(plan.warnings), 2, plan.warnings)
+        for text in ('(>= 12)', 'dunfell'):
+            self.assertTrue(any(text in warning for warning in plan.warnings))
+        # unknown present layers may provide what is missing
+        plan = self._index().plan(['meta-old'], ['/opt/meta-vendor'])
+        self.assertEqual(plan.errors, [])
+        self.assertEqual(len(plan.warnings), 1)
+
+    def test_deep_layers_are_found_by_path(self):
+        path = 'yocto-meta-openeuler/bsp/meta-openeuler-bsp'
+        self._layer(
+            path,
+            'BBFILE_COLLECTIONS += "openeuler-bsp"\n'
+            'LAYERDEPENDS_openeuler-bsp = "openeuler-layer"\n',
+        )
+        self.assertNotIn(path, self._index().layers)
+        plan = self._index().plan([path], ['yocto-poky/meta', 'meta-openeuler'])
+        self.assertEqual((plan.errors, plan.warnings), ([], []))
+        self.assertEqual(plan.layers, [path])
+        # the layer is cached like the scanned ones
+        with mock.patch.object(
+            layer_index, 'parse_layer', wraps=layer_index.parse_layer
+        ) as parse:
+            self._index().plan([path], ['yocto-poky/meta', 'meta-openeuler'])
+        self.assertEqual(parse.call_count, 0)
+
+    def test_unexpanded_values_are_unknown(self):
+        self._layer(
+            'meta-var',
+            'BBFILE_COLLECTIONS += "var"\n'
+            'LAYERVERSION_var = "${DISTRO_VERSION}"\n'
+            'LAYERSERIES_COMPAT_var = "${LAYERSERIES_COMPAT_core}"\n'
+            "LAYERDEPENDS_var = \"core ${@oe.utils.ifelse(x, 'a', 'b')}\"\n",
+        )
+        self._layer(
+            'meta-user',
+            'BBFILE_COLLECTIONS += "user"\nLAYERDEPENDS_user = "var (>= 3)"\n',
+        )
+        index = self._index()
+        info = index.layers['meta-var']
+        self.assertEqual((info.version, info.depends), (None, []))
+        self.assertTrue(info.version_unknown())
+        plan = index.plan(['meta-user'], ['yocto-poky/meta'])
+        self.assertEqual((plan.errors, plan.warnings), ([], []))
+        self.assertEqual(plan.layers, ['meta-var', 'meta-user'])
+        # a layer without known collections may provide what is missing
+        self._layer(
+            'meta-need',
+            'BBFILE_COLLECTIONS += "need"\nLAYERDEPENDS_need = "x"\n',
+        )
+        self.assertEqual(len(self._index().plan(['meta-need']).errors), 1)
+        self._layer('meta-dyn', 'BBFILE_COLLECTIONS += "${LAYER_NAME}"\n')
+        plan = self._index().plan(['meta-need'])
+        self.assertEqual((plan.errors, len(plan.warnings)), ([], 1))
+
+    def test_unchanged_layers_are_not_parsed_again(self):
+        self._index()
+        with mock.patch.object(
+            layer_index, 'parse_layer', wraps=layer_index.parse_layer
+        ) as parse:
+            self._index()
+            self.assertEqual(parse.call_count, 0)
+            conf_path = self.src / 'meta-openeuler' / 'conf' / 'layer.conf'
+            conf_path.write_text('BBFILE_COLLECTIONS += "openeuler-layer"\n')
+            stat = conf_path.stat()
+            os.utime(conf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            index = self._index()
+            self.assertEqual(parse.call_count, 1)
+        self.assertEqual(index.layers['meta-openeuler'].depends, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+"""Unit tests for writing local.conf."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+
+import oebuild.const as oebuild_const
+from oebuild.local_conf import LocalConf, LocalConfModel
+from oebuild.parse_param import ParseCompileParam
+
+LOCAL_CONF = """\
+MACHINE = "qemu-aarch64"
+  DISTRO = "openeuler"
+"""
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class LocalConfTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.path = pathlib.Path(workspace.name, 'local.conf')
+        self.path.write_text(LOCAL_CONF)
+
+    def _update(self):
+        compile_param = ParseCompileParam.parse_to_obj(
+            {
+                'build_in': 'docker',
+                'machine': 'qemu-aarch64',
+                'local_conf': '  IMAGE_FEATURES += "debug-tweaks"\n',
+            }
+        )
+        return LocalConf(str(self.path)).update(compile_param)
+
+    def test_second_update_leaves_the_file_alone(self):
+        self.assertTrue(self._update())
+        content = self.path.read_text()
+        self.assertIn('\nDISTRO = "openeuler"\n', content)
+        self.assertIn('\nIMAGE_FEATURES += "debug-tweaks"\n', content)
+        stamp = _stamp(self.path)
+        self.assertFalse(self._update())
+        self.assertEqual(_stamp(self.path), stamp)
+        self.assertEqual(self.path.read_text(), content)
+
+    def test_settings_replace_their_assignments(self):
+        self.path.write_text(
+            'MACHINE = "qemu-arm"\nEXTERNAL_TOOLCHAIN_GCC_aarch64 ?= "/x"\n'
+        )
+        compile_param = ParseCompileParam.parse_to_obj(
+            {
+                'build_in': 'docker',
+                'machine': 'qemu-aarch64',
+                'toolchain_type': 'EXTERNAL_TOOLCHAIN_aarch64',
+                'toolchain_dir': '/opt/gcc',
+                'tmp_dir': '/build/tmp',
+            }
+        )
+        for _ in range(2):
+            LocalConf(str(self.path)).update(compile_param)
+        self.assertEqual(
+            self.path.read_text().split('\n'),
+            [
+                'MACHINE = "qemu-aarch64"',
+                'EXTERNAL_TOOLCHAIN_GCC_aarch64 = '
+                f'"{oebuild_const.NATIVE_GCC_MAP}"',
+                'TMPDIR = "/build/tmp"',
+                '',
+            ],
+        )
+
+    def test_toolchain_is_always_the_gcc_name(self):
+        self.path.write_text('')
+        compile_param = ParseCompileParam.parse_to_obj(
+            {
+                'build_in': 'host',
+                'toolchain_type': 'EXTERNAL_TOOLCHAIN_arm',
+                'toolchain_dir': '/opt/gcc',
+            }
+        )
+        local_conf = LocalConf(str(self.path))
+        self.assertEqual(
+            local_conf._deal_toolchain_replace(compile_param),
+            ('EXTERNAL_TOOLCHAIN_GCC_arm', '/opt/gcc'),
+        )
+
+    def test_template_defaults_are_replaced_in_place(self):
+        self.path.write_text(
+            'MACHINE ??= "qemu-arm"\n'
+            'TMPDIR ?= "${TOPDIR}/tmp"\n'
+            'DISTRO = "openeuler"\n'
+        )
+        compile_param = ParseCompileParam.parse_to_obj(
+            {
+                'build_in': 'docker',
+                'machine': 'qemu-aarch64',
+                'tmp_dir': '/build/tmp',
+                'local_conf': 'IMAGE_FEATURES += "debug-tweaks"\n',
+            }
+        )
+        self.assertTrue(LocalConf(str(self.path)).update(compile_param))
+        content = self.path.read_text()
+        self.assertEqual(
+            content.split('\n')[:3],
+            [
+                'MACHINE = "qemu-aarch64"',
+                'TMPDIR = "/build/tmp"',
+                'DISTRO = "openeuler"',
+            ],
+        )
+        self.assertEqual(content.count('MACHINE'), 1)
+        self.assertEqual(content.count('TMPDIR'), 1)
+        # running generate again keeps one assignment each
+        self.assertFalse(LocalConf(str(self.path)).update(compile_param))
+        self.assertEqual(self.path.read_text(), content)
+
+    def test_commented_user_line_comments_out_the_existing_one(self):
+        self.path.write_text('A = "1"\nXA = "1"\n')
+        compile_param = ParseCompileParam.parse_to_obj(
+            {'build_in': 'docker', 'local_conf': '#A = "1"\n#A = "1"'}
+        )
+        LocalConf(str(self.path)).update(compile_param)
+        lines = self.path.read_text().split('\n')
+        self.assertEqual(lines[:2], ['#A = "1"', 'XA = "1"'])
+        self.assertEqual(lines[-3:], ['#A = "1"', '#A = "1"', ''])
+
+
+MODEL_CONF = """\
+# comment
+MACHINE = "qemu-aarch64"
+DISTRO_FEATURES:append = " x"
+  SSTATE_MIRRORS = "\\
+ file://.* file://a/PATH \\
+ "
+MACHINE ?= "qemu-arm"
+no newline at the end"""
+
+
+class LocalConfModelTest(unittest.TestCase):
+    def test_text_is_unchanged_without_edits(self):
+        self.assertEqual(LocalConfModel(MODEL_CONF).text(), MODEL_CONF)
+        model = LocalConfModel(MODEL_CONF)
+        model.add('\nNEW = "1"\n')
+        self.assertEqual(model.text(), MODEL_CONF + '\nNEW = "1"\n')
+
+    def test_get_returns_the_last_assignment(self):
+        model = LocalConfModel(MODEL_CONF)
+        self.assertEqual(model.get('MACHINE'), ('?=', '"qemu-arm"'))
+        self.assertEqual(model.get('DISTRO_FEATURES:append'), ('=', '" x"'))
+        self.assertEqual(model.get('SSTATE_MIRRORS'), ('=', '"\\'))
+        # continuation lines assign nothing
+        self.assertIsNone(model.get('file'))
+        self.assertIsNone(model.get('TMPDIR'))
+
+    def test_set_is_idempotent(self):
+        model = LocalConfModel(MODEL_CONF)
+        self.assertTrue(model.set('SSTATE_MIRRORS', 'file://.* file://b'))
+        self.assertFalse(model.set('SSTATE_MIRRORS', 'file://.* file://b'))
+        self.assertTrue(model.set('MACHINE', 'qemu-x86'))
+        self.assertTrue(model.set('TMPDIR', '/tmp/build'))
+        self.assertFalse(model.set('TMPDIR', '/tmp/build'))
+        self.assertEqual(
+            model.text(),
+            MODEL_CONF.replace(
+                '  SSTATE_MIRRORS = "\\\n file://.* file://a/PATH \\\n "',
+                'SSTATE_MIRRORS = "file://.* file://b"',
+            ).replace('MACHINE ?= "qemu-arm"', 'MACHINE = "qemu-x86"')
+            + '\nTMPDIR = "/tmp/build"\n',
+        )
+        # only the last assignment is replaced, whatever its operator
+        self.assertEqual(model.get('MACHINE'), ('=', '"qemu-x86"'))
+        self.assertIn('MACHINE = "qemu-aarch64"', model.text())
+
+    def test_strip_indent_and_write(self):
+        with tempfile.TemporaryDirectory() as workspace:
+            path = pathlib.Path(workspace, 'local.conf')
+            model = LocalConfModel(MODEL_CONF)
+            model.strip_indent()
+            self.assertTrue(model.write(path))
+            self.assertFalse(model.write(path))
+            self.assertIn('\nSSTATE_MIRRORS = ', path.read_text())
+            self.assertIn('\nfile://.* file://a/PATH', path.read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
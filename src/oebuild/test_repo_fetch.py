@@ -0,0 +1,184 @@
+"""Unit tests for the parallel manifest repository fetch."""
+
+import pathlib
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import oebuild.repo_fetch as repo_fetch
+import oebuild.util as oebuild_util
+from oebuild.ogit import OGit
+from oebuild.repo_fetch import FetchTask, fetch_repos, remote_host
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(
+        ['git', *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        encoding='utf-8',
+    ).stdout.strip()
+
+
+class RepoFetchTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.src = self.base / 'src'
+        self.versions = {}
+        for name in ('meta-a', 'meta-b', 'meta-c'):
+            self.versions[name] = self._bare_repo(name)
+
+    def _bare_repo(self, name):
+        work = self.base / 'work' / name
+        work.mkdir(parents=True)
+        _git('init', '-q', str(work))
+        (work / 'README').write_text(f'{name}\n')
+        _git('add', 'README', cwd=work)
+        _git(
+            '-c', 'user.name=oebuild', '-c', 'user.email=oebuild@localhost',
+            'commit', '-q', '-m', name, cwd=work,
+        )  # fmt: skip
+        _git('clone', '-q', '--bare', str(work), str(self._bare_path(name)))
+        return _git('rev-parse', 'HEAD', cwd=work)
+
+    def _bare_path(self, name):
+        return self.base / 'remote' / f'{name}.git'
+
+    def _task(self, name, version=None):
+        return FetchTask(
+            name=name,
+            repo_dir=str(self.src / name),
+            remote_url=self._bare_path(name).as_uri(),
+            version=version or self.versions.get(name),
+        )
+
+    def test_remote_host(self):
+        self.assertEqual(
+            remote_host('https://gitee.com/openeuler/yocto.git'), 'gitee.com'
+        )
+        self.assertEqual(
+            remote_host('ssh://git@Gitee.com:22/openeuler/yocto'), 'gitee.com'
+        )
+        self.assertEqual(remote_host('git@gitee.com:openeuler/x'), 'gitee.com')
+        self.assertEqual(remote_host('file:///srv/git/x.git'), '')
+        self.assertEqual(remote_host('/srv/git/x.git'), '')
+
+    def test_repos_are_checked_out_at_their_versions(self):
+        tasks = [self._task(name) for name in self.versions]
+        results = fetch_repos(tasks, jobs=3)
+        self.assertEqual(
+            [result.name for result in results], list(self.versions)
+        )
+        self.assertTrue(all(result.ok for result in results), results)
+        for name, version in self.versions.items():
+            head = _git('rev-parse', 'HEAD', cwd=self.src / name)
+            self.assertEqual(head, version)
+
+    def test_failures_are_reported_in_task_order(self):
+        tasks = [
+            self._task('meta-missing', version='1' * 40),
+            self._task('meta-a'),
+            self._task('meta-b', version='2' * 40),
+        ]
+        with self.assertLogs(level='ERROR'):
+            results = fetch_repos(tasks, jobs=3)
+        self.assertEqual(
+            [(result.name, result.ok) for result in results],
+            [('meta-missing', False), ('meta-a', True), ('meta-b', False)],
+        )
+        self.assertIn('fetch failed', results[0].error)
+        self.assertIn('2' * 40, results[2].error)
+
+    def test_download_repo_from_manifest_uses_manifest_versions(self):
+        manifest = self.base / 'manifest.yaml'
+        oebuild_util.write_yaml(
+            manifest,
+            {
+                'manifest_list': {
+                    name: {
+                        'remote_url': self._bare_path(name).as_uri(),
+                        'version': version,
+                    }
+                    for name, version in self.versions.items()
+                }
+            },
+        )
+        failed = oebuild_util.download_repo_from_manifest(
+            ['meta-b', 'meta-unknown'], str(self.src), str(manifest)
+        )
+        self.assertEqual(failed, [])
+        self.assertEqual(
+            sorted(path.name for path in self.src.iterdir()), ['meta-b']
+        )
+        # without a manifest nothing is pinned, so nothing is fetched
+        self.assertEqual(
+            oebuild_util.download_repo_from_manifest(
+                ['meta-a'], str(self.src), str(self.base / 'none.yaml')
+            ),
+            [],
+        )
+
+    def test_checkout_at_version_skips_git(self):
+        fetch_repos([self._task('meta-a')])
+        with mock.patch.object(
+            OGit, '_fetch_upstream', return_value=True
+        ) as fetch:
+            results = fetch_repos([self._task('meta-a')])
+            self.assertTrue(results[0].ok)
+            self.assertEqual(fetch.call_count, 0)
+            # another remote, or another version, still needs a fetch
+            moved = self._task('meta-a')
+            moved.remote_url = self._bare_path('meta-b').as_uri()
+            fetch_repos([moved, self._task('meta-a', version='master')])
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_is_at_version_reads_symbolic_and_packed_refs(self):
+        repo_dir = self.src / 'meta-c'
+        remote_url = self._bare_path('meta-c').as_uri()
+        _git('clone', '-q', remote_url + '/', str(repo_dir))
+        _git('pack-refs', '--all', cwd=repo_dir)
+        version = self.versions['meta-c']
+        repo_git = OGit(str(repo_dir), remote_url)
+        self.assertTrue(repo_git.is_at_version(version))
+        self.assertTrue(repo_git.is_at_version(version[:12]))
+        self.assertFalse(repo_git.is_at_version('master'))
+        self.assertFalse(repo_git.is_at_version('1' * 40))
+        missing = OGit(str(self.src / 'meta-none'), remote_url)
+        self.assertFalse(missing.is_at_version(version))
+
+    def test_fetches_per_host_are_bounded(self):
+        lock = threading.Lock()
+        running = {}
+        peak = {}
+
+        def fake_fetch(task, progress=True):
+            host = remote_host(task.remote_url)
+            with lock:
+                running[host] = running.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), running[host])
+            time.sleep(0.02)
+            with lock:
+                running[host] -= 1
+            return repo_fetch.FetchResult(
+                task.name, task.remote_url, task.version
+            )
+
+        tasks = [
+            FetchTask(f'{host}-{index}', '', f'https://{host}/r{index}')
+            for host in ('one.example', 'two.example')
+            for index in range(6)
+        ]
+        with mock.patch.object(repo_fetch, 'fetch_repo', fake_fetch):
+            results = fetch_repos(tasks, jobs=8, per_host=2)
+        self.assertEqual([r.name for r in results], [t.name for t in tasks])
+        self.assertEqual(peak, {'one.example': 2, 'two.example': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
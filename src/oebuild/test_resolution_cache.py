@@ -0,0 +1,111 @@
+"""Unit tests for the on-disk feature resolution cache."""
+
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from oebuild.feature_resolver import (
+    FeatureRegistry,
+    FeatureResolver,
+    feature_tree_digest,
+)
+from oebuild.resolution_cache import ResolutionCache
+
+
+class ResolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.features_dir = self.base / 'features'
+        (self.features_dir / 'os').mkdir(parents=True)
+        (self.features_dir / 'os' / 'rt.yaml').write_text('id: rt\n')
+        (self.features_dir / 'os' / 'debug.yaml').write_text(
+            'id: debug\ndependencies: [os/rt]\n'
+        )
+        self.registry = FeatureRegistry(self.features_dir)
+        self.cache = ResolutionCache(self.base / 'cache')
+
+    def _resolve(self, *requested):
+        return FeatureResolver(self.registry, 'qemu-aarch64').resolve(requested)
+
+    def test_digest_matches_registry(self):
+        self.assertEqual(
+            feature_tree_digest(self.features_dir), self.registry.digest
+        )
+
+    def test_digest_covers_directory_and_content(self):
+        digest = self.registry.digest
+        other = self.base / 'other'
+        shutil.copytree(self.features_dir, other)
+        self.assertNotEqual(feature_tree_digest(other), digest)
+        # same size and mtime, different content
+        rt_file = self.features_dir / 'os' / 'rt.yaml'
+        stat = rt_file.stat()
+        rt_file.write_text('id: xx\n')
+        os.utime(rt_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertNotEqual(feature_tree_digest(self.features_dir), digest)
+
+    def test_hit_uses_normalized_request(self):
+        digest = self.registry.digest
+        self.cache.put(
+            digest, 'qemu-aarch64', ['debug'], self._resolve('debug')
+        )
+        cached = self.cache.get(digest, ' QEMU-aarch64', ['DEBUG ', 'debug'])
+        self.assertEqual(
+            [feature.full_id for feature in cached.features],
+            ['os/debug', 'os/rt'],
+        )
+        self.assertIsNone(self.cache.get(digest, 'qemu-arm', ['debug']))
+        self.assertIsNone(
+            self.cache.get(digest, 'qemu-aarch64', ['debug', 'rt'])
+        )
+        self.assertIsNone(self.cache.get('0' * 64, 'qemu-aarch64', ['debug']))
+
+    def test_entries_and_clear(self):
+        digest = self.registry.digest
+        self.cache.put(digest, 'qemu-aarch64', ['rt'], self._resolve('rt'))
+        self.cache.put(digest, 'qemu-arm', [], self._resolve())
+        entries = self.cache.entries()
+        self.assertEqual(
+            sorted((entry.machine, entry.requested) for entry in entries),
+            [('qemu-aarch64', ('rt',)), ('qemu-arm', ())],
+        )
+        self.assertEqual(self.cache.size(), sum(e.size for e in entries))
+        self.assertEqual(self.cache.clear(), 2)
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_damaged_entry_is_a_miss(self):
+        digest = self.registry.digest
+        self.cache.put(digest, 'qemu-aarch64', ['rt'], self._resolve('rt'))
+        key = ResolutionCache.make_key(digest, 'qemu-aarch64', ['rt'])
+        (self.cache.cache_path / f'{key}.pickle').write_bytes(b'garbage')
+        self.assertIsNone(self.cache.get(digest, 'qemu-aarch64', ['rt']))
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        digest = self.registry.digest
+        result = self._resolve('rt')
+        self.cache.put(digest, 'm1', ['rt'], result)
+        entry_size = self.cache.size()
+        self.cache.max_bytes = entry_size * 2
+        self.cache.put(digest, 'm2', ['rt'], result)
+        # make m1 older than m2, then use it again
+        for name, age in (('m1', 20), ('m2', 10)):
+            path = self.cache.cache_path / (
+                ResolutionCache.make_key(digest, name, ['rt']) + '.pickle'
+            )
+            mtime = path.stat().st_mtime_ns - age * 10**9
+            os.utime(path, ns=(mtime, mtime))
+        self.assertIsNotNone(self.cache.get(digest, 'm1', ['rt']))
+        self.cache.put(digest, 'm3', ['rt'], result)
+        self.assertEqual(
+            sorted(entry.machine for entry in self.cache.entries()),
+            ['m1', 'm3'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
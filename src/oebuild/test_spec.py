@@ -0,0 +1,112 @@
+"""Unit tests for the extension command manifest (oebuild.spec).
+
+A throwaway plugin module counts how many times it is executed, so the tests
+can tell whether help/description were served from the manifest or required
+importing the plugin.
+"""
+
+import os
+import pathlib
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+import oebuild.util as oebuild_util
+from oebuild.spec import CommandManifest, _ExtCommand, get_spec
+
+PLUGIN_BODY = """
+import builtins
+
+builtins.OEBUILD_TEST_IMPORTS = getattr(builtins, 'OEBUILD_TEST_IMPORTS', 0) + 1
+
+
+class Demo:
+    help_msg = '{help_msg}'
+    description = 'demo description'
+"""
+
+
+class CommandManifestTest(unittest.TestCase):
+    def setUp(self):
+        import builtins
+
+        self.builtins = builtins
+        builtins.OEBUILD_TEST_IMPORTS = 0
+        self.addCleanup(delattr, builtins, 'OEBUILD_TEST_IMPORTS')
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        base = pathlib.Path(workspace.name)
+        self.manifest_path = str(base / 'cache' / 'command_manifest.json')
+        # get_spec treats paths under ~/.local/oebuild_plugins/ as absolute
+        plugin_dir = base / '.local/oebuild_plugins/demo'
+        plugin_dir.mkdir(parents=True)
+        self.plugin = plugin_dir / 'demo.py'
+        self._write_plugin('demo help')
+        self.command_ext = _ExtCommand(
+            name='demo', class_name='Demo', path=str(self.plugin)
+        )
+
+    def _write_plugin(self, help_msg):
+        self.plugin.write_text(
+            textwrap.dedent(PLUGIN_BODY.format(help_msg=help_msg))
+        )
+
+    def _load(self):
+        manifest = CommandManifest(self.manifest_path)
+        spec = get_spec('app', self.command_ext, manifest=manifest)
+        manifest.save()
+        return spec
+
+    def test_cold_load_imports_plugin_once(self):
+        spec = self._load()
+        self.assertEqual(spec.help, 'demo help')
+        self.assertEqual(spec.description, 'demo description')
+        self.assertEqual(self.builtins.OEBUILD_TEST_IMPORTS, 1)
+
+    def test_warm_load_does_not_import_plugin(self):
+        self._load()
+        spec = self._load()
+        self.assertEqual(spec.help, 'demo help')
+        self.assertEqual(self.builtins.OEBUILD_TEST_IMPORTS, 1)
+        # running the command still imports its module on demand
+        self.assertEqual(spec.factory().help_msg, 'demo help')
+        self.assertEqual(self.builtins.OEBUILD_TEST_IMPORTS, 2)
+
+    def test_modified_plugin_invalidates_entry(self):
+        self._load()
+        self._write_plugin('changed help')
+        stat = os.stat(self.plugin)
+        os.utime(self.plugin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        spec = self._load()
+        self.assertEqual(spec.help, 'changed help')
+        self.assertEqual(self.builtins.OEBUILD_TEST_IMPORTS, 2)
+
+    def test_corrupt_manifest_is_ignored(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        pathlib.Path(self.manifest_path).write_text('{not json')
+        spec = self._load()
+        self.assertEqual(spec.help, 'demo help')
+
+    def test_plugin_list_is_parsed_once(self):
+        plugins_yaml = self.plugin.with_name('plugins.yaml')
+        plugins_yaml.write_text(
+            'plugins:\n  - name: demo\n    class: Demo\n    path: demo.py\n'
+        )
+        expected = [{'name': 'demo', 'class': 'Demo', 'path': 'demo.py'}]
+        with mock.patch.object(
+            oebuild_util, 'read_yaml_safe', wraps=oebuild_util.read_yaml_safe
+        ) as parse:
+            for _ in range(2):
+                manifest = CommandManifest(self.manifest_path)
+                self.assertEqual(manifest.plugins(plugins_yaml), expected)
+                manifest.save()
+            self.assertEqual(parse.call_count, 1)
+            plugins_yaml.write_text('')
+            manifest = CommandManifest(self.manifest_path)
+            self.assertEqual(manifest.plugins(plugins_yaml), [])
+            self.assertEqual(parse.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for the platform and common.yaml template cache."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import oebuild.util as oebuild_util
+from oebuild.template_cache import TemplateCache
+
+
+class TemplateCacheTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.path = self.base / 'qemu-aarch64.yaml'
+        self.path.write_text('type: platform\nlayers: [meta-a]\n')
+        self.cache_dir = self.base / 'cache'
+
+    def _read(self, cache):
+        with mock.patch.object(
+            oebuild_util, 'read_yaml_safe', wraps=oebuild_util.read_yaml_safe
+        ) as parse:
+            data = cache.read(self.path)
+        return data, parse.call_count
+
+    def test_later_processes_skip_parsing(self):
+        cache = TemplateCache(self.cache_dir)
+        expected = {'type': 'platform', 'layers': ['meta-a']}
+        self.assertEqual(self._read(cache), (expected, 1))
+        self.assertEqual(self._read(cache), (expected, 0))
+        # a new process only has the cache dir
+        self.assertEqual(
+            self._read(TemplateCache(self.cache_dir)), (expected, 0)
+        )
+
+    def test_process_hit_skips_the_pickle(self):
+        cache = TemplateCache(self.cache_dir)
+        cache.read(self.path)
+        with mock.patch.object(
+            TemplateCache, '_load_entry', wraps=cache._load_entry
+        ) as load:
+            for _ in range(3):
+                self.assertEqual(cache.read(self.path)['layers'], ['meta-a'])
+        self.assertEqual(load.call_count, 0)
+        cache.clear()
+        data, parses = self._read(cache)
+        self.assertEqual((data['layers'], parses), (['meta-a'], 0))
+
+    def test_changed_template_is_parsed_again(self):
+        cache = TemplateCache(self.cache_dir)
+        self._read(cache)
+        self.path.write_text('type: platform\nlayers: [meta-b]\n')
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        for reader in (cache, TemplateCache(self.cache_dir)):
+            data, parses = self._read(reader)
+            self.assertEqual(data['layers'], ['meta-b'])
+        self.assertEqual(parses, 0)
+
+    def test_callers_get_their_own_copy(self):
+        cache = TemplateCache(self.cache_dir)
+        cache.read(self.path)['layers'].append('meta-x')
+        self.assertEqual(cache.read(self.path)['layers'], ['meta-a'])
+
+    def test_damaged_entry_is_a_miss(self):
+        TemplateCache(self.cache_dir).read(self.path)
+        for entry in (self.cache_dir / 'templates').iterdir():
+            entry.write_bytes(b'garbage')
+        data, parses = self._read(TemplateCache(self.cache_dir))
+        self.assertEqual((data['layers'], parses), (['meta-a'], 1))
+
+    def test_missing_template_raises(self):
+        with self.assertRaises(ValueError):
+            TemplateCache(self.cache_dir).read(self.base / 'missing.yaml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Unit tests for the YAML and file helpers in oebuild.util."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import oebuild.util as oebuild_util
+
+SAMPLE = """\
+# comments are dropped by the safe loader
+type: platform
+machine: qemu-aarch64
+switch: on
+local_conf: |
+  MACHINE_FEATURES += "x"
+repos:
+  - yocto-poky
+"""
+
+
+class ReadYamlSafeTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.path = pathlib.Path(workspace.name, 'sample.yaml')
+        self.path.write_text(SAMPLE, encoding='utf-8')
+        oebuild_util._SAFE_YAML_CACHE.clear()
+        self.addCleanup(oebuild_util._SAFE_YAML_CACHE.clear)
+
+    def test_matches_round_trip_loader(self):
+        data = oebuild_util.read_yaml_safe(self.path)
+        self.assertIs(type(data), dict)
+        self.assertEqual(data, oebuild_util.read_yaml(self.path))
+        # YAML 1.2 semantics are kept: "on" is not a boolean
+        self.assertEqual(data['switch'], 'on')
+
+    def test_file_is_parsed_once(self):
+        with mock.patch.object(
+            oebuild_util, '_safe_yaml', wraps=oebuild_util._safe_yaml
+        ) as loader:
+            for _ in range(3):
+                oebuild_util.read_yaml_safe(str(self.path))
+        self.assertEqual(loader.call_count, 1)
+
+    def test_changed_file_is_parsed_again(self):
+        oebuild_util.read_yaml_safe(self.path)
+        self.path.write_text('type: feature\n', encoding='utf-8')
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(
+            oebuild_util.read_yaml_safe(self.path), {'type': 'feature'}
+        )
+
+    def test_callers_get_their_own_copy(self):
+        oebuild_util.read_yaml_safe(self.path)['repos'].append('changed')
+        self.assertEqual(
+            oebuild_util.read_yaml_safe(self.path)['repos'], ['yocto-poky']
+        )
+
+    def test_missing_file_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            oebuild_util.read_yaml_safe(self.path.with_name('missing.yaml'))
+
+
+class WriteIfChangedTest(unittest.TestCase):
+    def setUp(self):
+        workspace = tempfile.TemporaryDirectory()
+        self.addCleanup(workspace.cleanup)
+        self.base = pathlib.Path(workspace.name)
+        self.path = self.base / 'conf' / 'local.conf'
+
+    def _stamp(self, path):
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def test_unchanged_content_keeps_the_file(self):
+        self.assertTrue(oebuild_util.write_if_changed(self.path, 'A = "1"\n'))
+        os.chmod(self.path, 0o640)
+        stamp = self._stamp(self.path)
+        self.assertFalse(oebuild_util.write_if_changed(self.path, 'A = "1"\n'))
+        self.assertEqual(self._stamp(self.path), stamp)
+        self.assertTrue(oebuild_util.write_if_changed(self.path, 'A = "2"\n'))
+        self.assertNotEqual(self._stamp(self.path), stamp)
+        self.assertEqual(self.path.read_text(), 'A = "2"\n')
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.path.parent), ['local.conf'])
+
+    def test_symlink_is_written_through(self):
+        target = self.base / 'real.conf'
+        target.write_text('old\n')
+        link = self.base / 'link.conf'
+        link.symlink_to(target)
+        self.assertTrue(oebuild_util.write_if_changed(link, 'new\n'))
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(target.read_text(), 'new\n')
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        oebuild_util.write_atomic(self.path, b'old\n')
+        with mock.patch.object(
+            os, 'replace', side_effect=RuntimeError('interrupted')
+        ), self.assertRaises(RuntimeError):
+            oebuild_util.write_atomic(self.path, b'new\n')
+        self.assertEqual(os.listdir(self.path.parent), ['local.conf'])
+        self.assertEqual(self.path.read_bytes(), b'old\n')
+
+    def test_yaml_matches_write_yaml(self):
+        data = {'machine': 'qemu-aarch64', 'layers': ['meta-a', 'meta-b']}
+        written = self.base / 'compile.yaml'
+        oebuild_util.write_yaml(written, data)
+        path = self.base / 'other.yaml'
+        self.assertTrue(oebuild_util.write_yaml_if_changed(path, data))
+        self.assertEqual(path.read_text(), written.read_text())
+        self.assertFalse(oebuild_util.write_yaml_if_changed(path, data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,10 @@ MERCHANTABILITY OR FIT FOR A PARTICULAR PURPOSE.
 See the Mulan PSL v2 for more details.
 """
 
+from __future__ import annotations
+
+import copy
+import functools
 import getpass
 import os
 import pathlib
@@ -19,20 +23,20 @@ import subprocess
 import sys
 import time
 from contextlib import contextmanager
-
-from docker.errors import DockerException
-from docker.models.containers import Container
-from ruamel.yaml import YAML
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 import oebuild.const as oebuild_const
-from oebuild.docker_proxy import DockerProxy
 from oebuild.m_log import logger
-from oebuild.ogit import OGit
-from oebuild.parse_env import EnvContainer, ParseEnv
-from oebuild.parse_param import ParseRepoParam
-from oebuild.struct import DockerParam, RepoParam
 from oebuild.version import __version__
 
+# docker, GitPython and ruamel.yaml are imported by the functions that use
+# them, nearly every command imports this module and most never need them
+if TYPE_CHECKING:
+    from docker.models.containers import Container
+
+    from oebuild.parse_env import ParseEnv
+    from oebuild.struct import DockerParam
+
 
 def get_nativesdk_environment(
     nativesdk_dir=oebuild_const.NATIVESDK_DIR, container: Container = None
@@ -90,6 +94,8 @@ def read_yaml(yaml_path):
     if not os.path.exists(yaml_path.absolute()):
         raise ValueError(f'yaml_dir can not find in :{yaml_path.absolute()}')
 
+    from ruamel.yaml import YAML  # pylint: disable=C0415
+
     try:
         with open(yaml_path, 'r', encoding='utf-8') as r_f:
             yaml = YAML()
@@ -99,6 +105,40 @@ def read_yaml(yaml_path):
         raise e_p
 
 
+# abspath -> ((st_mtime_ns, st_size), data), filled by read_yaml_safe
+_SAFE_YAML_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _safe_yaml():
+    from ruamel.yaml import YAML  # pylint: disable=C0415
+
+    # the safe loader parses through libyaml when ruamel.yaml.clib is there
+    return YAML(typ='safe')
+
+
+def read_yaml_safe(yaml_path):
+    """
+    read a yaml file that oebuild never writes back and parse it to plain
+    dict/list objects. Comments and styles are dropped, which allows the C
+    accelerated safe loader, and the result is cached in process by path,
+    mtime and size. Every call returns its own copy, so callers may modify
+    it. Use read_yaml for files that are written back
+    """
+    yaml_path = os.path.abspath(yaml_path)
+    try:
+        stat = os.stat(yaml_path)
+    except FileNotFoundError as f_e:
+        raise ValueError(f'yaml_dir can not find in :{yaml_path}') from f_e
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _SAFE_YAML_CACHE.get(yaml_path)
+    if cached is None or cached[0] != key:
+        with open(yaml_path, encoding='utf-8') as r_f:
+            cached = (key, _safe_yaml().load(r_f.read()))
+        _SAFE_YAML_CACHE[yaml_path] = cached
+    return copy.deepcopy(cached[1])
+
+
 def write_yaml(yaml_path, data):
     """
     write data to yaml file
@@ -110,11 +150,79 @@ def write_yaml(yaml_path, data):
             os.makedirs(os.path.dirname(yaml_path.absolute()))
         os.mknod(yaml_path)
 
+    from ruamel.yaml import YAML  # pylint: disable=C0415
+
     with open(yaml_path, 'w', encoding='utf-8') as w_f:
         yaml = YAML()
         yaml.dump(data, w_f)
 
 
+def dump_yaml(data) -> str:
+    """
+    render data to yaml text exactly as write_yaml writes it
+    """
+    import io  # pylint: disable=C0415
+
+    from ruamel.yaml import YAML  # pylint: disable=C0415
+
+    stream = io.StringIO()
+    YAML().dump(data, stream)
+    return stream.getvalue()
+
+
+def write_atomic(path, data: bytes, mode: Optional[int] = None) -> None:
+    """
+    write data to a temporary file next to path and rename it over path,
+    so readers never see a partly written file. The parent directory is
+    created if needed, mode sets the permissions of the new file, and the
+    temporary file is removed again if anything fails
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.urandom(4).hex()}.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as w_f:
+            w_f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_if_changed(path, content: str) -> bool:
+    """
+    write content to path only when it differs from what the file already
+    holds, and return whether it was written. An unchanged file keeps its
+    mtime, so bitbake does not re-parse its configuration for nothing. The
+    new content is written with write_atomic
+    """
+    # a symlinked file is written through the link
+    path = pathlib.Path(os.path.realpath(path))
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as r_f:
+            if r_f.read() == data:
+                return False
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        # a new file gets the default permissions, reading the umask would
+        # change it for every thread for a moment
+        mode = None
+    write_atomic(path, data, mode)
+    return True
+
+
+def write_yaml_if_changed(yaml_path, data) -> bool:
+    """
+    write data to yaml file when the rendered text differs from the file,
+    see write_if_changed
+    """
+    return write_if_changed(yaml_path, dump_yaml(data))
+
+
 def get_git_repo_name(remote_url: str):
     """
     return repo name
@@ -140,6 +248,20 @@ def get_base_oebuild():
     return os.path.abspath(os.path.dirname(__file__))
 
 
+def get_cache_dir():
+    """
+    return oebuild cache dir, OEBUILD_CACHE_DIR takes precedence over
+    $XDG_CACHE_HOME/oebuild and ~/.cache/oebuild
+    """
+    cache_dir = os.environ.get(oebuild_const.CACHE_DIR_ENV)
+    if cache_dir:
+        return os.path.abspath(os.path.expanduser(cache_dir))
+    xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(xdg_cache, 'oebuild')
+
+
 def get_config_yaml_dir():
     """
     return config yaml dir
@@ -206,6 +328,10 @@ def check_docker():
     """
     check docker had be installed or not
     """
+    from docker.errors import DockerException  # pylint: disable=C0415
+
+    from oebuild.docker_proxy import DockerProxy  # pylint: disable=C0415
+
     try:
         DockerProxy()
     except DockerException as exc:
@@ -295,24 +421,35 @@ def get_host_proxy(proxy_name):
 
 def download_repo_from_manifest(repo_list, src_dir, manifest_path):
     """
-    Download the repos set in compile.yaml based on the given base path
+    Download the repos set in compile.yaml based on the given base path.
+    The repos are fetched in parallel, the ones that failed are logged in
+    the order of repo_list and returned
     """
     if repo_list is None or len(repo_list) == 0:
-        return
-    manifest = None
+        return []
+    # pylint: disable=C0415
+    from oebuild.parse_param import ParseRepoParam
+    from oebuild.repo_fetch import FetchTask, fetch_repos
+
+    manifest = {}
     if os.path.exists(manifest_path):
-        manifest = read_yaml(pathlib.Path(manifest_path))['manifest_list']
+        manifest = read_yaml_safe(manifest_path)['manifest_list']
+    tasks = []
     for repo_name in repo_list:
-        repo_dir = os.path.join(src_dir, repo_name)
         if repo_name in manifest:
-            print(repo_name)
-            repo_obj: RepoParam = ParseRepoParam.parse_to_obj(
-                manifest[repo_name]
-            )
-            repo_git = OGit(
-                repo_dir=repo_dir, remote_url=repo_obj.remote_url, branch=None
+            repo_obj = ParseRepoParam.parse_to_obj(manifest[repo_name])
+            tasks.append(
+                FetchTask(
+                    name=repo_name,
+                    repo_dir=os.path.join(src_dir, repo_name),
+                    remote_url=repo_obj.remote_url,
+                    version=repo_obj.version,
+                )
             )
-            repo_git.check_out_version(version=repo_obj.version)
+    failed = [result for result in fetch_repos(tasks) if not result.ok]
+    for result in failed:
+        logger.error('download %s failed: %s', result.name, result.error)
+    return failed
 
 
 def sync_repo_from_cache(repo_list, src_dir, cache_src_dir):
@@ -343,7 +480,7 @@ def get_docker_image_from_yocto(yocto_dir):
     if not os.path.exists(env_path):
         return None
 
-    env_parse = read_yaml(yaml_path=env_path)
+    env_parse = read_yaml_safe(env_path)
     if 'docker_image' in env_parse:
         return str(env_parse['docker_image'])
 
@@ -361,7 +498,7 @@ def get_sdk_docker_image_from_yocto(yocto_dir):
     if not os.path.exists(env_path):
         return None
 
-    env_parse = read_yaml(yaml_path=env_path)
+    env_parse = read_yaml_safe(env_path)
     if 'sdk_docker_image' in env_parse:
         return str(env_parse['sdk_docker_image'])
 
@@ -377,6 +514,8 @@ def deal_env_container(env: ParseEnv, docker_param: DockerParam):
     are inconsistent, you need to create a new container, otherwise
     directly enable the sleeping container
     """
+    from oebuild.docker_proxy import DockerProxy  # pylint: disable=C0415
+    from oebuild.parse_env import EnvContainer  # pylint: disable=C0415
 
     def check_container_img_eq(container_id, docker_image):
         c_mid = docker_proxy.get_container_img_id(container_id=container_id)
@@ -393,7 +532,7 @@ def deal_env_container(env: ParseEnv, docker_param: DockerParam):
         )
     ):
         # judge which container
-        container: Container = docker_proxy.create_container(
+        container = docker_proxy.create_container(
             image=docker_param.image,
             parameters=docker_param.parameters,
             volumes=docker_param.volumns,
@@ -405,7 +544,7 @@ def deal_env_container(env: ParseEnv, docker_param: DockerParam):
         env.export_env()
 
     container_id = env.container.short_id
-    container: Container = docker_proxy.get_container(container_id)  # type: ignore
+    container = docker_proxy.get_container(container_id)
     if not docker_proxy.is_container_running(container):
         docker_proxy.start_container(container)
     return container_id